@@ -3,8 +3,13 @@ from dotenv import load_dotenv
 import os
 from google.cloud import texttospeech
 from typing import Optional
+from utils.deadline import timeout_for
+from utils.metrics import track_external
 load_dotenv()
 
+# Upper bound for one synthesis call; capped further by the request deadline
+SYNTHESIS_TIMEOUT_SECONDS = 60.0
+
 class TextToSpeechClientWrapper:
     def __init__(self):
         # Try multiple possible paths for the credentials file
@@ -28,8 +33,11 @@ class TextToSpeechClientWrapper:
                     speaking_rate: Optional[float] = 1.0, 
                     pitch: Optional[float] = 0.0, 
                     volume_gain_db: Optional[float] = None,
-                    voice_name: Optional[str] = None) -> bytes:
-        input_text = texttospeech.SynthesisInput(text=text)
+                    voice_name: Optional[str] = None,
+                    ssml: bool = False,
+                    sample_rate_hertz: Optional[int] = None) -> bytes:
+        # ``text`` is an SSML document (``<speak>...</speak>``) when ssml=True
+        input_text = texttospeech.SynthesisInput(ssml=text) if ssml else texttospeech.SynthesisInput(text=text)
         
         # Use Indian English voices for more authentic, rustic sound
         if voice_name:
@@ -56,12 +64,16 @@ class TextToSpeechClientWrapper:
             audio_config.pitch = pitch
         if volume_gain_db is not None:
             audio_config.volume_gain_db = volume_gain_db
+        if sample_rate_hertz is not None:
+            audio_config.sample_rate_hertz = sample_rate_hertz
 
 
 
-        response = self.client.synthesize_speech(
-            input=input_text, voice=voice, audio_config=audio_config
-        )
+        with track_external("tts", "synthesize"):
+            response = self.client.synthesize_speech(
+                input=input_text, voice=voice, audio_config=audio_config,
+                timeout=timeout_for(SYNTHESIS_TIMEOUT_SECONDS),
+            )
 
         return response.audio_content
     def save_to_file(self, audio_content: bytes, filename: str):
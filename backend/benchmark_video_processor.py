@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the video processing pipeline on synthetic inputs.
+
+Needs ffmpeg and the backend requirements, but no credentials, network or
+existing database rows: every case generates a synthetic product clip
+(ffmpeg ``testsrc2`` pattern with a tone) of the given duration and
+resolution, stores it with a synthetic story in a throwaway SQLite database,
+replaces Cloud Text-to-Speech with a stub that returns a tone of the given
+narration length, and runs the stages of ``VideoProcessor`` one by one:
+
+    load       read the source video and story from the database
+    narration  chunked synthesis (stub TTS) and MP3 encode
+    render     loop/trim to the narration, mux and encode of every
+               aspect-ratio variant (one ffmpeg pass in this engine)
+    store      write every variant into edited_videos in one transaction
+    hls        HLS rendition ladder into the media store
+    previews   poster frames and animated preview into the media store
+
+Each case runs in a fresh Python process, with a cold media store, so peak
+RSS figures belong to that case alone. Per stage the report shows wall time,
+CPU time (this process plus ffmpeg children) and the peak RSS reached so far
+by this process and by its largest child.
+
+Usage:
+    python benchmark_video_processor.py
+    python benchmark_video_processor.py --durations 8,30 --resolutions 1280x720,1080x1920 \\
+        --narration-seconds 20,45 --variants 16x9 --repeat 3 --json results.json
+"""
+
+import argparse
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import resource
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from contextlib import contextmanager
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_UID = 1
+STAGES = ["load", "narration", "render", "store", "hls", "previews"]
+STORY_SENTENCE = (
+    "This hand-woven piece was made on a village loom over many weeks, "
+    "using natural dyes and patterns passed down through generations."
+)
+
+
+class StubTextToSpeech:
+    """Stands in for ``TextToSpeechClientWrapper``: a tone as long as the text would be spoken."""
+
+    def __init__(self, seconds_per_char: float):
+        self.seconds_per_char = seconds_per_char
+        self.calls = 0
+
+    def synthesize_speech(self, text: str, ssml: bool = False, sample_rate_hertz=None, **kwargs) -> bytes:
+        self.calls += 1
+        if ssml:
+            text = text.replace("<speak>", "").replace("</speak>", "")
+        rate = sample_rate_hertz or 24000
+        frames = int(len(text) * self.seconds_per_char * rate)
+        # One 300 Hz period, repeated: fast to build for minutes of audio
+        period = [int(8000 * math.sin(2 * math.pi * 300 * i / rate)) for i in range(rate // 300)]
+        cycle = struct.pack(f"<{len(period)}h", *period)
+        samples = (cycle * (frames // len(period) + 1))[: frames * 2]
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(samples)
+        return buffer.getvalue()
+
+
+def synthetic_clip(duration: float, width: int, height: int, fps: int = 24) -> bytes:
+    """H.264/AAC MP4 of a moving test pattern with a tone."""
+    from services.media import ffmpeg
+
+    with ffmpeg.memfile(name="synthetic_clip") as output_fd:
+        ffmpeg.run(
+            [
+                "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={duration}",
+                "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+                "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+                "-c:a", "aac", "-shortest",
+                "-movflags", "+faststart", "-f", "mp4", ffmpeg.fd_path(output_fd),
+            ],
+            pass_fds=(output_fd,),
+        )
+        return b"".join(ffmpeg.read_chunks(output_fd))
+
+
+def _usage():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpu": own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        # ru_maxrss is in KiB on Linux
+        "rss_mb": own.ru_maxrss / 1024,
+        "child_rss_mb": children.ru_maxrss / 1024,
+    }
+
+
+@contextmanager
+def measure(results: dict, stage: str):
+    before = _usage()
+    start = time.perf_counter()
+    yield
+    wall = time.perf_counter() - start
+    after = _usage()
+    results[stage] = {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(after["cpu"] - before["cpu"], 3),
+        "peak_rss_mb": round(after["rss_mb"], 1),
+        "peak_child_rss_mb": round(after["child_rss_mb"], 1),
+    }
+
+
+def run_case(case: dict) -> dict:
+    """Run every stage once for ``case``; called in a fresh process."""
+    work_dir = tempfile.mkdtemp(prefix="video-benchmark-")
+    db_path = os.path.join(work_dir, "app.db")
+    # Everything local and cold: no GCS bucket, an empty media store, inline media jobs
+    os.environ["MEDIA_STORE_BUCKET"] = ""
+    os.environ["MEDIA_STORE_CACHE_DIR"] = os.path.join(work_dir, "media_store")
+    os.environ["MEDIA_WORKERS"] = "0"
+    if case["variants"]:
+        os.environ["VIDEO_VARIANTS"] = case["variants"]
+
+    import pathlib
+    from init import db
+
+    db.get_db_path = lambda: pathlib.Path(db_path)
+    db.upload_db_to_gcs = lambda: None
+
+    from services.media import jobs
+    from services.media.video import derived_version
+    from services.media.worker import media_worker
+    from services.social_media.youtube.editor import narration
+    from services.social_media.youtube.editor import video_processor
+    from services.storage import storage
+
+    with db.get_connection() as conn:
+        with open(pathlib.Path(db.__file__).parent / "schema.sql") as f:
+            conn.executescript(f.read())
+
+    width, height = (int(v) for v in case["resolution"].split("x"))
+    clip = synthetic_clip(case["duration"], width, height)
+    story = " ".join([STORY_SENTENCE] * case["story_sentences"])
+    with db.get_connection() as conn:
+        conn.execute("INSERT INTO output_videos (id, tag, data) VALUES (?, 0, ?)", (BENCHMARK_UID, clip))
+        conn.execute("INSERT INTO story (id, story) VALUES (?, ?)", (BENCHMARK_UID, story))
+        conn.commit()
+
+    segments_chars = sum(len(segment) for segment in narration.marketing_segments(story))
+    stub = StubTextToSpeech(case["narration_seconds"] / segments_chars)
+    video_processor.TextToSpeechClientWrapper = lambda: stub
+    processor = video_processor.VideoProcessor()
+
+    results = {}
+    total_start = time.perf_counter()
+    with measure(results, "load"):
+        video_blob = processor.get_video_blob(BENCHMARK_UID)
+        story_text = processor.get_product_story(BENCHMARK_UID)
+    with measure(results, "narration"):
+        audio = processor.create_marketing_narration(story_text)
+
+    # The path process_video_with_audio takes, with the job run inline
+    with measure(results, "render"):
+        variants = media_worker.run(jobs.narrate_video_variants, video_blob, audio)
+    with measure(results, "store"):
+        storage.store_edited_videos(BENCHMARK_UID, variants)
+    sizes = {tag: len(data) for tag, data in variants.items()}
+
+    video = storage.get_edited_video_raw(BENCHMARK_UID)
+    version = derived_version(video)
+    with measure(results, "hls"):
+        jobs.package_hls(BENCHMARK_UID, video, version)
+    with measure(results, "previews"):
+        jobs.generate_video_previews(BENCHMARK_UID, video, version)
+
+    return {
+        "stages": results,
+        "total_wall_s": round(time.perf_counter() - total_start, 3),
+        "input_bytes": len(clip),
+        "narration_bytes": len(audio),
+        "tts_calls": stub.calls,
+        "output_bytes": sizes,
+    }
+
+
+def _run_in_subprocess(case: dict) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        # Pipeline logs and the storage layer's prints go to our stderr
+        subprocess.run(
+            [sys.executable, __file__, "--case", json.dumps(case), "--result", result_path],
+            stdout=sys.stderr,
+            check=True,
+        )
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def _median_stages(runs: list) -> dict:
+    return {
+        stage: {
+            metric: statistics.median(run["stages"][stage][metric] for run in runs)
+            for metric in runs[0]["stages"][stage]
+        }
+        for stage in STAGES
+    }
+
+
+def _print_case(case: dict, stages: dict, run: dict):
+    print(
+        f"\n{case['duration']}s {case['resolution']} clip, {case['narration_seconds']}s narration, "
+        f"variants {case['variants'] or 'default'}: {run['input_bytes']} bytes in, "
+        f"{sum(run['output_bytes'].values())} bytes out ({run['tts_calls']} TTS calls)"
+    )
+    print(f"  {'stage':<10} {'wall s':>8} {'cpu s':>8} {'peak rss MB':>12} {'child rss MB':>13}")
+    for stage in STAGES:
+        m = stages[stage]
+        print(
+            f"  {stage:<10} {m['wall_s']:>8.3f} {m['cpu_s']:>8.3f} "
+            f"{m['peak_rss_mb']:>12.1f} {m['peak_child_rss_mb']:>13.1f}"
+        )
+    print(f"  {'total':<10} {sum(stages[s]['wall_s'] for s in STAGES):>8.3f} "
+          f"{sum(stages[s]['cpu_s'] for s in STAGES):>8.3f}")
+
+
+def _csv(value: str, cast=str):
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", default="8,30", help="source clip durations in seconds")
+    parser.add_argument("--resolutions", default="1280x720,720x1280", help="source clip sizes, WxH")
+    parser.add_argument("--narration-seconds", default="30", help="stub narration lengths in seconds")
+    parser.add_argument("--story-sentences", type=int, default=12, help="sentences in the synthetic story")
+    parser.add_argument("--variants", default="", help="VIDEO_VARIANTS for the render (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; medians are reported")
+    parser.add_argument("--json", help="also write all results to this file")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        logging.basicConfig(level=logging.WARNING)
+        result = run_case(json.loads(args.case))
+        with open(args.result, "w") as f:
+            json.dump(result, f)
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    report = []
+    for duration, resolution, narration_seconds in itertools.product(
+        _csv(args.durations, float), _csv(args.resolutions), _csv(args.narration_seconds, float)
+    ):
+        case = {
+            "duration": duration,
+            "resolution": resolution,
+            "narration_seconds": narration_seconds,
+            "story_sentences": args.story_sentences,
+            "variants": args.variants,
+        }
+        logger.info(f"Running case {case}")
+        runs = [_run_in_subprocess(case) for _ in range(args.repeat)]
+        stages = _median_stages(runs)
+        _print_case(case, stages, runs[0])
+        report.append({"case": case, "median": stages, "runs": runs})
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,13 +46,13 @@ def check_database_contents():
         
         # Check edited_videos table
         logger.info("\nChecking edited_videos table...")
-        cursor.execute("SELECT id, LENGTH(data) as data_size FROM edited_videos")
+        cursor.execute("SELECT id, tag, LENGTH(data) as data_size FROM edited_videos")
         edited_videos = cursor.fetchall()
         
         if edited_videos:
             logger.info(f"Found {len(edited_videos)} edited videos:")
             for video in edited_videos:
-                logger.info(f"  ID: {video[0]}, Size: {video[1]} bytes")
+                logger.info(f"  ID: {video[0]}, Variant: {video[1]}, Size: {video[2]} bytes")
         else:
             logger.info("No edited videos found")
         
@@ -4,6 +4,7 @@ import tempfile
 from pathlib import Path
 from google.cloud import storage
 import json
+from utils.metrics import track_storage
 
 # Use Cloud Storage for database persistence
 BUCKET_NAME = "phankar"
@@ -30,7 +31,8 @@ def get_db_path():
         
         if blob.exists():
             print("Downloading database from Cloud Storage...")
-            blob.download_to_filename(local_path)
+            with track_storage("db_sync_download"):
+                blob.download_to_filename(local_path)
             print(f"Database downloaded to {local_path}")
         else:
             print("No existing database found in Cloud Storage, creating new one...")
@@ -60,7 +62,8 @@ def upload_db_to_gcs():
         blob = bucket.blob(DB_BLOB_NAME)
         
         print("Uploading database to Cloud Storage...")
-        blob.upload_from_filename(local_path)
+        with track_storage("db_sync_upload"):
+            blob.upload_from_filename(local_path)
         print("Database uploaded successfully")
         
     except Exception as e:
@@ -73,6 +76,62 @@ def get_connection():
     return conn
 
 
+def migrate_db(conn):
+    """Bring tables created by an older schema.sql up to date."""
+    # edited_videos gained a variant tag: (id) -> (id, tag); existing videos are landscape
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(edited_videos)")]
+    if columns and "tag" not in columns:
+        conn.executescript("""
+            ALTER TABLE edited_videos RENAME TO edited_videos_untagged;
+            CREATE TABLE edited_videos (
+                id INTEGER,
+                tag TEXT NOT NULL DEFAULT '16x9',
+                data BLOB,
+                PRIMARY KEY (id, tag),
+                FOREIGN KEY (id) REFERENCES results (id)
+            );
+            INSERT INTO edited_videos (id, tag, data) SELECT id, '16x9', data FROM edited_videos_untagged;
+            DROP TABLE edited_videos_untagged;
+        """)
+        print("Migrated edited_videos to tagged variants.")
+
+    # bulk_job_items kept every uploaded image as a BLOB; images are staged in
+    # the media store now. Unfinished items of such jobs lose their image and
+    # are failed, so they show up for re-upload instead of running without one
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(bulk_job_items)")]
+    if columns and "image_key" not in columns:
+        conn.executescript("""
+            ALTER TABLE bulk_job_items RENAME TO bulk_job_items_blobs;
+            CREATE TABLE bulk_job_items (
+                job_id TEXT NOT NULL,
+                item_index INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                content_type TEXT,
+                image_key TEXT NOT NULL,
+                manifest TEXT NOT NULL,
+                status TEXT NOT NULL,
+                uid INTEGER,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (job_id, item_index),
+                FOREIGN KEY (job_id) REFERENCES bulk_jobs (id)
+            );
+            INSERT INTO bulk_job_items
+                (job_id, item_index, filename, content_type, image_key, manifest, status, uid, error, attempts, updated_at)
+            SELECT job_id, item_index, filename, content_type, '', manifest,
+                   CASE WHEN status = 'succeeded' THEN status ELSE 'failed' END,
+                   uid,
+                   CASE WHEN status = 'succeeded' THEN error ELSE 'Uploaded image was not kept; upload this item again' END,
+                   attempts, updated_at
+            FROM bulk_job_items_blobs;
+            DROP TABLE bulk_job_items_blobs;
+        """)
+        # Give the space of the dropped images back
+        conn.execute("VACUUM")
+        print("Migrated bulk_job_items to staged images.")
+
+
 async def init_db():
     # Get the database path (downloads from GCS if exists)
     db_path = get_db_path()
@@ -104,4 +163,5 @@ async def init_db():
         with get_connection() as conn:
             with open(Path(__file__).parent / "schema.sql") as f:
                 conn.executescript(f.read())
+            migrate_db(conn)
         print("Database already exists with tables.")
\ No newline at end of file
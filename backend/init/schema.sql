@@ -185,8 +185,10 @@ CREATE TABLE IF NOT EXISTS youtube_thumbnail(
 
 --edited videos
 CREATE TABLE IF NOT EXISTS edited_videos (
-    id INTEGER PRIMARY KEY,
+    id INTEGER,
+    tag TEXT NOT NULL DEFAULT '16x9', -- aspect-ratio variant: 16x9, 9x16, 1x1
     data BLOB,
+    PRIMARY KEY (id, tag),
     FOREIGN KEY (id) REFERENCES results (id)
 );
 
@@ -234,6 +236,67 @@ CREATE TABLE IF NOT EXISTS mailing_list (
 );
 
 
+--bulk catalog ingestion
+
+CREATE TABLE IF NOT EXISTS bulk_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    workers INTEGER NOT NULL,
+    total_items INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS bulk_job_items (
+    job_id TEXT NOT NULL,
+    item_index INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    content_type TEXT,
+    image_key TEXT NOT NULL,
+    manifest TEXT NOT NULL,
+    status TEXT NOT NULL,
+    uid INTEGER,
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job_id, item_index),
+    FOREIGN KEY (job_id) REFERENCES bulk_jobs (id)
+);
+
+
+--combined text assets (one structured generation per product)
+
+CREATE TABLE IF NOT EXISTS text_assets (
+    id INTEGER PRIMARY KEY,
+    assets TEXT NOT NULL,
+    model TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (id) REFERENCES results (id)
+);
+
+--asset versions (fast-preview drafts and their AI upgrades)
+
+CREATE TABLE IF NOT EXISTS asset_versions (
+    id INTEGER,
+    asset TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    quality TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, asset),
+    FOREIGN KEY (id) REFERENCES results (id)
+);
+
+--input hash of each stored generated artifact
+
+CREATE TABLE IF NOT EXISTS artifact_hashes (
+    id INTEGER,
+    artifact TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, artifact),
+    FOREIGN KEY (id) REFERENCES results (id)
+);
+
 -- DROP TABLE IF EXISTS edited_videos;
 -- DROP TABLE IF EXISTS youtube_url; 
 -- DROP TABLE IF EXISTS edited_videos;
\ No newline at end of file
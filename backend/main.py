@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response
 from init import db as init
 from contextlib import asynccontextmanager
 from routers import artisan
@@ -14,8 +14,16 @@ from routers import youtube
 from routers import translation as translation_router
 from routers import audio_service
 from routers import ar
+from routers import metrics
+from routers import bulk
+from routers import media
+from services.media.worker import media_worker
+from utils.executors import BulkheadFull, bulkheads
+from utils.http_clients import http_clients
+from utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
 
 import os
+import time
 
 # Load environment variables from .env (root or backend directory)
 try:
@@ -34,10 +42,27 @@ except Exception:
 async def lifespan(app: FastAPI):
     print("Initializing database...")
     await init.init_db()
-    
+    await http_clients.start()
+    await media_worker.start()
+
     yield
 
+    await media_worker.shutdown()
+    await http_clients.aclose()
+    bulkheads.shutdown()
+
 app = FastAPI(lifespan=lifespan)
+
+
+# A saturated executor sheds load instead of queueing without bound
+@app.exception_handler(BulkheadFull)
+async def bulkhead_full_handler(request: Request, exc: BulkheadFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Server busy ({exc.pool}), please retry shortly"},
+        headers={"Retry-After": "5"},
+    )
+
 origins = [
     "http://localhost:5173",  # Your existing frontend
     "http://localhost:3000",  # Common dev port
@@ -69,6 +94,26 @@ async def add_private_network_headers(request: Request, call_next):
     
     return response
 
+# Request latency middleware feeding the /metrics endpoint
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    method = request.method
+    HTTP_REQUESTS_IN_FLIGHT.inc(method=method)
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+        # Use the route template so per-uid paths do not explode the label set
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start, method=method, route=route_path, status=status
+        )
+
 app.include_router(artisan.router)
 app.include_router(image.router)
 app.include_router(social_media.router)
@@ -79,4 +124,7 @@ app.include_router(text_highlighter.router)
 app.include_router(youtube.router)
 app.include_router(audio_service.router)
 app.include_router(translation_router.router)
-app.include_router(ar.router)
\ No newline at end of file
+app.include_router(ar.router)
+app.include_router(metrics.router)
+app.include_router(bulk.router)
+app.include_router(media.router)
\ No newline at end of file
@@ -1,3 +1,5 @@
+import asyncio
+import functools
 from fastapi import FastAPI, HTTPException, APIRouter, Form, UploadFile, File
 from routers.inventory import recommend_inventory
 from services import artisan_client
@@ -11,7 +13,19 @@ from services.social_media.youtube.editor.video_processor import (
 
 from routers.social_media import ad_banner_maker, nanobananas_thumbnail_maker, create_comic 
 import logging
-from routers.classifier import classify_image
+from routers.classifier import classify_image_bytes
+from services.artisan_agent.ingest import IngestedImage
+from services.social_media import text_assets
+from services.storage.storage import get_product_style
+from utils.deadline import (
+    PIPELINE_DEADLINE_SECONDS,
+    DeadlineExceeded,
+    bounded,
+    current_deadline,
+    deadline_scope,
+)
+from utils.executors import bulkheads
+from utils.metrics import track_stage
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,8 +35,27 @@ processor = VideoProcessor()
 
 router = APIRouter(prefix="/artisan")
 
+# Budget an optional stage needs to be worth starting. With less left it is
+# cut (the product keeps its fallback asset or none) so the video still fits.
+OPTIONAL_STAGE_MIN_SECONDS = {
+    "text_assets": 20.0,
+    "ad_banner": 45.0,
+    "thumbnail": 30.0,
+    "comic": 90.0,
+}
+# Budget kept back for narration and encoding when deciding on optional stages
+VIDEO_RESERVE_SECONDS = 60.0
+
+
+async def _timed_stage(stage: str, coro):
+    # track_stage for one branch of a concurrent gather
+    async with track_stage(stage):
+        return await coro
+
 
 @router.post("/generateContent")
+@track_stage("generate_content")
+@deadline_scope(PIPELINE_DEADLINE_SECONDS)
 async def generate_content(
     artistName: str = Form(""),
     state: str = Form(""),
@@ -33,6 +66,7 @@ async def generate_content(
     language: str = Form("en"),  # Language parameter from frontend
     image: UploadFile = File(...)
 ):
+    deadline = current_deadline()
     try:
         
         uid = uuid4().int & ((1 << 32) - 1)  # clamp to signed 32-bit
@@ -47,16 +81,30 @@ async def generate_content(
 
         if targetRegion == "":
             targetRegion = "GLOBAL"
+
+        # Ingest stage: read the upload once, then classify, translate the
+        # free-text inputs and upload the image to GCS concurrently.
         ## When we call the classify image we also store the recommended prices
         ## predicted artist etc. 
-        logger.info("Starting image classification...")
-        classification = await classify_image(id, image)
+        ingested = await IngestedImage.from_upload(image)
+        logger.info("Starting ingest (classification, translation, upload)...")
+        with track_stage("ingest"):
+            (
+                classification,
+                (translated_product, translation_result),
+                (translated_artist, _),
+                gcs_image_uri,
+            ) = await bounded("ingest", asyncio.gather(
+                _timed_stage("classification", classify_image_bytes(
+                    id, ingested.data, ingested.filename, ingested.content_type
+                )),
+                _timed_stage("translation", artisan_client.translate_description(productDescription, language)),
+                _timed_stage("translation", artisan_client.translate_description(artistDescription, language)),
+                _timed_stage("image_upload", artisan_client.upload_image(ingested)),
+            ))
         logger.info(f"Classification result: {classification}")
         logger.info(f"Available keys in classification: {list(classification.keys())}")
         
-        # Reset image file position for subsequent use
-        await image.seek(0)
-        
         # Check if classification was successful
         if classification.get("status") == "error":
             logger.error(f"Classification failed: {classification.get('message', 'Unknown error')}")
@@ -77,16 +125,6 @@ async def generate_content(
         artTheme=classification["themes"]
         color=classification["color"]
 
-
-        
-
-        
-
-
-        #call your inventory api to get the inventory
-        
-        #store it somewhere
-
         print("artistName: ", artistName)
         print("state: ", state)
         print("artForm: ", artForm)
@@ -96,69 +134,88 @@ async def generate_content(
         print("language: ", language)
 
         # augment the product description with the artist's description
+        # (the free-text parts are already translated to English)
         augmented_description = ""
         augmented_description = f"{augmented_description} the artist's name is {artistName}"
         augmented_description = f"{augmented_description} the art's theme is {artTheme}"
         augmented_description = f"{augmented_description} the artist's state is {state}"
         augmented_description = f"{augmented_description} the artist's art form is {artForm}"
         augmented_description = f"{augmented_description} the artist's target region is {targetRegion}"
-        augmented_description = f"{augmented_description} the artist's story is {artistDescription}"
+        augmented_description = f"{augmented_description} the artist's story is {translated_artist}"
         augmented_description = f"{augmented_description} the color of the artifact is {color}"
-        augmented_description += f"{productDescription} {artistDescription}"
-
+        augmented_description += f"{translated_product} {translated_artist}"
 
+        originalDescription = productDescription
         productDescription = augmented_description
         print("productDescription: ", productDescription)
 
+        async def run_agent():
+            # Everything the agent needs is ready; it runs while the inputs
+            # are stored and the inventory is recommended below.
+            with track_stage("agent"):
+                return await artisan_client.call_agent(
+                    productDescription,
+                    gcs_image_uri,
+                    original_description=originalDescription,
+                    language=language,
+                    translation_result=translation_result,
+                    artist_name=artistName,
+                    state=state,
+                    art_form=artForm,
+                    target_region=targetRegion,
+                    artist_description=artistDescription
+                )
+
+        async def store_inputs_and_recommend_inventory():
+            with track_stage("store_inputs"):
+                await bulkheads.run(
+                    "uploads",
+                    store_artisan_inputs,
+                    id,
+                    1,
+                    productDescription,
+                    augmented_description,
+                    targetRegion,
+                    "Marketing",
+                    "en",
+                    "Authentic, Handmade",
+                )
+
+            stored_style = await bulkheads.run("interactive", get_product_style, id)
+            logger.info(f"Stored style for id {id}: {stored_style}")
+
+            if not stored_style:
+                logger.error(f"No style found for id {id} after classification. This indicates a database persistence issue.")
+                raise HTTPException(
+                    status_code=500, 
+                    detail="Database persistence issue: Classification data not properly stored"
+                )
+
+            with track_stage("inventory"):
+                await recommend_inventory(id)
+
+        # The agent task is created first, so its request is in flight before
+        # the input storage (on the "uploads" executor) starts.
+        logger.info("Calling artisan_client.call_agent...")
+        response, inventory_result = await bounded("agent", asyncio.gather(
+            run_agent(), store_inputs_and_recommend_inventory(), return_exceptions=True
+        ))
+        if isinstance(inventory_result, BaseException):
+            raise inventory_result
 
-        store_artisan_inputs(
-            id,
-            1,
-            productDescription,
-            augmented_description,
-            targetRegion,
-            "Marketing",
-            "en",
-            "Authentic, Handmade",
-        )
-        
-        # Add a delay and retry mechanism to ensure database operations are committed
-        import asyncio
-        from services.storage.storage import get_product_style
-        stored_style = get_product_style(id)
-        logger.info(f"Stored style for id {id}: {stored_style}")
-        
-        if not stored_style:
-            logger.error(f"No style found for id {id} after classification. This indicates a database persistence issue.")
-            raise HTTPException(
-                status_code=500, 
-                detail="Database persistence issue: Classification data not properly stored"
-            )
-        
-        await recommend_inventory(id)
-
-        # Use the ArtisanOrchestrator to handle the complete workflow
-        logger.info("Calling artisan_client.generate_content...")
         try:
-            response = await artisan_client.generate_content(
-                product_description=productDescription,
-                language=language,
-                image=image,
-                artist_name=artistName,
-                state=state,
-                art_form=artForm,
-                target_region=targetRegion,
-                artist_description=artistDescription
-            )
+            if isinstance(response, BaseException):
+                raise response
             # we need to store this response in the database
             print("response we got is, ", response)
             print("response type:", type(response))
             print("response keys:", list(response.keys()) if isinstance(response, dict) else "Not a dict")
 
             # we parse the response
-            parse_response(id, response)
+            with track_stage("parse_response"):
+                await bulkheads.run("uploads", parse_response, id, response)
         except Exception as e:
-            logger.error(f"Error in artisan_client.generate_content: {str(e)}")
+            logger.error(f"Error in artisan_client.call_agent: {str(e)}")
             logger.error(f"Error type: {type(e)}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
@@ -166,24 +223,36 @@ async def generate_content(
 
 
 
-        #we need to get comics 
-        ad_banner_maker(id)
-        nanobananas_thumbnail_maker(id)
-        create_comic(id)
+        # One structured call for every text asset (banner/thumbnail prompts,
+        # comic script, email copy); the generators below read it back.
+        # These stages are optional: when the deadline runs low they are cut,
+        # and external calls already in flight fall back to local assets.
+        # All of them run on the "ai" executor, off the event loop.
+        optional_stages = (
+            ("text_assets", functools.partial(bulkheads.run, "ai", text_assets.get_text_assets)),
+            ("ad_banner", ad_banner_maker),
+            ("thumbnail", nanobananas_thumbnail_maker),
+            ("comic", create_comic),
+        )
+        for stage, generate in optional_stages:
+            if not deadline.allows(stage, OPTIONAL_STAGE_MIN_SECONDS[stage] + VIDEO_RESERVE_SECONDS):
+                continue
+            with track_stage(stage):
+                await generate(id)
 
 
         #we save the edited videos also 
 
 
         # Check if video exists
-        video_blob = processor.get_video_blob(id)
+        video_blob = await bulkheads.run("interactive", processor.get_video_blob, id)
         if not video_blob:
             logger.warning(f"No video found for UID: {id}, continuing without video processing")
         else:
             logger.info(f"Found video blob of size: {len(video_blob)} bytes")
 
         # Check if story exists
-        story = processor.get_product_story(id)
+        story = await bulkheads.run("interactive", processor.get_product_story, id)
         if not story:
             logger.warning(f"No story found for UID: {id}, continuing without story")
         else:
@@ -195,7 +264,8 @@ async def generate_content(
         #we call the making of ad banners
         
         # Process the video
-        success = await process_video_with_marketing_audio(id)
+        with track_stage("video"):
+            success = await process_video_with_marketing_audio(id)
 
         if success:
             logger.info("Video processing completed successfully!")
@@ -203,7 +273,8 @@ async def generate_content(
                 "success": True,
                 "id": id,
                 "message": "Content generated successfully",
-                "data": response
+                "data": response,
+                "cut_stages": deadline.cut_stages
             }
         else:
             logger.error("Video processing failed!")
@@ -211,10 +282,14 @@ async def generate_content(
                 "success": False,
                 "id": id,
                 "message": "Video processing failed",
-                "data": response
+                "data": response,
+                "cut_stages": deadline.cut_stages
             }
 
         
+    except DeadlineExceeded as e:
+        logger.error(f"generate_content ran out of time: {e} (cut stages: {deadline.cut_stages})")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"Error in generate_content endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -13,8 +13,11 @@ import json
 import logging
 from typing import Optional
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from utils.deadline import timeout_for
+from utils.executors import bulkheads
+from utils.metrics import track_external, track_storage
+from utils.structured_output import StructuredOutputError, generate_structured
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,6 +40,18 @@ class AudioInfoResponse(BaseModel):
     transcript: Optional[str] = Field(None, description="Speech-to-text transcript")
 
 
+class TranscriptAnalysis(BaseModel):
+    """Schema Gemini's transcript analysis is constrained to."""
+
+    name: str
+    state: str
+    artform: str
+    market: str
+    story: str
+    description: str
+    confidence_score: float = Field(..., ge=0.0, le=1.0)
+
+
 class TranscriptionResponse(BaseModel):
     transcript: str
     confidence: float
@@ -61,9 +76,9 @@ except Exception as e:
 BUCKET_NAME = "phankar"
 SUPPORTED_AUDIO_FORMATS = {".wav", ".mp3", ".flac", ".m4a", ".ogg", ".webm"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-
-# Thread pool for blocking operations
-executor = ThreadPoolExecutor(max_workers=4)
+ANALYSIS_MODEL_NAME = "gemini-1.5-pro"
+# Upper bound for one recognize call; capped further by the request deadline
+RECOGNIZE_TIMEOUT_SECONDS = 120.0
 
 
 def validate_audio_file(file: UploadFile) -> None:
@@ -90,7 +105,8 @@ def upload_to_gcs(file: UploadFile) -> str:
 
         # Reset file pointer
         file.file.seek(0)
-        blob.upload_from_file(file.file, content_type=file.content_type)
+        with track_storage("gcs_upload"):
+            blob.upload_from_file(file.file, content_type=file.content_type)
 
         logger.info(f"Uploaded file to GCS: gs://{BUCKET_NAME}/{blob_name}")
         return f"gs://{BUCKET_NAME}/{blob_name}"
@@ -149,7 +165,10 @@ def transcribe_audio(audio_uri: str) -> TranscriptionResponse:
 
         # Perform transcription
         logger.info("Starting speech recognition...")
-        response = speech_client.recognize(config=config, audio=audio)
+        with track_external("speech", "recognize"):
+            response = speech_client.recognize(
+                config=config, audio=audio, timeout=timeout_for(RECOGNIZE_TIMEOUT_SECONDS)
+            )
 
         if not response.results:
             logger.warning("No speech detected in audio")
@@ -188,7 +207,10 @@ def transcribe_audio_fallback(audio_uri: str) -> TranscriptionResponse:
         config = speech.RecognitionConfig(language_code="en-US")
 
         audio = speech.RecognitionAudio(uri=audio_uri)
-        response = speech_client.recognize(config=config, audio=audio)
+        with track_external("speech", "recognize_fallback"):
+            response = speech_client.recognize(
+                config=config, audio=audio, timeout=timeout_for(RECOGNIZE_TIMEOUT_SECONDS)
+            )
 
         if not response.results:
             return TranscriptionResponse(
@@ -224,7 +246,7 @@ def analyze_with_gemini(transcript: str) -> dict:
         
         Transcript: "{transcript}"
         
-        Please extract and return a JSON object with the following fields:
+        Extract:
         - name: The artisan's name (if mentioned, otherwise "Not specified")
         - state: The state or region they're from (if mentioned, otherwise "Not specified")
         - artform: The type of art form or craft they practice
@@ -232,31 +254,32 @@ def analyze_with_gemini(transcript: str) -> dict:
         - story: Their personal story, background, or journey
         - description: A detailed description of their work, techniques, or products
         - confidence_score: A score from 0.0 to 1.0 indicating how confident you are in the extracted information
-        
-        Return only valid JSON without any additional text or formatting.
         """
 
-        # Use Vertex AI Gemini model
-        model = GenerativeModel("gemini-1.5-pro")
-        response = model.generate_content(prompt)
-
-        # Parse the JSON response
-        try:
-            result = json.loads(response.text.strip())
-            return result
-        except json.JSONDecodeError:
-            # Fallback if Gemini doesn't return valid JSON
-            return {
-                "name": "Analysis failed - invalid response format",
-                "state": "Not specified",
-                "artform": "Not specified",
-                "market": "Not specified",
-                "story": transcript[:500] + "..."
-                if len(transcript) > 500
-                else transcript,
-                "description": "Failed to extract structured information",
-                "confidence_score": 0.1,
-            }
+        # Use Vertex AI Gemini model, constrained to the analysis schema
+        analysis = generate_structured(
+            GenerativeModel(ANALYSIS_MODEL_NAME),
+            ANALYSIS_MODEL_NAME,
+            prompt,
+            TranscriptAnalysis,
+            operation="audio_analysis",
+            cache_namespace="audio_analysis",
+        )
+        return analysis.model_dump()
+
+    except StructuredOutputError:
+        # Fallback if Gemini doesn't return valid JSON even after repair
+        return {
+            "name": "Analysis failed - invalid response format",
+            "state": "Not specified",
+            "artform": "Not specified",
+            "market": "Not specified",
+            "story": transcript[:500] + "..."
+            if len(transcript) > 500
+            else transcript,
+            "description": "Failed to extract structured information",
+            "confidence_score": 0.1,
+        }
 
     except Exception as e:
         logger.error(f"Gemini analysis failed: {e}")
@@ -280,14 +303,10 @@ async def transcribe_only(file: UploadFile = File(...)):
     validate_audio_file(file)
 
     # Upload to GCS
-    audio_uri = await asyncio.get_event_loop().run_in_executor(
-        executor, upload_to_gcs, file
-    )
+    audio_uri = await bulkheads.run("uploads", upload_to_gcs, file)
 
     # Transcribe
-    transcription = await asyncio.get_event_loop().run_in_executor(
-        executor, transcribe_audio, audio_uri
-    )
+    transcription = await bulkheads.run("ai", transcribe_audio, audio_uri)
 
     return transcription
 
@@ -303,22 +322,16 @@ async def analyze_audio(file: UploadFile = File(...)):
         logger.info(f"Processing audio file: {file.filename}")
 
         # Upload to Google Cloud Storage
-        audio_uri = await asyncio.get_event_loop().run_in_executor(
-            executor, upload_to_gcs, file
-        )
+        audio_uri = await bulkheads.run("uploads", upload_to_gcs, file)
 
         # Transcribe audio to text
-        transcription = await asyncio.get_event_loop().run_in_executor(
-            executor, transcribe_audio, audio_uri
-        )
+        transcription = await bulkheads.run("ai", transcribe_audio, audio_uri)
 
         if transcription.confidence < 0.3:
             logger.warning(f"Low confidence transcription: {transcription.confidence}")
 
         # Analyze transcript with Gemini
-        analysis = await asyncio.get_event_loop().run_in_executor(
-            executor, analyze_with_gemini, transcription.transcript
-        )
+        analysis = await bulkheads.run("ai", analyze_with_gemini, transcription.transcript)
 
         # Construct structured response
         result = AudioInfoResponse(
@@ -0,0 +1,98 @@
+import io
+from typing import List, Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from routers.artisan import generate_content
+from services.bulk.ingestion import (
+    BulkIngestionError,
+    BulkIngestionService,
+    build_items,
+    parse_manifest,
+    read_archive_images,
+)
+
+router = APIRouter(tags=["bulk"], prefix="/bulk")
+
+
+async def run_catalog_item(manifest: dict, image_bytes: bytes, filename: str, content_type: Optional[str]) -> int:
+    """Run one manifest item through the regular generateContent pipeline."""
+    image = UploadFile(
+        file=io.BytesIO(image_bytes),
+        filename=filename,
+        headers=Headers({"content-type": content_type or "image/jpeg"}),
+    )
+    result = await generate_content(
+        artistName=manifest.get("artistName", ""),
+        state=manifest.get("state", ""),
+        artForm=manifest.get("artForm", ""),
+        targetRegion=manifest.get("targetRegion", ""),
+        artistDescription=manifest.get("artistDescription", ""),
+        productDescription=manifest["productDescription"],
+        language=manifest.get("language") or "en",
+        image=image,
+    )
+    if not result.get("success"):
+        raise RuntimeError(f"{result.get('message', 'Generation failed')} (uid {result.get('id')})")
+    return result["id"]
+
+
+bulk_service = BulkIngestionService(pipeline=run_catalog_item)
+
+
+@router.post("/jobs")
+async def create_bulk_job(
+    manifest: UploadFile = File(...),
+    archive: Optional[UploadFile] = File(None),
+    images: List[UploadFile] = File([]),
+    workers: int = Form(0),
+):
+    """
+    Start a bulk catalog ingestion job.
+
+    Upload either a ZIP ``archive`` of images or the ``images`` as a multipart
+    batch, together with a CSV/JSON ``manifest`` that has one row per product
+    (``filename``, ``productDescription`` and optional ``artistName``,
+    ``state``, ``artForm``, ``targetRegion``, ``artistDescription``,
+    ``language``). Items are processed in the background by ``workers``
+    concurrent pipelines; poll ``GET /bulk/jobs/{job_id}`` for progress.
+    """
+    try:
+        rows = parse_manifest(await manifest.read(), manifest.filename or "")
+
+        uploaded = {}
+        if archive is not None:
+            uploaded.update(read_archive_images(await archive.read()))
+        for image in images:
+            uploaded[image.filename] = await image.read()
+        if not uploaded:
+            raise BulkIngestionError("Upload a ZIP archive or at least one image")
+
+        items = build_items(rows, uploaded)
+    except BulkIngestionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        job = await bulk_service.create_job(items, workers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create bulk job: {str(e)}")
+    return {"status": "accepted", **job}
+
+
+@router.get("/jobs/{job_id}")
+async def get_bulk_job(job_id: str):
+    """Per-item progress of a bulk ingestion job."""
+    progress = await bulk_service.get_progress(job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return progress
+
+
+@router.post("/jobs/{job_id}/resume")
+async def resume_bulk_job(job_id: str, workers: int = 0):
+    """Re-run every item of a job that has not succeeded yet."""
+    try:
+        return await bulk_service.resume(job_id, workers)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
@@ -1,4 +1,5 @@
 from logging import log
+from typing import Optional
 from uuid import uuid4
 from fastapi import APIRouter, File, UploadFile, logger
 from fastapi.responses import JSONResponse
@@ -12,6 +13,7 @@ from services.storage.storage import (
     store_product_colors,
     store_recommended_prices# you may or may not have title in classifier result
 )
+from utils.executors import bulkheads
 
 router = APIRouter(prefix="/classifier")
 
@@ -30,55 +32,90 @@ async def trial_classify_options():
         }
     )
 
-import httpx
+import hashlib
+
+from utils.http_clients import http_clients
+from utils.metrics import track_external
+from utils.single_flight import single_flight
 from dotenv import load_dotenv
 load_dotenv()
 import os
+async def trial_classify_bytes(
+    file_bytes: bytes, filename: str, content_type: Optional[str]
+) -> dict[str, str]:
+    """Classify already-read image bytes with the cloud-hosted classifier."""
+    # Concurrent requests with identical bytes share one classifier call
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    return await single_flight.ado(
+        f"classify:{digest}", _post_trial_classify, file_bytes, filename, content_type
+    )
+
+
+async def _post_trial_classify(
+    file_bytes: bytes, filename: str, content_type: Optional[str]
+) -> dict[str, str]:
+    url = os.getenv("GCP_CLASSIFIER_URL") + "/classifier/trial_classify"
+    logger.logger.info(f"CLASSIFIER URL: {url}")
+    payload = {"image": (filename, file_bytes, content_type)}
+    # Make async HTTP request over the shared keep-alive client
+    client = http_clients.get("classifier")
+    async with track_external("classifier", "trial_classify"):
+        resp = await client.post(url, files=payload, timeout=http_clients.timeout("classifier"))
+    
+    return resp.json()
+
+
 @router.post("/trial_classify")
 async def trial_classify_image(
     image: UploadFile = File(...)
 ) -> dict[str, str]:
     # Run classification that is hosted on the cloud 
-    url = os.getenv("GCP_CLASSIFIER_URL") + "/classifier/trial_classify"
-    logger.logger.info(f"CLASSIFIER URL: {url}")
     file_bytes=await image.read()
     # Reset file stream position for subsequent reads
     await image.seek(0)
-    payload = {"image": (image.filename, file_bytes, image.content_type)}
-    # Make async HTTP request
-    async with httpx.AsyncClient(timeout=600) as client:
-        resp = await client.post(url, files=payload)    
-    
-    return resp.json()
-@router.post("/classify")
-async def classify_image(
-    uid: int = uuid4().int & ((1 << 32) - 1), image: UploadFile = File(...)
+    return await trial_classify_bytes(file_bytes, image.filename, image.content_type)
+
+
+def _store_predictions(uid: int, resp: dict) -> None:
+    if "style" in resp:
+        store_product_style(uid, resp["style"])
+    if "artist" in resp:
+        store_product_predicted_artist(uid, resp["artist"])
+    if "origin" in resp:
+        store_product_origin(uid, resp["origin"])
+    if "medium" in resp:
+        store_product_medium(uid, resp["medium"])
+    if "price" in resp:
+        store_recommended_prices(uid, int(resp["price"]))
+    if "themes" in resp:
+        store_product_themes(uid, resp["themes"])
+    if "color" in resp:
+        store_product_colors(uid, resp["color"])
+
+
+async def classify_image_bytes(
+    uid: int, file_bytes: bytes, filename: str, content_type: Optional[str]
 ) -> dict[str, str]:
+    """Classify image bytes and store the predictions for ``uid``."""
     # Run classification that is hosted on the cloud
-    resp = await trial_classify_image(image)
-    image.file.seek(0)
+    resp = await trial_classify_bytes(file_bytes, filename, content_type)
     print("RESPONSE:", resp)
-    # Insert into DB
+    # Insert into DB (every write uploads the database, so off the event loop)
     try:
-        if "style" in resp:
-            store_product_style(uid, resp["style"])
-        if "artist" in resp:
-            store_product_predicted_artist(uid, resp["artist"])
-        if "origin" in resp:
-            store_product_origin(uid, resp["origin"])
-        if "medium" in resp:
-            store_product_medium(uid, resp["medium"])
-        if "price" in resp:
-            store_recommended_prices(uid, int(resp["price"]))
-        if "themes" in resp:
-            store_product_themes(uid, resp["themes"])
-        if "color" in resp:
-            store_product_colors(uid, resp["color"])
-
+        await bulkheads.run("uploads", _store_predictions, uid, resp)
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
     return resp
+
+
+@router.post("/classify")
+async def classify_image(
+    uid: int = uuid4().int & ((1 << 32) - 1), image: UploadFile = File(...)
+) -> dict[str, str]:
+    file_bytes = await image.read()
+    await image.seek(0)
+    return await classify_image_bytes(uid, file_bytes, image.filename, image.content_type)
 @router.options("/classify")
 async def classify_options():
     """Handle preflight OPTIONS request for classify endpoint"""
@@ -6,6 +6,7 @@ from services.inventory.inventory_service import get_recommended_inventory
 from services.metadata.holidays import get_next_indian_holidays
 from services.inventory.design_ideas_service import generate_design_image
 from services.storage.storage import get_inventory, get_product_origin, get_product_style
+from utils.executors import bulkheads
 
 
 
@@ -33,7 +34,7 @@ async def recommend_inventory(uid: int = uuid4().int & ((1 << 32) - 1)):
         print(f"Fetched {len(holidays)} upcoming holidays")
         
         # Get product style, handle case where no style is found
-        product_style_data = get_product_style(uid)
+        product_style_data = await bulkheads.run("interactive", get_product_style, uid)
         if not product_style_data:
             raise HTTPException(
                 status_code=404, 
@@ -0,0 +1,74 @@
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+
+from services.media import hls, previews
+from services.storage.media_store import media_store
+from services.storage.storage import get_artifact_hash
+from utils.executors import bulkhead
+
+router = APIRouter(tags=["media"], prefix="/media")
+
+# The master playlist and previews move to a new version when the video is
+# re-rendered; everything the master playlist names is immutable
+MASTER_CACHE_CONTROL = "public, max-age=60"
+PREVIEW_CACHE_CONTROL = "public, max-age=300"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_VERSION = re.compile(r"^[0-9a-f]{16}$")
+_RENDITION_FILE = re.compile(r"^(index\.m3u8|segment_\d+\.ts)$")
+
+
+@router.get("/video/{uid}/master.m3u8")
+@bulkhead("interactive")
+def get_video_master_playlist(uid: int):
+    """HLS master playlist of the edited video, listing its renditions."""
+    version = get_artifact_hash(uid, hls.ARTIFACT)
+    data = media_store.get(hls.NAMESPACE, hls.object_key(uid, version, hls.MASTER_PLAYLIST)) if version else None
+    if data is None:
+        raise HTTPException(status_code=404, detail="Video not packaged for streaming")
+    return Response(
+        content=data,
+        media_type=hls.content_type(hls.MASTER_PLAYLIST),
+        headers={"Cache-Control": MASTER_CACHE_CONTROL, "ETag": f'"{version}"'},
+    )
+
+
+@router.get("/video/{uid}/{version}/{rendition}/{filename}")
+@bulkhead("interactive")
+def get_video_rendition_file(uid: int, version: str, rendition: str, filename: str):
+    """Rendition playlist or segment named by a master playlist."""
+    if not _VERSION.match(version) or rendition not in hls.LADDER or not _RENDITION_FILE.match(filename):
+        raise HTTPException(status_code=404, detail="Not found")
+    data = media_store.get(hls.NAMESPACE, hls.object_key(uid, version, f"{rendition}/{filename}"))
+    if data is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return Response(
+        content=data,
+        media_type=hls.content_type(filename),
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+@router.get("/video/{uid}/{name}")
+@bulkhead("interactive")
+def get_video_preview(uid: int, name: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Poster frame (``poster.jpg``, ``poster.webp``) or animated preview
+    (``preview.webp``) of the edited video, for listings.
+    """
+    if name not in previews.FILES:
+        raise HTTPException(status_code=404, detail="Not found")
+    version = get_artifact_hash(uid, previews.ARTIFACT)
+    if version is None:
+        raise HTTPException(status_code=404, detail="No preview for this video")
+    etag = f'"{version}"'
+    headers = {"Cache-Control": PREVIEW_CACHE_CONTROL, "ETag": etag}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    data = media_store.get(previews.NAMESPACE, previews.object_key(uid, version, name))
+    if data is None:
+        raise HTTPException(status_code=404, detail="No preview for this video")
+    return Response(content=data, media_type=previews.FILES[name], headers=headers)
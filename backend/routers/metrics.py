@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from utils.metrics import CONTENT_TYPE_LATEST, render_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose stage, external call and storage metrics in Prometheus text format."""
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
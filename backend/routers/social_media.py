@@ -4,12 +4,15 @@ import base64
 import io
 import os
 from uuid import uuid4
-from fastapi import APIRouter, HTTPException, Form, UploadFile
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Form, UploadFile
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from services.social_media.social_media import YoutubeClient
 from services.social_media.youtube.editor import thumbnail_maker
-from services.social_media.youtube.editor.video_processor import process_video_with_marketing_audio
+from services.social_media.youtube.editor.video_processor import (
+    post_process_video,
+    process_video_with_marketing_audio,
+)
 # from services.social_media.instagram.apis import posts as ig_posts, reels as ig_reels, stories as ig_stories, media as ig_media, utils as ig_utils
 from pydantic import BaseModel
 import logging
@@ -25,6 +28,10 @@ from services.storage import storage
 
 from services.social_media.advert_banners.BannerMaker import maker,ProductSpec,BannerSpec
 from services.social_media.email import email
+from services.social_media import artifacts, preview, text_assets
+from utils.http_clients import http_clients
+from utils.executors import BACKGROUND, bulkhead, bulkheads
+from utils.single_flight import single_flight
 
 
 logger = logging.getLogger(__name__)
@@ -36,15 +43,36 @@ router = APIRouter(prefix="/social_media", tags=["Social Media"])
 
 
 
+def _generate_email(uid: int) -> str:
+    """Generate the marketing email and store it with its version and input hash."""
+    digest = artifacts.input_hash(uid, "email")
+    html = email.generate_emails(uid)
+    preview.store_asset(uid, "email", html, "ai")
+    artifacts.mark(uid, "email", digest)
+    return html
+
+
+def _email_html(uid: int, refresh: bool = False) -> str:
+    # Serve the stored email while its inputs are unchanged
+    digest = artifacts.input_hash(uid, "email")
+    if artifacts.is_fresh(uid, "email", digest, refresh):
+        stored = storage.get_generated_email(uid)
+        if stored is not None:
+            return stored["content"]
+    return single_flight.do(f"email:{uid}", _generate_email, uid)
+
+
 @router.post("/generate-email/{uid}")
-def generate_email(uid: int = uuid4().int & ((1 << 32) - 1)):
-    return email.generate_emails(uid)
+@bulkhead("ai")
+def generate_email(uid: int = uuid4().int & ((1 << 32) - 1), refresh: bool = False):
+    return _email_html(uid, refresh)
 
 @router.get("/get-email/{uid}")
-def get_email(uid: int):
-    """Retrieve generated email HTML by UID"""
+@bulkhead("ai")
+def get_email(uid: int, refresh: bool = False):
+    """Retrieve generated email HTML by UID (regenerated only when its inputs changed)"""
     try:
-        email_html = email.generate_emails(uid)
+        email_html = _email_html(uid, refresh)
         return {
             "success": True,
             "uid": uid,
@@ -57,6 +85,7 @@ def get_email(uid: int):
         )
 
 @router.get("/get-email-images/{uid}")
+@bulkhead("interactive")
 def get_email_images(uid: int):
     """Get product images for email without causing header size issues"""
     try:
@@ -90,7 +119,6 @@ class SendEmailRequest(BaseModel):
 
 class EmailListRequest(BaseModel):
     emails: List[str]
-import httpx
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -101,8 +129,8 @@ async def send_email(request: SendEmailRequest):
         url = os.getenv("GCP_EMAIL_BOT_URL") + "/email/send"
         logger.info(f"Forwarding email request to: {url}")
 
-        async with httpx.AsyncClient(timeout=600) as client:
-            resp = await client.post(url, json=request.dict())
+        client = http_clients.get("email")
+        resp = await client.post(url, json=request.dict(), timeout=http_clients.timeout("email"))
 
         # Handle non-200 response
         if resp.status_code != 200:
@@ -174,10 +202,30 @@ async def store_email_list(request: EmailListRequest):
 
 
 
+def _stored_png(entry):
+    return base64.b64decode(entry["image"]) if entry is not None else None
+
+
 @router.post("/ad-banner-maker")
-def ad_banner_maker(uid: int = uuid4().int & ((1 << 32) - 1)):
-    if storage.get_ad_banner(uid) is not None:
+@bulkhead("ai")
+def ad_banner_maker(uid: int = uuid4().int & ((1 << 32) - 1), refresh: bool = False):
+    # Serve the stored banner while its inputs are unchanged (preview drafts
+    # never count)
+    digest = artifacts.input_hash(uid, "banner")
+    if artifacts.is_fresh(uid, "banner", digest, refresh) and storage.get_ad_banner(uid) is not None:
         return storage.get_ad_banner(uid)["image"]
+    # Double submits for the same uid share one generation
+    png = single_flight.do(
+        f"ad_banner:{uid}",
+        _generate_ad_banner,
+        uid,
+        reuse=lambda: _stored_png(storage.get_ad_banner(uid)),
+    )
+    return StreamingResponse(io.BytesIO(png), media_type="image/png")
+
+
+def _generate_ad_banner(uid: int) -> bytes:
+    digest = artifacts.input_hash(uid, "banner")
     title=storage.get_product_style(uid)["style"] + " by " + storage.get_product_predicted_artist(uid)["predicted_artist"]
     description=storage.get_history(uid)[1]
 
@@ -205,17 +253,25 @@ def ad_banner_maker(uid: int = uuid4().int & ((1 << 32) - 1)):
 
     spec = BannerSpec(size=(1200, 628))
 
+    # Prefer the prompt from the combined text assets
+    assets = text_assets.get_text_assets(uid)
+    prompt = None
+    if assets:
+        prompt = f"{assets['banner_prompt']} Price: {product.currency}{product.price}."
+
     # Generate with prompt + product image
     banner = maker.generate_banner_for_product(
         product,
         spec,
+        prompt=prompt,
         )
 
     buf = io.BytesIO()
     banner.save(buf, format="PNG")
-    buf.seek(0)
     storage.store_ad_image(uid,buf.getvalue())
-    return StreamingResponse(buf, media_type="image/png")
+    storage.bump_asset_version(uid, "banner", "ai")
+    artifacts.mark(uid, "banner", digest)
+    return buf.getvalue()
 
 
 @router.post(
@@ -227,9 +283,22 @@ def ad_banner_maker(uid: int = uuid4().int & ((1 << 32) - 1)):
         }
     },
 )
-def nanobananas_thumbnail_maker(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("ai")
+def nanobananas_thumbnail_maker(uid: int = uuid4().int & ((1 << 32) - 1), refresh: bool = False):
+    return _thumbnail(uid, refresh)
+
+
+def _thumbnail(uid: int, refresh: bool = False):
     logger.info(f"[ThumbnailMaker] Starting thumbnail generation for uid={uid}")
 
+    # Serve the stored thumbnail while its inputs are unchanged
+    digest = artifacts.input_hash(uid, "thumbnail")
+    if artifacts.is_fresh(uid, "thumbnail", digest, refresh):
+        stored = storage.get_youtube_thumbnail_image(uid)
+        if stored is not None:
+            logger.info(f"[ThumbnailMaker] Inputs unchanged, serving stored thumbnail for uid={uid}")
+            return io.BytesIO(base64.b64decode(stored["image"]))
+
     # title
     try:
         style = storage.get_product_style(uid)["style"]
@@ -287,9 +356,19 @@ def nanobananas_thumbnail_maker(uid: int = uuid4().int & ((1 << 32) - 1)):
     )
     logger.info(f"[ThumbnailMaker] ProductSpec created: {product}")
 
+    # prompt and headline from the combined text assets, if available
+    assets = text_assets.get_text_assets(uid)
+    prompt = None
+    if assets:
+        prompt = (
+            f"{assets['thumbnail_prompt']} Headline text: \"{assets['thumbnail_headline']}\". "
+            f"Price: {product.currency}{product.price}."
+        )
+        logger.info(f"[ThumbnailMaker] Using text assets prompt.")
+
     # generate thumbnail
     try:
-        banner = maker.generate_thumbnail_for_product(product)
+        banner = maker.generate_thumbnail_for_product(product, prompt=prompt)
         logger.info(f"[ThumbnailMaker] Banner generated successfully.")
     except Exception as e:
         logger.error(f"[ThumbnailMaker] Thumbnail generation failed for uid={uid}: {e}")
@@ -301,6 +380,8 @@ def nanobananas_thumbnail_maker(uid: int = uuid4().int & ((1 << 32) - 1)):
         banner.save(buf, format="PNG")
         buf.seek(0)
         storage.store_youtube_thumbnail_image(uid, buf.getvalue())
+        storage.bump_asset_version(uid, "thumbnail", "ai")
+        artifacts.mark(uid, "thumbnail", digest)
         logger.info(
             f"[ThumbnailMaker] Thumbnail stored in storage for uid={uid}, size={buf.tell()} bytes."
         )
@@ -313,32 +394,26 @@ def nanobananas_thumbnail_maker(uid: int = uuid4().int & ((1 << 32) - 1)):
 
     return buf
 @router.post("/comics")
-def create_comic(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("ai")
+def create_comic(uid: int = uuid4().int & ((1 << 32) - 1), refresh: bool = False):
     try:
-        # if storage.get_comics(uid) is not None:
-        #     return storage.get_comics(uid)
-        title = (
-            storage.get_product_style(uid)["style"]
-            + " by "
-            + storage.get_product_predicted_artist(uid)["predicted_artist"]
-        )
-        description = storage.get_history(uid)[1]
-        if storage.get_artisan_inputs(uid) is not None:
-            description+=storage.get_artisan_inputs(uid)["product_description"]
-    
-        # Generate the comic
-        img_buffer = comic.create_product_comic(
-            product_name=title, product_description=description
-        )
-
-        # Reset buffer position to beginning
-        img_buffer.seek(0)
-        storage.store_product_comics(uid,img_buffer.getvalue())
+        # Serve the stored comic while its inputs are unchanged
+        digest = artifacts.input_hash(uid, "comic")
+        png = None
+        if artifacts.is_fresh(uid, "comic", digest, refresh):
+            png = _stored_png(storage.get_comics(uid))
+        if png is None:
+            # Double submits for the same uid share one generation
+            png = single_flight.do(
+                f"comic:{uid}",
+                _generate_comic,
+                uid,
+                reuse=lambda: _stored_png(storage.get_comics(uid)),
+            )
 
-        img_buffer.seek(0)
         # Return as streaming response with proper headers
         return StreamingResponse(
-            io.BytesIO(img_buffer.read()),
+            io.BytesIO(png),
             media_type="image/png",
             headers={"Content-Disposition": f"inline; filename=comic_{uid}.png"},
         )
@@ -349,6 +424,77 @@ def create_comic(uid: int = uuid4().int & ((1 << 32) - 1)):
         )
 
 
+def _generate_comic(uid: int) -> bytes:
+    digest = artifacts.input_hash(uid, "comic")
+    title = (
+        storage.get_product_style(uid)["style"]
+        + " by "
+        + storage.get_product_predicted_artist(uid)["predicted_artist"]
+    )
+    description = storage.get_history(uid)[1]
+    if storage.get_artisan_inputs(uid) is not None:
+        description+=storage.get_artisan_inputs(uid)["product_description"]
+
+    # Comic script from the combined text assets, if available
+    assets = text_assets.get_text_assets(uid)
+    story_data = {"panels": assets["comic_panels"]} if assets else None
+
+    # Generate the comic
+    img_buffer = comic.create_product_comic(
+        product_name=title, product_description=description, story_data=story_data
+    )
+
+    storage.store_product_comics(uid,img_buffer.getvalue())
+    storage.bump_asset_version(uid, "comic", "ai")
+    artifacts.mark(uid, "comic", digest)
+    return img_buffer.getvalue()
+
+
+# ===== FAST PREVIEW =====
+
+def _upgrade_preview_assets(uid: int):
+    """Background phase of /preview: replace each draft with its AI version."""
+    upgrades = (
+        ("banner", lambda: single_flight.do(f"ad_banner:{uid}", _generate_ad_banner, uid)),
+        ("thumbnail", lambda: _thumbnail(uid)),
+        ("comic", lambda: single_flight.do(f"comic:{uid}", _generate_comic, uid)),
+        ("email", lambda: single_flight.do(f"email:{uid}", _generate_email, uid)),
+    )
+    for asset, generate in upgrades:
+        try:
+            # Every AI generator stores its asset and bumps the version itself
+            generate()
+            logger.info(f"[Preview] Upgraded {asset} for uid={uid}")
+        except Exception as e:
+            logger.error(f"[Preview] AI upgrade of {asset} failed for uid={uid}, keeping the draft: {e}")
+
+
+@router.post("/preview/{uid}")
+@bulkhead("interactive")
+def preview_assets(uid: int, background_tasks: BackgroundTasks):
+    """
+    Return draft banner, thumbnail, comic and email rendered locally (no model
+    calls), then generate the AI versions in the background. Each upgrade
+    bumps the asset's version; poll /asset-versions/{uid} to pick them up.
+    """
+    try:
+        result = preview.create_preview(uid)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to render preview: {str(e)}")
+
+    if any(asset["quality"] == "draft" for asset in result["assets"].values()):
+        # Behind every generation a user is waiting on
+        background_tasks.add_task(bulkheads.run, "ai", _upgrade_preview_assets, uid, priority=BACKGROUND)
+    return result
+
+
+@router.get("/asset-versions/{uid}")
+@bulkhead("interactive")
+def get_asset_versions(uid: int):
+    """Current version and quality ("draft" or "ai") of each stored asset."""
+    return {"uid": uid, "versions": storage.get_asset_versions(uid)}
+
+
 # YouTube client
 ytClient = YoutubeClient("xyz")
 
@@ -373,21 +519,50 @@ async def generate_thumbnail(file: UploadFile, description: str = Form(...)):
     """Generate video thumbnail"""
     return await thumbnail_maker.generate_thumbnail(file, description)
 
+def _video_state(uid: int, refresh: bool):
+    """Input hash of the edited video, whether the stored one is current, and whether it is post-processed."""
+    digest = artifacts.input_hash(uid, "video")
+    fresh = artifacts.is_fresh(uid, "video", digest, refresh) and bool(storage.get_edited_video_tags(uid))
+    post_processed = all(storage.get_artifact_hash(uid, artifact) is not None for artifact in ("hls", "video_preview"))
+    return digest, fresh, post_processed
+
+
 @router.post("/process_video_with_audio")
-async def process_video_with_audio_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+async def process_video_with_audio_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), refresh: bool = False):
     """
     Process a video by:
     1. Removing existing audio
     2. Adding marketing narration based on product story
     3. Extending video to match audio length
     4. Saving final video to edited_videos table
+    5. Packaging it as HLS renditions and rendering a poster and animated
+       preview (served under /media/video/{uid}/)
     """
     try:
         logger.info(f"Starting video processing for uid: {uid}")
+
+        # Skip the narration and encode while the story and source video are
+        # unchanged; hashing the source video stays off the event loop
+        digest, fresh, post_processed = await bulkheads.run("interactive", _video_state, uid, refresh)
+        if fresh:
+            if not post_processed:
+                await post_process_video(uid)
+            return {
+                "status": "success",
+                "message": f"Video already processed for uid: {uid}",
+                "uid": uid
+            }
         
-        success = await process_video_with_marketing_audio(uid)
+        # Double submits for the same uid share one narration and encode
+        success = await single_flight.ado(
+            f"video:{uid}",
+            process_video_with_marketing_audio,
+            uid,
+            reuse=lambda: True if storage.get_edited_video_tags(uid) else None,
+        )
         
         if success:
+            await bulkheads.run("interactive", artifacts.mark, uid, "video", digest)
             return {
                 "status": "success",
                 "message": f"Video processed successfully for uid: {uid}",
@@ -2,6 +2,7 @@ from uuid import uuid4
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 import io
+from utils.executors import bulkhead
 from services.storage.storage import (
     get_comics,
     get_input_images,
@@ -25,13 +26,15 @@ from services.storage.storage import (
     get_video,
     get_edited_video,
     get_edited_video_raw,
+    get_edited_video_tags,
     get_ad_banner,
     get_youtube_thumbnail_image,
     get_youtube_url,
     store_youtube_url,
     store_videos,
     get_inventory,
-    store_inventory_recommendations
+    store_inventory_recommendations,
+    DEFAULT_VIDEO_TAG,
 )
 
 router = APIRouter(tags=["storage"], prefix="/storage")
@@ -39,18 +42,21 @@ router = APIRouter(tags=["storage"], prefix="/storage")
 
 # --- Existing ---
 @router.post("/parse_response")
-async def parse_response_endpoint(id:int, response: dict):
+@bulkhead("interactive")
+def parse_response_endpoint(id:int, response: dict):
     return parse_response(id, response)
 
 
 @router.post("/post/price")
-async def post_price_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), price: float=0.0):
+@bulkhead("interactive")
+def post_price_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), price: float=0.0):
     store_recommended_prices(uid, price)
     return {"uid": uid, "price": price}
 
 # --- Input Images ---
 @router.get("/input_images/{uid}")
-async def get_input_images_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_input_images_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     rows = get_input_images(uid)
     if not rows:
         raise HTTPException(status_code=404, detail="No input images found")
@@ -61,7 +67,8 @@ async def get_input_images_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 # --- Output Images ---
 @router.get("/output_images/{uid}")
-async def get_output_images_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_output_images_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     rows = get_output_images(uid)
     if not rows:
         raise HTTPException(status_code=404, detail="No output images found")
@@ -73,7 +80,8 @@ async def get_output_images_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 # --- Recommended Price ---
 @router.get("/recommended_price/{uid}")
-async def get_recommended_price_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_recommended_price_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     price = get_recommended_price(uid)
     if price is None:
         raise HTTPException(status_code=404, detail="Price not found")
@@ -82,7 +90,8 @@ async def get_recommended_price_endpoint(uid: int = uuid4().int & ((1 << 32) - 1
 
 # --- Processing Metadata ---
 @router.get("/processing_metadata/{uid}")
-async def get_processing_metadata_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_processing_metadata_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_processing_metadata(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Metadata not found")
@@ -99,7 +108,8 @@ async def get_processing_metadata_endpoint(uid: int = uuid4().int & ((1 << 32) -
 
 # --- FAQs ---
 @router.get("/faqs/{uid}")
-async def get_faqs_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_faqs_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     rows = get_faqs(uid)
     if not rows:
         raise HTTPException(status_code=404, detail="No FAQs found")
@@ -108,7 +118,8 @@ async def get_faqs_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 # --- Story ---
 @router.get("/story/{uid}")
-async def get_story_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_story_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     story = get_story(uid)
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
@@ -117,7 +128,8 @@ async def get_story_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 # --- Product History ---
 @router.get("/history/{uid}")
-async def get_history_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_history_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_history(uid)
     if not row:
         raise HTTPException(status_code=404, detail="History not found")
@@ -131,7 +143,8 @@ async def get_history_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/title/{uid}")
-async def get_product_title_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_title_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_title(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Product title not found")
@@ -139,7 +152,8 @@ async def get_product_title_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/artist/{uid}")
-async def get_product_artist_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_artist_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_artist(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Product artist not found")
@@ -147,7 +161,8 @@ async def get_product_artist_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/style/{uid}")
-async def get_product_style_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_style_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_style(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Product style not found")
@@ -155,7 +170,8 @@ async def get_product_style_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/origin/{uid}")
-async def get_product_origin_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_origin_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_origin(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Product origin not found")
@@ -163,7 +179,8 @@ async def get_product_origin_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/predicted_artist/{uid}")
-async def get_product_predicted_artist_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_predicted_artist_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_predicted_artist(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Predicted artist not found")
@@ -171,7 +188,8 @@ async def get_product_predicted_artist_endpoint(uid: int = uuid4().int & ((1 <<
 
 
 @router.get("/medium/{uid}")
-async def get_product_medium_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_medium_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_medium(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Product medium not found")
@@ -179,21 +197,24 @@ async def get_product_medium_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/themes/{uid}")
-async def get_product_themes_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_themes_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_themes(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Product themes not found")
     return row
 
 @router.get("/colors/{uid}")
-async def get_product_colors_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_product_colors_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_product_colors(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Product colors not found")
     return row
 
 @router.get("/video/{uid}")
-async def get_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_video(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Video not found")
@@ -201,7 +222,8 @@ async def get_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/products")
-async def get_all_products_endpoint():
+@bulkhead("interactive")
+def get_all_products_endpoint():
     """
     Get all products with basic information for product listing.
     Returns products with id, title, header image, price, rating, and metadata.
@@ -220,7 +242,8 @@ async def get_all_products_endpoint():
 
 
 @router.post("/video")
-async def store_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), video_uris: list[str]=[]):
+@bulkhead("interactive")
+def store_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), video_uris: list[str]=[]):
     row = store_videos(uid, video_uris)
     if not row:
         raise HTTPException(status_code=404, detail="Video not found")
@@ -228,13 +251,15 @@ async def store_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), video_u
 
 
 @router.get("/edited_video/{uid}")
-async def get_edited_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_edited_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), tag: str = DEFAULT_VIDEO_TAG):
     """
     Get edited video by UID as base64 encoded JSON response.
     Suitable for web applications that need to embed video data.
+    ``tag`` picks the aspect-ratio variant (16x9, 9x16 or 1x1).
     """
     try:
-        video_data = get_edited_video(uid)
+        video_data = get_edited_video(uid, tag)
         if not video_data:
             raise HTTPException(status_code=404, detail="Edited video not found")
         return video_data
@@ -242,25 +267,38 @@ async def get_edited_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
         raise HTTPException(status_code=500, detail=f"Failed to fetch edited video: {str(e)}")
 
 
+@router.get("/edited_video/{uid}/variants")
+@bulkhead("interactive")
+def get_edited_video_variants_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+    """Aspect-ratio variants stored for an edited video."""
+    tags = get_edited_video_tags(uid)
+    if not tags:
+        raise HTTPException(status_code=404, detail="Edited video not found")
+    return {"id": uid, "tags": tags}
+
+
 @router.get("/edited_video/{uid}/download")
-async def download_edited_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def download_edited_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), tag: str = DEFAULT_VIDEO_TAG):
     """
     Download edited video by UID as raw video file.
     Returns video as streaming response for direct download.
+    ``tag`` picks the aspect-ratio variant (16x9, 9x16 or 1x1).
     """
     try:
-        video_bytes = get_edited_video_raw(uid)
+        video_bytes = get_edited_video_raw(uid, tag)
         if not video_bytes:
             raise HTTPException(status_code=404, detail="Edited video not found")
         
         # Create streaming response for video download
         video_stream = io.BytesIO(video_bytes)
+        filename = f"edited_video_{uid}.mp4" if tag == DEFAULT_VIDEO_TAG else f"edited_video_{uid}_{tag}.mp4"
         
         return StreamingResponse(
             video_stream,
             media_type="video/mp4",
             headers={
-                "Content-Disposition": f"attachment; filename=edited_video_{uid}.mp4",
+                "Content-Disposition": f"attachment; filename={filename}",
                 "Content-Length": str(len(video_bytes))
             }
         )
@@ -269,21 +307,24 @@ async def download_edited_video_endpoint(uid: int = uuid4().int & ((1 << 32) - 1
     
 
 @router.get("/traditional_ad_banner/{uid}")
-async def get_traditional_ad_banner_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_traditional_ad_banner_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_ad_banner(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Traditional ad banner not found")
     return row
 
 @router.get("/youtube_thumbnail_banner/{uid}")
-async def get_youtube_thumbnail_banner_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_youtube_thumbnail_banner_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_youtube_thumbnail_image(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Youtube thumbnail banner not found")
     return row
 
 @router.get("/comics/{uid}")
-async def get_comics_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_comics_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     row = get_comics(uid)
     if not row:
         raise HTTPException(status_code=404, detail="Comics not found")
@@ -291,7 +332,8 @@ async def get_comics_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.get("/youtube_url/{uid}")
-async def get_youtube_url_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_youtube_url_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     """Get YouTube URL for a product"""
     try:
         url_data = get_youtube_url(uid)
@@ -312,7 +354,8 @@ async def get_youtube_url_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.post("/youtube_url/{uid}")
-async def store_youtube_url_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), url: str="", title: str = ""):
+@bulkhead("interactive")
+def store_youtube_url_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), url: str="", title: str = ""):
     """Store YouTube URL for a product"""
     try:
         store_youtube_url(uid, url, title)
@@ -330,7 +373,8 @@ async def store_youtube_url_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), u
 
 
 @router.get("/inventory/{uid}")
-async def get_inventory_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
+@bulkhead("interactive")
+def get_inventory_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
     """Get stored inventory recommendations for a product"""
     try:
         inventory_data = get_inventory(uid)
@@ -350,7 +394,8 @@ async def get_inventory_endpoint(uid: int = uuid4().int & ((1 << 32) - 1)):
 
 
 @router.post("/inventory/{uid}")
-async def store_inventory_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), recommendations: dict={}, art_forms: list[str]=[]):
+@bulkhead("interactive")
+def store_inventory_endpoint(uid: int = uuid4().int & ((1 << 32) - 1), recommendations: dict={}, art_forms: list[str]=[]):
     """Store inventory recommendations for a product"""
     try:
         result = store_inventory_recommendations(uid, recommendations, art_forms)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import Optional
+from utils.metrics import track_external
 
 try:
 	from google.cloud import translate_v2 as translate
@@ -34,11 +35,12 @@ async def translate_text(req: TranslateRequest):
 
 	client = translate.Client()
 	try:
-		result = client.translate(
-			req.text,
-			target_language=req.target_language,
-			source_language=req.source_language or None,
-		)
+		with track_external("translate", "translate"):
+			result = client.translate(
+				req.text,
+				target_language=req.target_language,
+				source_language=req.source_language or None,
+			)
 		return {
 			"original_text": req.text,
 			"translated_text": result.get("translatedText", ""),
@@ -1,7 +1,9 @@
-import requests
+import httpx
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from services.storage.storage import get_youtube_url, store_youtube_url
+from utils.http_clients import http_clients
+from utils.metrics import track_external
 
 router = APIRouter(tags=["youtube"], prefix="/youtube")
 
@@ -35,12 +37,17 @@ async def verify_youtube_url(request: YouTubeUrlRequest):
         
         # Try to make a HEAD request to check if the video exists
         # YouTube returns 200 for valid videos, 404 for non-existent ones
-        response = requests.head(url, timeout=10)
+        client = http_clients.get("youtube")
+        async with track_external("youtube", "verify_head"):
+            response = await client.head(url, timeout=http_clients.timeout("youtube"))
         
         if response.status_code == 200:
             # Try to get the video title by making a GET request to the page
             try:
-                page_response = requests.get(url, timeout=10)
+                async with track_external("youtube", "verify_page"):
+                    page_response = await client.get(
+                        url, follow_redirects=True, timeout=http_clients.timeout("youtube")
+                    )
                 page_content = page_response.text
                 
                 # Extract title from the page (basic extraction)
@@ -71,13 +78,13 @@ async def verify_youtube_url(request: YouTubeUrlRequest):
                 error=f"Video not accessible (Status: {response.status_code})"
             )
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return YouTubeUrlResponse(
             exists=False,
             url=request.url,
             error="Request timeout - video may not exist"
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.RequestError as e:
         return YouTubeUrlResponse(
             exists=False,
             url=request.url,
@@ -1,10 +1,15 @@
 """Orchestrator for the complete artisan workflow."""
 
+import asyncio
 import logging
 from fastapi import UploadFile
 from .translation import TranslationService
 from .image_upload import ImageUploadService
-import httpx
+from .ingest import IngestedImage
+from typing import Optional
+from utils.deadline import timeout_for
+from utils.http_clients import HttpClientPool, http_clients
+from utils.metrics import track_external
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +25,8 @@ class ArtisanClient:
                  gcs_folder: str,
                  project_id: str,
                  agent_url: str,
-                 timeout: float):
+                 timeout: float,
+                 http_client_pool: Optional[HttpClientPool] = None):
         """
         Initialize with service dependencies.
         
@@ -29,7 +35,10 @@ class ArtisanClient:
             gcs_folder: GCS folder name
             project_id: GCP project ID
             agent_url: Base Agent API URL
-            timeout: Request timeout in seconds
+            timeout: Request timeout in seconds (capped at the remaining
+                request deadline)
+            http_client_pool: Pool providing the shared agent HTTP client
+                (defaults to the app-wide pool)
         """
         self.gcs_bucket = gcs_bucket
         self.gcs_folder = gcs_folder
@@ -38,87 +47,83 @@ class ArtisanClient:
         # Base URL of the artisan-agent service
         self.agent_url = agent_url
         self.timeout = timeout
+        self.http_client_pool = http_client_pool or http_clients
         print("agent url is", agent_url)
     
-    async def generate_content(self, 
-                             product_description: str, 
-                             language: str, 
-                             image: UploadFile, 
-                             **additional_data) -> dict:
+    async def translate_description(self, text: str, language: str) -> tuple:
         """
-        Main method to orchestrate the complete artisan workflow.
-        
-        This method coordinates all services:
-        1. Translate product description if needed
-        2. Upload image to GCS and get the GCS URI
-        3. Call artisan-agent API with the product description and the GCS URI
-        4. Return comprehensive response
-        
-        Args:
-            product_description: Product description from frontend
-            language: Language code from frontend (e.g., "en", "es", "fr")
-            image: Uploaded image file
-            **additional_data: Additional form data (artist_name, state, etc.)
-        
+        Translate ``text`` to English if needed.
+
         Returns:
-            Complete response with all processing details
+            (final_text, translation_result) - translation_result is None when
+            no translation was needed
+        """
+        if not text or not self.translation_service.should_translate(language):
+            logger.info(f"No translation needed, language is {language}")
+            return text, None
+
+        logger.info(f"Translation needed from {language} to English")
+        translation_result = await self.translation_service.translate_text(
+            text=text,
+            source_language=language
+        )
+        return translation_result["translated_text"], translation_result
+
+    async def upload_image(self, image: IngestedImage) -> str:
+        """Upload the ingested image to the artisan input folder in GCS."""
+        logger.info("Uploading image to GCS...")
+        return await self.image_service.upload_ingested_image(
+            image=image,
+            bucket_name=self.gcs_bucket,
+            folder=self.gcs_folder
+        )
+
+    async def call_agent(self,
+                         final_description: str,
+                         gcs_image_uri: str,
+                         original_description: str,
+                         language: str,
+                         translation_result: Optional[dict] = None,
+                         **additional_data) -> dict:
+        """
+        Call the artisan-agent API once its inputs (English description and
+        GCS image URI) are ready, and build the comprehensive response.
         """
         try:
-            # Step 1: Handle translation if needed
-            final_description = product_description
-            translation_result = None
-            
-            if self.translation_service.should_translate(language):
-                logger.info(f"Translation needed from {language} to English")
-                translation_result = await self.translation_service.translate_text(
-                    text=product_description,
-                    source_language=language
-                )
-                final_description = translation_result["translated_text"]
-            else:
-                logger.info(f"No translation needed, language is {language}")
-            
-            # Step 2: Upload image to GCS
-            logger.info("Uploading image to GCS...")
-            gcs_image_uri = await self.image_service.upload_image(
-                image=image,
-                bucket_name=self.gcs_bucket,
-                folder=self.gcs_folder
-            )
-            
-            # Step 3: Call artisan-agent API directly
             endpoint = f"{self.agent_url.rstrip('/')}/generate"
             payload = {
                 "product_description": final_description,
                 "gcs_image_uri": gcs_image_uri,
             }
             logger.info(f"Calling artisan-agent API with payload: {payload}")
-            logger.info(f"Using timeout: {self.timeout} seconds")
+            timeout = timeout_for(self.timeout)
+            logger.info(f"Using timeout: {timeout:.0f} seconds")
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Making POST request to: {endpoint}")
+            client = self.http_client_pool.get("artisan_agent")
+            logger.info(f"Making POST request to: {endpoint}")
+            async with track_external("artisan_agent", "generate"):
                 resp = await client.post(
                     endpoint,
                     json=payload,
                     headers={"Content-Type": "application/json"},
+                    timeout=timeout,
                 )
-                logger.info(f"Request completed! Artisan-agent API response status: {resp.status_code}")
-                logger.info(f"Artisan-agent API response headers: {dict(resp.headers)}")
-                
-                if resp.status_code != 200:
-                    logger.error(f"Artisan-agent API error: {resp.status_code} - {resp.text}")
-                    raise Exception(f"Artisan-agent API error: {resp.status_code} - {resp.text}")
-                
-                artisan_response = resp.json()
-            
+            logger.info(f"Request completed! Artisan-agent API response status: {resp.status_code}")
+            logger.info(f"Artisan-agent API response headers: {dict(resp.headers)}")
+
+            if resp.status_code != 200:
+                logger.error(f"Artisan-agent API error: {resp.status_code} - {resp.text}")
+                raise Exception(f"Artisan-agent API error: {resp.status_code} - {resp.text}")
+
+            artisan_response = resp.json()
+
             logger.info(f"Artisan-agent API response: {artisan_response}")
-            # Step 4: Prepare comprehensive response
-            response = {
+            return {
                 "status": "success",
                 "message": "Content generated successfully",
                 "data": {
                     "input": {
-                        "original_description": product_description,
+                        "original_description": original_description,
                         "language": language,
                         "final_description": final_description,
                         **additional_data
@@ -130,8 +135,48 @@ class ArtisanClient:
                     "result": artisan_response
                 }
             }
-            
-            return response
+
+        except Exception as e:
+            logger.error(f"Error in call_agent: {str(e)}")
+            raise e
+
+    async def generate_content(self, 
+                             product_description: str, 
+                             language: str, 
+                             image: UploadFile, 
+                             **additional_data) -> dict:
+        """
+        Main method to orchestrate the complete artisan workflow.
+        
+        This method coordinates all services:
+        1. Read the image once, then concurrently translate the product
+           description (if needed) and upload the image to GCS
+        2. Call artisan-agent API with the product description and the GCS URI
+        3. Return comprehensive response
+        
+        Args:
+            product_description: Product description from frontend
+            language: Language code from frontend (e.g., "en", "es", "fr")
+            image: Uploaded image file
+            **additional_data: Additional form data (artist_name, state, etc.)
+        
+        Returns:
+            Complete response with all processing details
+        """
+        try:
+            ingested = await IngestedImage.from_upload(image)
+            (final_description, translation_result), gcs_image_uri = await asyncio.gather(
+                self.translate_description(product_description, language),
+                self.upload_image(ingested),
+            )
+            return await self.call_agent(
+                final_description,
+                gcs_image_uri,
+                original_description=product_description,
+                language=language,
+                translation_result=translation_result,
+                **additional_data
+            )
             
         except Exception as e:
             logger.error(f"Error in generate_content: {str(e)}")
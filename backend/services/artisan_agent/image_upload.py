@@ -2,7 +2,8 @@
 
 import logging
 from fastapi import UploadFile
-from image.image_upload.image_uploading import upload_to_gcs
+from image.image_upload.image_uploading import upload_bytes_to_gcs, upload_to_gcs
+from .ingest import IngestedImage
 
 logger = logging.getLogger(__name__)
 
@@ -41,3 +42,34 @@ class ImageUploadService:
         except Exception as e:
             logger.error(f"Error uploading image to GCS: {str(e)}")
             raise e
+
+    async def upload_ingested_image(self, image: IngestedImage, bucket_name: str, folder: str) -> str:
+        """
+        Upload an already-read image buffer to GCS.
+
+        Args:
+            image: Image read once at the start of the ingest stage
+            bucket_name: GCS bucket name
+            folder: Folder within the bucket
+
+        Returns:
+            GCS URI string
+        """
+        try:
+            logger.info(f"Uploading image to GCS: {image.filename}")
+
+            gcs_uri = await upload_bytes_to_gcs(
+                project_id=self.project_id,
+                bucket_name=bucket_name,
+                image_content=image.data,
+                filename=image.filename,
+                content_type=image.content_type,
+                folder=folder
+            )
+
+            logger.info(f"Image uploaded successfully: {gcs_uri}")
+            return gcs_uri
+
+        except Exception as e:
+            logger.error(f"Error uploading image to GCS: {str(e)}")
+            raise e
@@ -0,0 +1,27 @@
+"""Single-read buffer for an uploaded product image."""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import UploadFile
+
+
+@dataclass(frozen=True)
+class IngestedImage:
+    """
+    The uploaded image, read exactly once.
+
+    Classification, the GCS upload and anything else in the ingest stage share
+    this buffer instead of reading and rewinding the ``UploadFile`` each time,
+    which also makes it safe to hand to concurrent tasks.
+    """
+
+    data: bytes
+    filename: str
+    content_type: Optional[str]
+
+    @classmethod
+    async def from_upload(cls, upload: UploadFile) -> "IngestedImage":
+        data = await upload.read()
+        await upload.seek(0)
+        return cls(data=data, filename=upload.filename or "image", content_type=upload.content_type)
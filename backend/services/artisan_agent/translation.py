@@ -2,6 +2,8 @@
 
 import logging
 from google.cloud import translate_v2 as translate
+from utils.executors import bulkheads
+from utils.metrics import track_external
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +32,16 @@ class TranslationService:
         try:
             logger.info(f"Translating text from {source_language} to English: {text[:50]}...")
             
-            result = self.client.translate(
-                text,
-                target_language="en",
-                source_language=source_language
-            )
+            # The client is blocking; keep it off the event loop so
+            # translation can overlap with the classifier and GCS upload.
+            with track_external("translate", "translate"):
+                result = await bulkheads.run(
+                    "ai",
+                    self.client.translate,
+                    text,
+                    target_language="en",
+                    source_language=source_language
+                )
             
             translated_text = result['translatedText']
             detected_source_language = result.get('detectedSourceLanguage', source_language)
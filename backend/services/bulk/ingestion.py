@@ -0,0 +1,286 @@
+"""Bulk catalog ingestion: runs many products through the generation pipeline."""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import posixpath
+import zipfile
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from services.storage import storage
+from services.storage.media_store import media_store
+from utils.executors import BACKGROUND, bulkheads, priority_scope
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent pipeline runs per job. Items run at BACKGROUND
+# priority, so their work queues behind interactive requests on every
+# bulkhead, and their model calls are paced by the shared AI rate limiter.
+DEFAULT_WORKERS = int(os.getenv("BULK_DEFAULT_WORKERS", "2"))
+MAX_WORKERS = int(os.getenv("BULK_MAX_WORKERS", "4"))
+MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Uploaded images wait in the media store, not the database (every database
+# write uploads the whole file), until their item succeeds
+STAGED_IMAGES = "bulk_images"
+
+# Manifest columns accepted for each pipeline form field
+MANIFEST_FIELDS = {
+    "productDescription": ("productDescription", "product_description", "description"),
+    "artistName": ("artistName", "artist_name"),
+    "state": ("state",),
+    "artForm": ("artForm", "art_form"),
+    "targetRegion": ("targetRegion", "target_region"),
+    "artistDescription": ("artistDescription", "artist_description"),
+    "language": ("language",),
+}
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# pipeline(manifest, image_bytes, filename, content_type) -> generated uid
+Pipeline = Callable[[Dict[str, str], bytes, str, Optional[str]], Awaitable[int]]
+
+
+class BulkIngestionError(ValueError):
+    """Raised when a batch upload or manifest is invalid."""
+
+
+def _guess_content_type(filename: str) -> str:
+    extension = posixpath.splitext(filename.lower())[1]
+    if extension == ".png":
+        return "image/png"
+    if extension == ".webp":
+        return "image/webp"
+    return "image/jpeg"
+
+
+def parse_manifest(data: bytes, filename: str = "") -> List[Dict[str, str]]:
+    """
+    Parse a CSV or JSON manifest into a list of normalized rows.
+
+    Every row needs a ``filename`` matching one of the uploaded images and a
+    product description; the remaining pipeline fields are optional.
+    """
+    text = data.decode("utf-8-sig")
+    stripped = text.lstrip()
+    if filename.lower().endswith(".json") or stripped.startswith(("[", "{")):
+        try:
+            raw = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise BulkIngestionError(f"Invalid JSON manifest: {e}")
+        if isinstance(raw, dict):
+            raw = raw.get("items", [])
+        if not isinstance(raw, list):
+            raise BulkIngestionError("JSON manifest must be a list of items")
+    else:
+        raw = list(csv.DictReader(io.StringIO(text)))
+
+    rows = []
+    for position, entry in enumerate(raw, start=1):
+        if not isinstance(entry, dict):
+            raise BulkIngestionError(f"Manifest entry {position} is not an object")
+        image_name = str(entry.get("filename") or entry.get("image") or "").strip()
+        if not image_name:
+            raise BulkIngestionError(f"Manifest entry {position} has no filename")
+
+        row = {"filename": image_name}
+        for field, aliases in MANIFEST_FIELDS.items():
+            value = next((entry[alias] for alias in aliases if entry.get(alias) not in (None, "")), "")
+            row[field] = str(value).strip()
+        if not row["productDescription"]:
+            raise BulkIngestionError(f"Manifest entry {position} ({image_name}) has no productDescription")
+        row["language"] = row["language"] or "en"
+        rows.append(row)
+
+    if not rows:
+        raise BulkIngestionError("Manifest contains no items")
+    if len(rows) > MAX_ITEMS:
+        raise BulkIngestionError(f"Manifest has {len(rows)} items, the limit is {MAX_ITEMS}")
+    return rows
+
+
+def read_archive_images(data: bytes) -> Dict[str, bytes]:
+    """Extract images from a ZIP archive, keyed by their base filename."""
+    images = {}
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/"):
+                    continue
+                basename = posixpath.basename(name)
+                if posixpath.splitext(basename.lower())[1] not in IMAGE_EXTENSIONS:
+                    continue
+                images[basename] = archive.read(info)
+    except zipfile.BadZipFile as e:
+        raise BulkIngestionError(f"Invalid ZIP archive: {e}")
+    return images
+
+
+def build_items(manifest_rows: List[Dict[str, str]], images: Dict[str, bytes]) -> List[dict]:
+    """Pair manifest rows with uploaded images."""
+    items = []
+    missing = []
+    for row in manifest_rows:
+        image_name = posixpath.basename(row["filename"])
+        image = images.get(image_name)
+        if image is None:
+            missing.append(image_name)
+            continue
+        items.append(
+            {
+                "filename": image_name,
+                "content_type": _guess_content_type(image_name),
+                "image": image,
+                "manifest": {k: v for k, v in row.items() if k != "filename"},
+            }
+        )
+    if missing:
+        raise BulkIngestionError(f"No image uploaded for manifest entries: {', '.join(missing)}")
+    return items
+
+
+def staged_image_key(job_id: str, item_index: int) -> str:
+    return f"{job_id}/{item_index}"
+
+
+def clamp_workers(workers: Optional[int]) -> int:
+    if not workers or workers < 1:
+        return DEFAULT_WORKERS
+    return min(workers, MAX_WORKERS)
+
+
+def _store_job(job_id: str, workers: int, items: List[dict]) -> None:
+    staged = []
+    for item_index, item in enumerate(items):
+        key = staged_image_key(job_id, item_index)
+        media_store.put(STAGED_IMAGES, key, item["image"], item["content_type"])
+        staged.append({**{k: v for k, v in item.items() if k != "image"}, "image_key": key})
+    storage.store_bulk_job(job_id, workers, staged)
+
+
+class BulkIngestionService:
+    """
+    Creates bulk jobs and streams their items through the pipeline with a
+    bounded number of workers. Job and item state lives in the database, so a
+    partially failed (or interrupted) job can be resumed.
+    """
+
+    def __init__(self, pipeline: Pipeline):
+        self.pipeline = pipeline
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def create_job(self, items: List[dict], workers: Optional[int] = None) -> dict:
+        job_id = uuid4().hex
+        workers = clamp_workers(workers)
+        # Image uploads and the database write, off the event loop
+        await bulkheads.run("uploads", _store_job, job_id, workers, items)
+        logger.info(f"Created bulk job {job_id} with {len(items)} items and {workers} workers")
+        self.start(job_id, workers)
+        return {"job_id": job_id, "total_items": len(items), "workers": workers}
+
+    def is_running(self, job_id: str) -> bool:
+        task = self._running.get(job_id)
+        return task is not None and not task.done()
+
+    def start(self, job_id: str, workers: int) -> None:
+        if self.is_running(job_id):
+            return
+        task = asyncio.create_task(self._run_job(job_id, workers))
+        self._running[job_id] = task
+        task.add_done_callback(lambda _: self._running.pop(job_id, None))
+
+    async def resume(self, job_id: str, workers: Optional[int] = None) -> dict:
+        """Re-queue every item that did not succeed and restart the job."""
+        job = await bulkheads.run("interactive", storage.get_bulk_job, job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if self.is_running(job_id):
+            return {"job_id": job_id, "resumed_items": 0, "status": "running"}
+
+        workers = clamp_workers(workers or job["workers"])
+        # One transaction (and database upload) for the whole job
+        resumed = await bulkheads.run("uploads", storage.reset_bulk_job_items, job_id)
+        if resumed:
+            self.start(job_id, workers)
+        return {"job_id": job_id, "resumed_items": resumed, "workers": workers}
+
+    async def get_progress(self, job_id: str) -> Optional[dict]:
+        job = await bulkheads.run("interactive", storage.get_bulk_job, job_id)
+        if job is None:
+            return None
+        counts = {PENDING: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for item in job["items"]:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        done = counts[SUCCEEDED] + counts[FAILED]
+        return {
+            **job,
+            "counts": counts,
+            "progress": done / job["total_items"] if job["total_items"] else 1.0,
+            "active": self.is_running(job_id),
+        }
+
+    async def _run_job(self, job_id: str, workers: int) -> None:
+        # Inherited by the worker tasks and by every bulkhead submission they make
+        with priority_scope(BACKGROUND):
+            await self._run_items(job_id, workers)
+
+    async def _run_items(self, job_id: str, workers: int) -> None:
+        job = await bulkheads.run("interactive", storage.get_bulk_job, job_id)
+        # Items left "running" belong to a worker that died with the process.
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in job["items"]:
+            if item["status"] in (PENDING, RUNNING):
+                queue.put_nowait(item["item_index"])
+
+        await bulkheads.run("uploads", storage.update_bulk_job_status, job_id, "running", workers)
+
+        async def worker():
+            while True:
+                try:
+                    item_index = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._run_item(job_id, item_index)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        final = await bulkheads.run("interactive", storage.get_bulk_job, job_id)
+        failed = sum(1 for item in final["items"] if item["status"] == FAILED)
+        status = "completed_with_errors" if failed else "completed"
+        await bulkheads.run("uploads", storage.update_bulk_job_status, job_id, status)
+        logger.info(f"Bulk job {job_id} finished: {status} ({failed} failed)")
+
+    async def _run_item(self, job_id: str, item_index: int) -> None:
+        payload = await bulkheads.run("interactive", storage.get_bulk_job_item_payload, job_id, item_index)
+        await bulkheads.run("uploads", storage.update_bulk_job_item, job_id, item_index, RUNNING, started=True)
+        try:
+            image = None
+            if payload["image_key"]:
+                image = await bulkheads.run("interactive", media_store.get, STAGED_IMAGES, payload["image_key"])
+            if image is None:
+                raise BulkIngestionError("Uploaded image is no longer staged; upload this item again")
+            uid = await self.pipeline(
+                payload["manifest"],
+                image,
+                payload["filename"],
+                payload["content_type"],
+            )
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            logger.error(f"Bulk item {job_id}/{item_index} ({payload['filename']}) failed: {detail}")
+            await bulkheads.run("uploads", storage.update_bulk_job_item, job_id, item_index, FAILED, error=str(detail))
+            return
+        await bulkheads.run("uploads", storage.update_bulk_job_item, job_id, item_index, SUCCEEDED, uid=uid)
+        # A succeeded item is never re-run (see resume)
+        await bulkheads.run("uploads", media_store.delete, STAGED_IMAGES, payload["image_key"])
+        logger.info(f"Bulk item {job_id}/{item_index} ({payload['filename']}) succeeded with uid {uid}")
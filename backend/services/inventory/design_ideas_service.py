@@ -2,6 +2,9 @@ from typing import List, Dict, Any
 import base64
 import vertexai
 from vertexai.preview.vision_models import ImageGenerationModel
+from utils.metrics import track_external
+from utils.rate_limiter import ai_rate_limiter
+from utils.resilience import CircuitOpenError, get_dependency
 
 
 
@@ -23,6 +26,17 @@ def _build_prompt(art_forms: List[str],
     return prompt
 
 
+def _generate_images(model: ImageGenerationModel, model_name: str, prompt: str):
+    with ai_rate_limiter.acquire_sync(model_name), track_external("imagen", "design_idea"):
+        return model.generate_images(
+            prompt=prompt,
+            number_of_images=1,
+            language="en",
+            aspect_ratio="1:1",
+            person_generation="allow_adult",
+        )
+
+
 def generate_design_image(
     art_forms: List[str],
     region: str,
@@ -49,6 +63,7 @@ def generate_design_image(
         "imagen-3.0-fast-generate-001",
     ]
 
+    imagen = get_dependency("imagen")
     image_data_url = None
     used_model = None
     last_result = None
@@ -58,13 +73,7 @@ def generate_design_image(
         try:
             used_model = model_name
             model = ImageGenerationModel.from_pretrained(model_name)
-            result_images = model.generate_images(
-                prompt=prompt,
-                number_of_images=1,
-                language="en",
-                aspect_ratio="1:1",
-                person_generation="allow_adult",
-            )
+            result_images = imagen.call(_generate_images, model, model_name, prompt)
             last_result = result_images
             print(last_result)
 
@@ -89,6 +98,11 @@ def generate_design_image(
                     b64 = base64.b64encode(image_bytes).decode("utf-8")
                     image_data_url = f"data:image/png;base64,{b64}"
                     break
+        except CircuitOpenError as open_err:
+            # Imagen is failing across the board; don't walk the whole
+            # candidate list waiting on each model.
+            last_error = str(open_err)
+            break
         except Exception as gen_err:
             last_error = str(gen_err)
             continue
@@ -1,12 +1,25 @@
-from langchain_core.prompts import PromptTemplate
-from langchain_google_vertexai import VertexAI
+from typing import List
+
+from pydantic import BaseModel
+from vertexai.generative_models import GenerativeModel
 from services.storage.storage import store_inventory_recommendations
+from utils.structured_output import agenerate_structured
+
+MODEL_NAME = "gemini-2.5-pro"
+
+model = GenerativeModel(MODEL_NAME)
+
+
+class InventoryRecommendation(BaseModel):
+    holiday: str
+    date: str
+    items: List[str]
+    reason: str
+
+
+class InventoryRecommendations(BaseModel):
+    recommendations: List[InventoryRecommendation]
 
-model = VertexAI(
-    model_name="gemini-2.5-pro",
-    project="rich-jigsaw-469313-m2",  
-    location="us-central1" 
-)
 
 async def get_recommended_inventory(
     art_forms: list[str],
@@ -41,52 +54,27 @@ async def get_recommended_inventory(
     - Cultural symbols and traditions specific to {region}
     - Market preferences and buying patterns in {region}
 
-    The output should be a single, concise JSON object with the following structure:
-    {{
-        "recommendations": [
-            {{
-                "holiday": "Holiday Name",
-                "date": "January 1, 2025, Wednesday",
-                "items": ["item_name_1", "item_name_2", "item_name_3"],
-                "reason": "Brief explanation of why these items are perfect for this festival AND why they appeal to {region} customers specifically"
-            }},
-            {{
-                "holiday": "Another Holiday Name",
-                "date": "February 14, 2025, Friday", 
-                "items": ["item_name_4", "item_name_5", "item_name_6"],
-                "reason": "Brief explanation of why these items are perfect for this festival AND why they appeal to {region} customers specifically"
-            }}
-        ]
-    }}
+    For each holiday give its name, its date (e.g. "January 1, 2025, Wednesday"), the recommended items
+    and a brief reason why these items are perfect for this festival AND why they appeal to {region} customers specifically.
     """
 
-    prompt = PromptTemplate.from_template(prompt_template)
-    chain = prompt | model
-    
+    prompt = prompt_template.format(
+        art_forms=", ".join(art_forms),
+        region=region,
+        upcoming_holidays=", ".join(holiday_details),
+    )
 
-    result = await chain.ainvoke({
-        "art_forms": ", ".join(art_forms),
-        "region": region,
-        "upcoming_holidays": ", ".join(holiday_details)
-    })
-    
     try:
-        import json
-        import re
-        
-        response_text = str(result)
-        
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = response_text
-        
-        parsed_result = json.loads(json_str)
+        parsed_result = (
+            await agenerate_structured(
+                model,
+                MODEL_NAME,
+                prompt,
+                InventoryRecommendations,
+                operation="inventory",
+                cache_namespace="inventory",
+            )
+        ).model_dump()
         
         # Store the recommendations in the database using the provided UID
         try:
@@ -106,8 +94,7 @@ async def get_recommended_inventory(
         }
         
     except Exception as e:
-        print(f"Error parsing model response: {e}")
-        print(f"Raw response: {result}")
+        print(f"Error generating inventory recommendations: {e}")
             
         error_response = {
             "recommendations": [
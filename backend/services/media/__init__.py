@@ -0,0 +1 @@
+"""CPU-heavy image and video work, run out of process by the media worker."""
@@ -0,0 +1,138 @@
+"""
+Background removal with long-lived rembg sessions and a mask cache.
+
+Creating a rembg session loads the segmentation model into onnxruntime,
+which costs far more than a single cut-out. Sessions are therefore created
+once per model and process (the media worker processes warm theirs up at
+spawn, from model files the API process downloaded once beforehand, see
+:mod:`services.media.worker`) and reused by every call.
+
+The mask of each image is kept in the media store under the model and a
+hash of the image, so an image cut out before (a retried thumbnail, the same
+product photo in a banner) costs a PNG decode instead of a model run. The
+cut-out is the image composited onto transparency through the mask, as
+rembg itself does.
+
+.. code-block:: python
+
+    from services.media import background_removal
+
+    cutout = background_removal.remove(product_bytes)
+    cutouts = background_removal.remove_many([front, side, back], model="u2netp")
+
+Configuration:
+    REMBG_MODEL: default model, e.g. "u2net" (quality) or "u2netp" (small
+        and fast) (default "u2net")
+    REMBG_WARM_UP: comma separated models to download at start-up and load
+        when a worker starts; empty to do both on first use (default: REMBG_MODEL)
+"""
+
+import io
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps
+
+from services.storage.media_store import content_key, media_store
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REMBG_MODEL = os.getenv("REMBG_MODEL", "u2net")
+WARM_UP_MODELS = [m.strip() for m in os.getenv("REMBG_WARM_UP", REMBG_MODEL).split(",") if m.strip()]
+MASK_NAMESPACE = "rembg_masks"
+
+BACKGROUND_REMOVALS = REGISTRY.counter(
+    "artisan_background_removals_total",
+    "Background removals by model and mask source (cache, model).",
+    ("model", "source"),
+)
+
+_sessions: Dict[str, object] = {}
+_sessions_lock = threading.Lock()
+
+
+def session(model: Optional[str] = None):
+    """This process's rembg session for ``model``, created on first use."""
+    model = model or REMBG_MODEL
+    with _sessions_lock:
+        if model not in _sessions:
+            from rembg import new_session
+
+            logger.info(f"Loading background removal model {model}")
+            _sessions[model] = new_session(model)
+        return _sessions[model]
+
+
+def download(models: Optional[List[str]] = None) -> None:
+    """Fetch the files of ``models`` into rembg's model directory without loading them."""
+    from rembg.sessions import sessions_class
+
+    sessions = {cls.name(): cls for cls in sessions_class}
+    for model in models if models is not None else WARM_UP_MODELS:
+        try:
+            sessions[model].download_models()
+        except Exception as e:
+            # Downloaded by the first session() instead
+            logger.warning(f"Download of background removal model {model} failed: {e}")
+
+
+def warm_up(models: Optional[List[str]] = None) -> None:
+    """Load ``models`` and run each once, so the first real image pays no start-up cost."""
+    for model in models if models is not None else WARM_UP_MODELS:
+        try:
+            _mask(Image.new("RGB", (64, 64), "white"), model)
+        except Exception as e:
+            # Loaded lazily on first use instead
+            logger.warning(f"Warm-up of background removal model {model} failed: {e}")
+
+
+def _mask(image: Image.Image, model: str) -> Image.Image:
+    from rembg import remove
+
+    return remove(image, session=session(model), only_mask=True)
+
+
+def _cutout(image_bytes: bytes, model: str, digest: Optional[str] = None) -> bytes:
+    # Same orientation handling as rembg, so cached masks line up
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes))).convert("RGBA")
+    key = f"{model}/{digest or content_key(image_bytes)}"
+
+    cached = media_store.get(MASK_NAMESPACE, key)
+    if cached is not None:
+        mask = Image.open(io.BytesIO(cached)).convert("L")
+        BACKGROUND_REMOVALS.inc(model=model, source="cache")
+    else:
+        mask = _mask(image, model).convert("L")
+        BACKGROUND_REMOVALS.inc(model=model, source="model")
+        buffer = io.BytesIO()
+        mask.save(buffer, format="PNG", optimize=True)
+        try:
+            media_store.put(MASK_NAMESPACE, key, buffer.getvalue(), "image/png")
+        except Exception as e:
+            logger.warning(f"Failed to cache background mask {key}: {e}")
+
+    cutout = Image.composite(image, Image.new("RGBA", image.size, 0), mask)
+    buffer = io.BytesIO()
+    cutout.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def remove(image: bytes, model: Optional[str] = None) -> bytes:
+    """Cut the product out of ``image``; returns a PNG with alpha."""
+    return _cutout(image, model or REMBG_MODEL)
+
+
+def remove_many(images: List[bytes], model: Optional[str] = None) -> List[bytes]:
+    """:func:`remove` for several images in one go; duplicates are cut out once."""
+    model = model or REMBG_MODEL
+    cutouts: Dict[str, bytes] = {}
+    results = []
+    for image in images:
+        digest = content_key(image)
+        if digest not in cutouts:
+            cutouts[digest] = _cutout(image, model, digest)
+        results.append(cutouts[digest])
+    return results
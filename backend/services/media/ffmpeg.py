@@ -0,0 +1,148 @@
+"""
+Thin wrappers around the ffmpeg / ffprobe binaries.
+
+The binaries come from the system package (see the Dockerfile); set
+``FFMPEG_BINARY`` / ``FFPROBE_BINARY`` to use others.
+
+Media is handed to ffmpeg as in-memory files rather than temp files: a
+``memfd`` (an anonymous unlinked temporary file where ``memfd_create`` is
+unavailable) passed to the child process and named by ``fd_path``. Unlike a
+pipe it is seekable, which ``-stream_loop`` inputs and ``+faststart`` MP4
+outputs need.
+
+.. code-block:: python
+
+    with ffmpeg.memfile(video_bytes, "video") as src, ffmpeg.memfile(name="out") as out:
+        ffmpeg.run(["-i", ffmpeg.fd_path(src), ..., ffmpeg.fd_path(out)], pass_fds=(src, out))
+        for chunk in ffmpeg.read_chunks(out): ...
+"""
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+# Video codecs an MP4 container can carry as they are
+MP4_VIDEO_CODECS = {"h264", "hevc", "mpeg4", "av1"}
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+class FFmpegError(RuntimeError):
+    """ffmpeg or ffprobe exited with an error."""
+
+
+@contextmanager
+def memfile(data: bytes = b"", name: str = "media") -> Iterator[int]:
+    """File descriptor of an in-memory file holding ``data``; closed on exit."""
+    if hasattr(os, "memfd_create"):
+        fd = os.memfd_create(name)
+    else:
+        fd = _anonymous_file()
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        yield fd
+    finally:
+        os.close(fd)
+
+
+def _anonymous_file() -> int:
+    with tempfile.TemporaryFile() as f:
+        return os.dup(f.fileno())
+
+
+def fd_path(fd: int) -> str:
+    """Path under which a child process given ``fd`` (via ``pass_fds``) opens it."""
+    return f"/dev/fd/{fd}"
+
+
+def size(fd: int) -> int:
+    return os.fstat(fd).st_size
+
+
+def read_chunks(fd: int, chunk_size: int = READ_CHUNK_BYTES) -> Iterator[bytes]:
+    """Contents of ``fd`` from the start, ``chunk_size`` bytes at a time."""
+    offset = 0
+    while True:
+        chunk = os.pread(fd, chunk_size, offset)
+        if not chunk:
+            return
+        offset += len(chunk)
+        yield chunk
+
+
+def _run(args: List[str], timeout: Optional[float] = None, pass_fds: Sequence[int] = ()) -> bytes:
+    try:
+        result = subprocess.run(
+            args, capture_output=True, timeout=timeout, check=False, pass_fds=tuple(pass_fds)
+        )
+    except FileNotFoundError as e:
+        raise FFmpegError(f"{args[0]} is not installed") from e
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        # The last lines carry the actual error; the rest is the banner
+        raise FFmpegError(f"{os.path.basename(args[0])} failed: {stderr[-800:]}")
+    return result.stdout
+
+
+def probe(path: str, pass_fds: Sequence[int] = ()) -> Dict[str, Any]:
+    """ffprobe format and stream information of ``path``."""
+    output = _run([
+        FFPROBE_BINARY, "-v", "error",
+        "-show_entries", "format=duration:stream=index,codec_type,codec_name,duration,width,height",
+        "-of", "json", path,
+    ], pass_fds=pass_fds)
+    return json.loads(output or b"{}")
+
+
+def duration(info: Dict[str, Any], codec_type: Optional[str] = None) -> float:
+    """Duration in seconds of the first ``codec_type`` stream, else of the container."""
+    for stream in info.get("streams", []):
+        if codec_type is None or stream.get("codec_type") != codec_type:
+            continue
+        if stream.get("duration") not in (None, "N/A"):
+            return float(stream["duration"])
+    return float(info.get("format", {}).get("duration") or 0.0)
+
+
+def video_codec(info: Dict[str, Any]) -> Optional[str]:
+    for stream in info.get("streams", []):
+        if stream.get("codec_type") == "video":
+            return stream.get("codec_name")
+    return None
+
+
+def dimensions(info: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """Width and height of the first video stream."""
+    for stream in info.get("streams", []):
+        if stream.get("codec_type") == "video" and stream.get("width") and stream.get("height"):
+            return int(stream["width"]), int(stream["height"])
+    return None
+
+
+def starts_on_keyframe(path: str, pass_fds: Sequence[int] = ()) -> bool:
+    """Whether the first video packet is a keyframe, so stream copy can start at 0."""
+    output = _run([
+        FFPROBE_BINARY, "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=flags", "-read_intervals", "%+#1",
+        "-of", "csv=p=0", path,
+    ], pass_fds=pass_fds)
+    return output.strip().startswith(b"K")
+
+
+def run(args: List[str], timeout: Optional[float] = None, pass_fds: Sequence[int] = ()) -> None:
+    """Run ffmpeg with ``args`` (without the binary), quietly and non-interactively."""
+    _run(
+        [FFMPEG_BINARY, "-hide_banner", "-nostdin", "-loglevel", "error", "-y", *args],
+        timeout=timeout,
+        pass_fds=pass_fds,
+    )
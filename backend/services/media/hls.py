@@ -0,0 +1,189 @@
+"""
+HLS packaging of edited videos.
+
+A finished video is packaged into a small rendition ladder (:data:`RENDITIONS`)
+of segmented HLS in one ffmpeg run: one decode, a ``split`` filter into one
+scaled branch per rendition, keyframes forced on segment boundaries so players
+can switch renditions between any two segments. The result is one playlist
+and its segments per rendition:
+
+.. code-block:: text
+
+    360p/index.m3u8
+    360p/segment_000.ts ...
+    720p/index.m3u8
+    720p/segment_000.ts ...
+
+The HLS muxer writes named files, so unlike the other encodes this one goes
+through a temporary directory; :func:`package` returns the files as bytes,
+together with a master playlist listing the renditions. They are kept in the media store under ``hls/<uid>/<version>/<path>``, where
+the version is a hash of the packaged video, and the current version of each
+product is recorded in ``artifact_hashes`` (artifact "hls").
+
+Configuration:
+    HLS_RENDITIONS: comma separated rendition names (default "360p,720p")
+    HLS_SEGMENT_SECONDS: target segment length (default 4)
+"""
+
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.media import ffmpeg
+
+logger = logging.getLogger(__name__)
+
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "4"))
+FFMPEG_TIMEOUT_SECONDS = 600
+
+NAMESPACE = "hls"
+ARTIFACT = "hls"
+MASTER_PLAYLIST = "master.m3u8"
+RENDITION_PLAYLIST = "index.m3u8"
+SEGMENT_PATTERN = "segment_%03d.ts"
+
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    height: int
+    video_bitrate: str
+    max_bitrate: str
+    buffer_size: str
+    audio_bitrate: str
+
+
+LADDER: Dict[str, Rendition] = {
+    rendition.name: rendition
+    for rendition in (
+        Rendition("360p", 360, "800k", "856k", "1200k", "96k"),
+        Rendition("480p", 480, "1400k", "1498k", "2100k", "128k"),
+        Rendition("720p", 720, "2800k", "2996k", "4200k", "128k"),
+        Rendition("1080p", 1080, "5000k", "5350k", "7500k", "192k"),
+    )
+}
+RENDITIONS = [
+    LADDER[name.strip()] for name in os.getenv("HLS_RENDITIONS", "360p,720p").split(",")
+    if name.strip() in LADDER
+] or [LADDER["360p"]]
+
+
+def object_key(uid: int, version: str, path: str) -> str:
+    """Media store key of a packaged file."""
+    return f"{uid}/{version}/{path}"
+
+
+def content_type(path: str) -> str:
+    return CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+
+
+def _has_audio(info: dict) -> bool:
+    return any(stream.get("codec_type") == "audio" for stream in info.get("streams", []))
+
+
+def _ladder_for(source_height: int) -> List[Rendition]:
+    # No upscaling: renditions taller than the source add bytes, not detail
+    ladder = [r for r in RENDITIONS if r.height <= source_height]
+    return ladder or RENDITIONS[:1]
+
+
+def _package_args(source_path: str, output_dir: str, ladder: Sequence[Rendition], audio: bool) -> List[str]:
+    branches = "".join(f"[s{i}]" for i in range(len(ladder)))
+    graph = [f"[0:v]split={len(ladder)}{branches}"]
+    graph += [f"[s{i}]scale=-2:{r.height},setsar=1[v{i}]" for i, r in enumerate(ladder)]
+
+    args = ["-i", source_path, "-filter_complex", ";".join(graph)]
+    for i, rendition in enumerate(ladder):
+        args += [
+            "-map", f"[v{i}]",
+            f"-c:v:{i}", "libx264",
+            f"-b:v:{i}", rendition.video_bitrate,
+            f"-maxrate:v:{i}", rendition.max_bitrate,
+            f"-bufsize:v:{i}", rendition.buffer_size,
+        ]
+        if audio:
+            args += ["-map", "0:a:0", f"-c:a:{i}", "aac", f"-b:a:{i}", rendition.audio_bitrate]
+    stream_map = " ".join(
+        f"v:{i},a:{i},name:{r.name}" if audio else f"v:{i},name:{r.name}" for i, r in enumerate(ladder)
+    )
+    args += [
+        "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        # Same keyframe times in every rendition, one at each segment start
+        "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        "-sc_threshold", "0",
+        "-f", "hls",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_filename", os.path.join(output_dir, "%v", SEGMENT_PATTERN),
+        "-var_stream_map", stream_map,
+        os.path.join(output_dir, "%v", RENDITION_PLAYLIST),
+    ]
+    return args
+
+
+def _scaled_width(size: Tuple[int, int], height: int) -> int:
+    # What scale=-2:<height> picks: the aspect ratio kept, rounded to even
+    width, source_height = size
+    return int(round(width * height / source_height / 2)) * 2
+
+
+def _bits_per_second(rate: str) -> int:
+    return int(float(rate[:-1]) * 1000) if rate.endswith("k") else int(rate)
+
+
+def master_playlist(ladder: Sequence[Rendition], size: Optional[Tuple[int, int]], audio: bool, prefix: str = "") -> bytes:
+    """Master playlist naming each rendition's playlist under ``prefix``."""
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for rendition in ladder:
+        bandwidth = _bits_per_second(rendition.max_bitrate)
+        if audio:
+            bandwidth += _bits_per_second(rendition.audio_bitrate)
+        attributes = f"BANDWIDTH={bandwidth}"
+        if size:
+            attributes += f",RESOLUTION={_scaled_width(size, rendition.height)}x{rendition.height}"
+        lines += [f"#EXT-X-STREAM-INF:{attributes}", f"{prefix}{rendition.name}/{RENDITION_PLAYLIST}"]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def package(video_bytes: bytes, version: str = "") -> Dict[str, bytes]:
+    """
+    HLS files of ``video_bytes`` by path, including :data:`MASTER_PLAYLIST`.
+    With a ``version``, the master playlist names the renditions under
+    ``<version>/``, so it can be served from a stable URL while the files it
+    names are immutable.
+    """
+    with ffmpeg.memfile(video_bytes, "hls_source") as source_fd, \
+            tempfile.TemporaryDirectory(prefix="hls-") as output_dir:
+        source_path = ffmpeg.fd_path(source_fd)
+        info = ffmpeg.probe(source_path, pass_fds=(source_fd,))
+        size = ffmpeg.dimensions(info)
+        audio = _has_audio(info)
+        ladder = _ladder_for(size[1] if size else RENDITIONS[-1].height)
+        for rendition in ladder:
+            os.makedirs(os.path.join(output_dir, rendition.name))
+        ffmpeg.run(
+            _package_args(source_path, output_dir, ladder, audio),
+            timeout=FFMPEG_TIMEOUT_SECONDS,
+            pass_fds=(source_fd,),
+        )
+
+        files = {}
+        for root, _, names in os.walk(output_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, output_dir).replace(os.sep, "/")] = f.read()
+    files[MASTER_PLAYLIST] = master_playlist(ladder, size, audio, f"{version}/" if version else "")
+    logger.info(
+        f"Packaged HLS ladder {', '.join(r.name for r in ladder)}: "
+        f"{len(files)} files, {sum(len(data) for data in files.values())} bytes"
+    )
+    return files
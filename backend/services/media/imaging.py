@@ -0,0 +1,273 @@
+"""
+Pure-PIL image rendering used by the media worker.
+
+Only Pillow is imported here so worker processes start quickly and never
+pull in the model clients. Images cross the process boundary as raw pixel
+buffers (``to_raw`` / ``from_raw``) rather than encoded files.
+"""
+
+import io
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+RawImage = Tuple[str, Tuple[int, int], bytes]
+
+
+def to_raw(image: Image.Image) -> RawImage:
+    """(mode, size, pixels) of ``image``; cheap compared to PNG encoding."""
+    if image.mode not in ("L", "RGB", "RGBA"):
+        # Palette and other modes do not survive a bare pixel buffer
+        image = image.convert("RGBA")
+    return image.mode, image.size, image.tobytes()
+
+
+def from_raw(raw: RawImage) -> Image.Image:
+    mode, size, data = raw
+    return Image.frombytes(mode, tuple(size), data)
+
+
+def to_png(image: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def resize(data: bytes, size: Tuple[int, int], fit: bool = False, format: str = "PNG") -> bytes:
+    """High-quality (LANCZOS) resize of an encoded image."""
+    image = Image.open(io.BytesIO(data))
+    if fit:
+        image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    else:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    if format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buf = io.BytesIO()
+    image.save(buf, format=format)
+    return buf.getvalue()
+
+
+# ---------- YouTube thumbnail ----------
+def compose_thumbnail(product_bytes, bg_img, text):
+    """Centre the product on the background and add the retro headline panel; returns a JPEG buffer."""
+    # Load product
+    product = Image.open(io.BytesIO(product_bytes)).convert("RGBA")
+    
+    # Make product larger and more prominent - center stage
+    max_product_size = (800, 600)  # Increased from 600x600
+    product.thumbnail(max_product_size, Image.Resampling.LANCZOS)
+    product = ImageOps.contain(product, max_product_size)
+    
+    # Calculate center position for the product
+    bg_img = bg_img.convert("RGBA")
+    bg_width, bg_height = bg_img.size
+    product_width, product_height = product.size
+    
+    # Center the product horizontally and position it slightly above center vertically
+    product_x = (bg_width - product_width) // 2
+    product_y = (bg_height - product_height) // 2 - 50  # Slightly above center to leave room for text
+    
+    # Paste product at calculated center position
+    bg_img.paste(product, (product_x, product_y), product)
+
+    # Add retro UI text styling
+    draw = ImageDraw.Draw(bg_img)
+    
+    # Try to load fonts for retro look
+    font_size = 100
+    try:
+        font_options = [
+            "arialbd.ttf",  # Arial Bold
+            "arial.ttf",
+            "C:/Windows/Fonts/arialbd.ttf",
+            "C:/Windows/Fonts/arial.ttf",
+            "/System/Library/Fonts/Arial Bold.ttf",  # macOS
+            "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"  # Linux
+        ]
+        
+        font = None
+        for font_path in font_options:
+            try:
+                font = ImageFont.truetype(font_path, font_size)
+                break
+            except OSError:
+                continue
+                
+        if font is None:
+            font = ImageFont.load_default()
+            
+    except Exception:
+        font = ImageFont.load_default()
+    
+    # Retro text styling - clean and bold
+    text = text.upper()  # All caps for impact
+    
+    # Calculate text position to center it in a "panel"
+    bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    
+    # Position text in a prominent location
+    panel_x = 50
+    panel_y = 500
+    panel_w = text_width + 80
+    panel_h = text_height + 40
+    
+    # Ensure panel fits on screen
+    if panel_x + panel_w > 1280:
+        panel_x = 1280 - panel_w - 20
+    if panel_y + panel_h > 720:
+        panel_y = 720 - panel_h - 20
+    
+    text_x = panel_x + 40
+    text_y = panel_y + 20
+    
+    # Create text panel background (retro UI style)
+    shadow_offset = 8
+    
+    # Draw panel shadow
+    draw.rectangle([
+        panel_x + shadow_offset, panel_y + shadow_offset,
+        panel_x + panel_w + shadow_offset, panel_y + panel_h + shadow_offset
+    ], fill=(0, 0, 0))
+    
+    # Draw panel background (yellow accent color)
+    draw.rectangle([
+        panel_x, panel_y,
+        panel_x + panel_w, panel_y + panel_h
+    ], fill=(255, 219, 51))  # Your app's yellow
+    
+    # Draw panel border
+    draw.rectangle([
+        panel_x, panel_y,
+        panel_x + panel_w, panel_y + panel_h
+    ], outline=(0, 0, 0), width=4)
+    
+    # Draw inner highlight
+    draw.rectangle([
+        panel_x + 4, panel_y + 4,
+        panel_x + panel_w - 4, panel_y + panel_h - 4
+    ], outline=(255, 255, 255), width=2)
+    
+    # Draw the text with retro styling
+    # Text shadow first
+    draw.text(
+        (text_x + 3, text_y + 3),
+        text,
+        font=font,
+        fill=(0, 0, 0)  # Black shadow
+    )
+    
+    # Main text
+    draw.text(
+        (text_x, text_y),
+        text,
+        font=font,
+        fill=(0, 0, 0),  # Black text for readability
+        stroke_width=2,
+        stroke_fill=(255, 255, 255)  # White outline for pop
+    )
+
+    output = io.BytesIO()
+    bg_img.convert("RGB").save(output, format="JPEG", quality=95)
+    output.seek(0)
+    return output
+
+
+# ---------- Comic strip ----------
+def assemble_comic(panels: List[Dict[str, Any]]) -> Image.Image:
+    """Assemble individual panels into a complete comic strip."""
+
+    # Create a 2x2 layout (4 panels) with padding
+    panel_size = 512
+    padding = 20
+    text_height = 60
+
+    total_width = (panel_size * 2) + (padding * 3)
+    total_height = (panel_size * 2) + (padding * 3) + (text_height * 2)
+
+    final_img = Image.new("RGB", (total_width, total_height), "white")
+    draw = ImageDraw.Draw(final_img)
+
+    # Try to load a better font
+    try:
+        font = ImageFont.truetype("arial.ttf", 16)
+        title_font = ImageFont.truetype("arial.ttf", 20)
+    except:
+        font = ImageFont.load_default()
+        title_font = ImageFont.load_default()
+
+    # Panel positions (x, y)
+    positions = [
+        (padding, padding),  # Top left
+        (padding + panel_size + padding, padding),  # Top right
+        (padding, padding + panel_size + text_height + padding),  # Bottom left
+        (
+            padding + panel_size + padding,
+            padding + panel_size + text_height + padding,
+        ),  # Bottom right
+    ]
+
+    for i, panel in enumerate(panels):
+        if i >= 4:  # Safety check
+            break
+
+        img = panel.get("image")
+        if img and isinstance(img, Image.Image):
+            # Resize image to fit panel if needed
+            img = img.resize((panel_size, panel_size), Image.Resampling.LANCZOS)
+            x, y = positions[i]
+
+            # Paste image
+            final_img.paste(img, (x, y))
+
+            # Add border around panel
+            draw.rectangle(
+                [x - 2, y - 2, x + panel_size + 1, y + panel_size + 1],
+                outline="black",
+                width=2,
+            )
+
+            # Add dialogue below panel
+            dialogue = panel.get("dialogue", "")
+            if dialogue:
+                # Word wrap the dialogue
+                wrapped_text = wrap_text(dialogue, font, panel_size - 10)
+
+                text_y = y + panel_size + 5
+                for line in wrapped_text:
+                    draw.text((x + 5, text_y), line, font=font, fill="black")
+                    text_y += 18
+
+    return final_img
+
+
+def wrap_text(
+    text: str, font: ImageFont.ImageFont, max_width: int
+) -> List[str]:
+    """Wrap text to fit within specified width."""
+
+    words = text.split()
+    lines = []
+    current_line = []
+
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1), "white"))
+
+    for word in words:
+        test_line = " ".join(current_line + [word])
+        bbox = draw.textbbox((0, 0), test_line, font=font)
+        text_width = bbox[2] - bbox[0]
+
+        if text_width <= max_width:
+            current_line.append(word)
+        else:
+            if current_line:
+                lines.append(" ".join(current_line))
+                current_line = [word]
+            else:
+                lines.append(word)
+
+    if current_line:
+        lines.append(" ".join(current_line))
+
+    return lines
@@ -0,0 +1,105 @@
+"""
+Media worker jobs.
+
+Every job is a module-level function taking and returning plain data (bytes,
+raw image tuples from :mod:`services.media.imaging`, strings), so it can be
+submitted to :data:`services.media.worker.media_worker` and run in a worker
+process. Heavy dependencies (rembg, the media store) are imported inside the
+job that needs them. Jobs never touch the SQLite database: opening it in a
+worker would re-download the GCS copy over the API process's live file, so
+results go back to the API process, which stores them.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.media import imaging
+from services.media.imaging import RawImage
+
+
+def remove_background(image: bytes, model: Optional[str] = None) -> bytes:
+    """Cut the product out of ``image``; returns a PNG with alpha."""
+    from services.media import background_removal
+    return background_removal.remove(image, model)
+
+
+def remove_backgrounds(images: List[bytes], model: Optional[str] = None) -> List[bytes]:
+    """:func:`remove_background` for several images in one job (one worker round trip)."""
+    from services.media import background_removal
+    return background_removal.remove_many(images, model)
+
+
+def download_background_removal_models() -> None:
+    """Fetch the background removal model files (see REMBG_WARM_UP) without loading them."""
+    from services.media import background_removal
+    background_removal.download()
+
+
+def warm_up_background_removal() -> None:
+    """Load the background removal models of this process (see REMBG_WARM_UP)."""
+    from services.media import background_removal
+    background_removal.warm_up()
+
+
+def compose_thumbnail(product: bytes, background: RawImage, text: str) -> bytes:
+    """JPEG YouTube thumbnail (see :func:`imaging.compose_thumbnail`)."""
+    return imaging.compose_thumbnail(product, imaging.from_raw(background), text).getvalue()
+
+
+def assemble_comic(panels: List[Dict[str, Any]]) -> bytes:
+    """PNG comic strip from panels whose ``image`` is a raw image tuple."""
+    decoded = [
+        {**panel, "image": imaging.from_raw(panel["image"]) if panel.get("image") is not None else None}
+        for panel in panels
+    ]
+    return imaging.to_png(imaging.assemble_comic(decoded))
+
+
+def resize_image(image: bytes, size: Tuple[int, int], fit: bool = False, format: str = "PNG") -> bytes:
+    return imaging.resize(image, size, fit=fit, format=format)
+
+
+def narrate_video_variants(video: bytes, audio: bytes, tags: Optional[List[str]] = None) -> Dict[str, bytes]:
+    """
+    Narrate ``video`` in each aspect-ratio variant ``tags`` (default: all
+    configured, see :mod:`services.media.video`) in one ffmpeg run. Returns
+    the encoded videos by tag; the API process stores them, since worker
+    processes must not write the database.
+    """
+    from services.media import ffmpeg
+    from services.media.video import narrated_variants
+
+    with narrated_variants(video, audio, tags) as output_fds:
+        return {tag: b"".join(ffmpeg.read_chunks(output_fd)) for tag, output_fd in output_fds.items()}
+
+
+def package_hls(uid: int, video: bytes, version: str) -> int:
+    """
+    Package ``video`` as an HLS ladder into the media store under ``version``
+    (see :mod:`services.media.hls`). Returns the number of files stored.
+    """
+    from services.media import hls
+    from services.storage.media_store import media_store
+
+    files = hls.package(video, version)
+    master = files.pop(hls.MASTER_PLAYLIST)
+    for path, data in files.items():
+        media_store.put(hls.NAMESPACE, hls.object_key(uid, version, path), data, hls.content_type(path))
+    # The master last: once it exists, everything it names does too
+    master_key = hls.object_key(uid, version, hls.MASTER_PLAYLIST)
+    media_store.put(hls.NAMESPACE, master_key, master, hls.content_type(hls.MASTER_PLAYLIST))
+    return len(files) + 1
+
+
+def generate_video_previews(uid: int, video: bytes, version: str) -> int:
+    """
+    Render the poster frames and animated preview of ``video`` into the media
+    store under ``version`` (see :mod:`services.media.previews`). Returns the
+    number of files stored.
+    """
+    from services.media import previews
+    from services.storage.media_store import media_store
+
+    files = previews.render(video)
+    for name, data in files.items():
+        media_store.put(previews.NAMESPACE, previews.object_key(uid, version, name), data, previews.FILES[name])
+    return len(files)
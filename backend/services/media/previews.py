@@ -0,0 +1,98 @@
+"""
+Lightweight previews of edited videos for listings.
+
+One ffmpeg run decodes the video once and renders:
+
+- a poster frame, picked by ffmpeg's ``thumbnail`` filter (the frame closest
+  to the average of a window of frames, which skips fades and black frames),
+  as JPEG and WebP;
+- a short, small, low frame-rate animated WebP clip from the same part of
+  the video, which loops in an ``<img>`` tag.
+
+Outputs are in-memory files (see :func:`ffmpeg.memfile`). They are kept in the
+media store under ``video_previews/<uid>/<version>/<name>``, where the version
+is a hash of the edited video, and the current version of each product is
+recorded in ``artifact_hashes`` (artifact "video_preview").
+
+Configuration:
+    VIDEO_PREVIEW_SECONDS: length of the animated preview (default 3)
+    VIDEO_PREVIEW_WIDTH: width of the animated preview (default 320)
+    VIDEO_POSTER_WIDTH: width of the poster frame (default 640)
+"""
+
+import logging
+import os
+from contextlib import ExitStack
+from typing import Dict
+
+from services.media import ffmpeg
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "video_previews"
+ARTIFACT = "video_preview"
+
+PREVIEW_SECONDS = float(os.getenv("VIDEO_PREVIEW_SECONDS", "3"))
+PREVIEW_WIDTH = int(os.getenv("VIDEO_PREVIEW_WIDTH", "320"))
+PREVIEW_FPS = 10
+PREVIEW_QUALITY = 50
+POSTER_WIDTH = int(os.getenv("VIDEO_POSTER_WIDTH", "640"))
+# Frames the thumbnail filter compares before picking one
+POSTER_CANDIDATE_FRAMES = 50
+FFMPEG_TIMEOUT_SECONDS = 120
+
+# File name -> content type of every preview file
+FILES = {
+    "poster.jpg": "image/jpeg",
+    "poster.webp": "image/webp",
+    "preview.webp": "image/webp",
+}
+
+
+def object_key(uid: int, version: str, name: str) -> str:
+    """Media store key of a preview file."""
+    return f"{uid}/{version}/{name}"
+
+
+def _start(duration: float) -> float:
+    # Skip the opening (logos, fade-ins), but keep the clip inside the video
+    return max(0.0, min(duration * 0.2, duration - PREVIEW_SECONDS))
+
+
+def _preview_args(video_path: str, output_paths: Dict[str, str], start: float) -> list:
+    graph = ";".join([
+        f"[0:v]trim=start={start:.3f},setpts=PTS-STARTPTS,split[poster_src][clip_src]",
+        f"[poster_src]thumbnail={POSTER_CANDIDATE_FRAMES},scale={POSTER_WIDTH}:-2,split[jpg][webp]",
+        f"[clip_src]trim=duration={PREVIEW_SECONDS:.3f},fps={PREVIEW_FPS},"
+        f"scale={PREVIEW_WIDTH}:-2:flags=lanczos[clip]",
+    ])
+    return [
+        "-i", video_path,
+        "-filter_complex", graph,
+        "-map", "[jpg]", "-frames:v", "1", "-q:v", "3", "-f", "mjpeg", output_paths["poster.jpg"],
+        "-map", "[webp]", "-frames:v", "1", "-c:v", "libwebp", "-quality", "80",
+        "-f", "webp", output_paths["poster.webp"],
+        "-map", "[clip]", "-an", "-c:v", "libwebp_anim", "-quality", str(PREVIEW_QUALITY),
+        "-loop", "0", "-f", "webp", output_paths["preview.webp"],
+    ]
+
+
+def render(video_bytes: bytes) -> Dict[str, bytes]:
+    """Poster frames and animated preview of ``video_bytes`` by file name (see :data:`FILES`)."""
+    with ExitStack() as stack:
+        video_fd = stack.enter_context(ffmpeg.memfile(video_bytes, "preview_source"))
+        output_fds = {name: stack.enter_context(ffmpeg.memfile(name=name)) for name in FILES}
+        video_path = ffmpeg.fd_path(video_fd)
+        fds = (video_fd, *output_fds.values())
+
+        duration = ffmpeg.duration(ffmpeg.probe(video_path, pass_fds=fds), "video")
+        ffmpeg.run(
+            _preview_args(video_path, {name: ffmpeg.fd_path(fd) for name, fd in output_fds.items()}, _start(duration)),
+            timeout=FFMPEG_TIMEOUT_SECONDS,
+            pass_fds=fds,
+        )
+        files = {name: b"".join(ffmpeg.read_chunks(fd)) for name, fd in output_fds.items()}
+    logger.info(
+        "Rendered video previews: " + ", ".join(f"{name} ({len(data)} bytes)" for name, data in files.items())
+    )
+    return files
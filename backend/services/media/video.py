@@ -0,0 +1,161 @@
+"""
+Video encoding used by the media worker.
+
+A narrated video is the product video, looped or trimmed to the narration
+length, with the narration as its only audio. It is rendered in several
+aspect-ratio variants (:data:`VARIANTS`: landscape for YouTube, portrait for
+Shorts and Reels, square for feeds) by a single ffmpeg run: the source is
+decoded once, a ``split`` filter fans the frames out to one scale-and-crop
+branch per variant, and the variants are encoded side by side. A variant
+whose aspect ratio matches the source is not encoded at all but
+stream-copied (``-c:v copy``), unless the source cannot be copied into an
+MP4: an unsupported codec, a stream that does not start on a keyframe, or a
+copy ffmpeg rejects.
+
+Inputs and outputs are in-memory files (see :func:`ffmpeg.memfile`); nothing
+is written to disk.
+
+Configuration:
+    VIDEO_VARIANTS: comma separated variant tags to render (default: all)
+"""
+
+import logging
+import os
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from services.media import ffmpeg
+
+logger = logging.getLogger(__name__)
+
+AUDIO_BITRATE = "128k"
+# Encoded variants: speed over size, the outputs are short marketing clips
+VIDEO_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p"]
+FFMPEG_TIMEOUT_SECONDS = 600
+
+# Variant tag -> output frame size
+VARIANTS: Dict[str, Tuple[int, int]] = {
+    "16x9": (1280, 720),  # YouTube
+    "9x16": (720, 1280),  # Shorts, Reels
+    "1x1": (1080, 1080),  # Feed posts
+}
+DEFAULT_VARIANT = "16x9"
+VIDEO_VARIANTS = [
+    tag.strip() for tag in os.getenv("VIDEO_VARIANTS", ",".join(VARIANTS)).split(",")
+    if tag.strip() in VARIANTS
+] or [DEFAULT_VARIANT]
+
+
+def derived_version(video_bytes: bytes) -> str:
+    """Version of media derived from an edited video (HLS, previews): a hash of the video."""
+    from services.storage.media_store import content_key
+    return content_key(video_bytes)[:16]
+
+
+def _matches_aspect(size: Optional[Tuple[int, int]], tag: str) -> bool:
+    if size is None:
+        return False
+    width, height = size
+    target_width, target_height = VARIANTS[tag]
+    # Within 1%, so e.g. 854x480 still counts as 16:9
+    return abs(width * target_height - height * target_width) <= 0.01 * height * target_width
+
+
+def _variant_filter(tags: Sequence[str]) -> str:
+    branches = "".join(f"[s{i}]" for i in range(len(tags)))
+    graph = [f"[0:v]split={len(tags)}{branches}"]
+    for i, tag in enumerate(tags):
+        width, height = VARIANTS[tag]
+        # Fill the frame, then centre-crop whatever overflows
+        graph.append(
+            f"[s{i}]scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},setsar=1[v{i}]"
+        )
+    return ";".join(graph)
+
+
+def _narrated_args(
+    video_path: str,
+    audio_path: str,
+    output_paths: Dict[str, str],
+    audio_duration: float,
+    copy_tag: Optional[str],
+) -> List[str]:
+    encoded = [tag for tag in output_paths if tag != copy_tag]
+    # Repeat the video for as long as needed; -t cuts every output at the narration length
+    args = ["-stream_loop", "-1", "-i", video_path, "-i", audio_path]
+    if encoded:
+        args += ["-filter_complex", _variant_filter(encoded)]
+    for tag, output_path in output_paths.items():
+        if tag == copy_tag:
+            args += ["-map", "0:v:0", "-c:v", "copy"]
+        else:
+            args += ["-map", f"[v{encoded.index(tag)}]", *VIDEO_ENCODE_ARGS]
+        args += [
+            "-map", "1:a:0",
+            "-c:a", "aac", "-b:a", AUDIO_BITRATE,
+            "-t", f"{audio_duration:.3f}",
+            # Outputs are in-memory files, so the moov atom can still be moved up front
+            "-movflags", "+faststart",
+            "-f", "mp4", output_path,
+        ]
+    return args
+
+
+@contextmanager
+def narrated_variants(
+    video_bytes: bytes, audio_bytes: bytes, tags: Optional[Sequence[str]] = None
+) -> Iterator[Dict[str, int]]:
+    """
+    Replace the audio of ``video_bytes`` with the MP3 narration ``audio_bytes``,
+    looping or trimming the video to the narration length, in each of the
+    variants ``tags`` (default :data:`VIDEO_VARIANTS`). Yields the file
+    descriptor of each resulting in-memory MP4 by tag.
+    """
+    tags = list(tags or VIDEO_VARIANTS)
+    with ExitStack() as stack:
+        video_fd = stack.enter_context(ffmpeg.memfile(video_bytes, "input_video"))
+        audio_fd = stack.enter_context(ffmpeg.memfile(audio_bytes, "narration"))
+        output_fds = {tag: stack.enter_context(ffmpeg.memfile(name=f"video_{tag}")) for tag in tags}
+        video_path = ffmpeg.fd_path(video_fd)
+        audio_path = ffmpeg.fd_path(audio_fd)
+        output_paths = {tag: ffmpeg.fd_path(fd) for tag, fd in output_fds.items()}
+        fds = (video_fd, audio_fd, *output_fds.values())
+
+        video_info = ffmpeg.probe(video_path, pass_fds=fds)
+        audio_duration = ffmpeg.duration(ffmpeg.probe(audio_path, pass_fds=fds), "audio")
+        codec = ffmpeg.video_codec(video_info)
+        size = ffmpeg.dimensions(video_info)
+        logger.info(
+            f"Original video duration: {ffmpeg.duration(video_info, 'video')}s ({codec}, {size}), "
+            f"Audio duration: {audio_duration}s"
+        )
+
+        copy_tag = next((tag for tag in tags if _matches_aspect(size, tag)), None)
+        if copy_tag and not (codec in ffmpeg.MP4_VIDEO_CODECS and ffmpeg.starts_on_keyframe(video_path, pass_fds=fds)):
+            copy_tag = None
+        if copy_tag:
+            try:
+                ffmpeg.run(
+                    _narrated_args(video_path, audio_path, output_paths, audio_duration, copy_tag),
+                    timeout=FFMPEG_TIMEOUT_SECONDS,
+                    pass_fds=fds,
+                )
+            except ffmpeg.FFmpegError as e:
+                logger.warning(f"Stream copy failed, encoding every variant: {e}")
+                copy_tag = None
+        if not copy_tag:
+            ffmpeg.run(
+                _narrated_args(video_path, audio_path, output_paths, audio_duration, None),
+                timeout=FFMPEG_TIMEOUT_SECONDS,
+                pass_fds=fds,
+            )
+        logger.info(
+            "Narrated video variants: "
+            + ", ".join(
+                f"{tag} {'stream-copied' if tag == copy_tag else 'encoded'} ({ffmpeg.size(fd)} bytes)"
+                for tag, fd in output_fds.items()
+            )
+        )
+        yield output_fds
+
@@ -0,0 +1,336 @@
+"""
+Process-pool media worker for CPU-heavy image and video work.
+
+Background removal, thumbnail/comic compositing, LANCZOS resizes and video
+encodes run in a pool of separate processes instead of the API process, so
+they neither block the event loop nor hold the GIL while requests are served.
+
+.. code-block:: python
+
+    from services.media import jobs
+    from services.media.worker import media_worker
+
+    cutout = await media_worker.arun(jobs.remove_background, product_bytes)
+    cutouts = await media_worker.arun(jobs.remove_backgrounds, [front, side, back])
+    variants = media_worker.run(jobs.narrate_video_variants, video_blob, narration)
+
+Jobs are the module-level functions in :mod:`services.media.jobs`. Byte
+buffers in the arguments and the result (including the pixel buffers of raw
+images) travel through ``multiprocessing.shared_memory`` blocks rather than
+being pickled through the pool's pipe.
+
+Configuration:
+    MEDIA_WORKERS: pool size; 0 runs jobs inline in the calling thread
+        (default: half the CPUs, at least 1)
+    MEDIA_WORKER_MEMORY_MB: memory budget of all running jobs; a job waits
+        until its estimate fits (default 2048)
+    MEDIA_WORKER_NICE: niceness added to worker processes (default 5)
+
+``start()`` at app start-up downloads the background removal model files
+once and then spawns the workers, each of which loads the model(s) from disk
+(see :mod:`services.media.background_removal`). It runs in the background,
+so start-up does not wait for either.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, List, Optional
+
+from services.media import jobs
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.executors import bulkheads
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+MEDIA_WORKER_MEMORY_MB = int(os.getenv("MEDIA_WORKER_MEMORY_MB", "2048"))
+MEDIA_WORKER_NICE = int(os.getenv("MEDIA_WORKER_NICE", "5"))
+
+# Smaller buffers are cheaper to pickle than to map
+SHM_MIN_BYTES = 64 * 1024
+# Decoded frames and intermediate images dwarf the encoded input
+MEMORY_ESTIMATE_FACTOR = 8
+MIN_JOB_ESTIMATE_BYTES = 32 * 1024 * 1024
+
+MEDIA_JOB_DURATION = REGISTRY.histogram(
+    "artisan_media_job_duration_seconds",
+    "Media worker job duration by job and status, including time waiting for memory.",
+    ("job", "status"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+MEDIA_JOBS_WAITING = REGISTRY.gauge(
+    "artisan_media_jobs_waiting",
+    "Media jobs waiting for room in the worker memory budget.",
+)
+MEDIA_MEMORY_RESERVED = REGISTRY.gauge(
+    "artisan_media_memory_reserved_bytes",
+    "Estimated memory reserved by running media jobs.",
+)
+
+
+class _ShmRef:
+    """Pickled in place of a byte buffer that was copied to shared memory."""
+
+    __slots__ = ("name", "size")
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+    def __getstate__(self):
+        return self.name, self.size
+
+    def __setstate__(self, state):
+        self.name, self.size = state
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # Result blocks outlive the worker that created them; the parent unlinks
+    # them, so the (shared) resource tracker must not
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _pack(value, blocks: List[shared_memory.SharedMemory]):
+    """Replace large byte buffers in ``value`` with shared-memory references."""
+    if isinstance(value, (bytes, bytearray, memoryview)) and len(value) >= SHM_MIN_BYTES:
+        shm = shared_memory.SharedMemory(create=True, size=len(value))
+        shm.buf[: len(value)] = value
+        blocks.append(shm)
+        return _ShmRef(shm.name, len(value))
+    if isinstance(value, tuple):
+        return tuple(_pack(item, blocks) for item in value)
+    if isinstance(value, list):
+        return [_pack(item, blocks) for item in value]
+    if isinstance(value, dict):
+        return {key: _pack(item, blocks) for key, item in value.items()}
+    return value
+
+
+def _read(ref: _ShmRef, unlink: bool) -> bytes:
+    shm = shared_memory.SharedMemory(name=ref.name)
+    try:
+        return bytes(shm.buf[: ref.size])
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+
+def _unpack(value, unlink: bool = False):
+    if isinstance(value, _ShmRef):
+        return _read(value, unlink)
+    if isinstance(value, tuple):
+        return tuple(_unpack(item, unlink) for item in value)
+    if isinstance(value, list):
+        return [_unpack(item, unlink) for item in value]
+    if isinstance(value, dict):
+        return {key: _unpack(item, unlink) for key, item in value.items()}
+    return value
+
+
+def _payload_bytes(value) -> int:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(_payload_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_payload_bytes(item) for item in value.values())
+    return 0
+
+
+def _init_worker(nice: int, warm_up: bool) -> None:
+    # Under CPU contention the API process wins
+    try:
+        os.nice(nice)
+    except (AttributeError, OSError):
+        pass
+    # Load the segmentation model now rather than in the first request's job.
+    # Only once its files are on disk: otherwise every worker would download
+    # the same files at once
+    if warm_up:
+        jobs.warm_up_background_removal()
+
+
+def _execute(fn: Callable, args: tuple):
+    """Worker-process entry point: unpack arguments, run the job, pack the result."""
+    blocks: List[shared_memory.SharedMemory] = []
+    result = _pack(fn(*_unpack(args)), blocks)
+    for shm in blocks:
+        # The parent copies the result out and unlinks the block
+        shm.close()
+        _untrack(shm)
+    return result
+
+
+def _free(blocks: List[shared_memory.SharedMemory]) -> None:
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+
+def _discard(future) -> None:
+    """Unlink the result blocks of a job nobody waits for any more."""
+    try:
+        if not future.cancelled() and future.exception() is None:
+            _unpack(future.result(), unlink=True)
+    except Exception:
+        pass
+
+
+class MediaWorker:
+    """Process pool with a memory budget; see the module docstring."""
+
+    def __init__(self, workers: int = MEDIA_WORKERS, memory_mb: int = MEDIA_WORKER_MEMORY_MB):
+        self.workers = workers
+        self.memory_budget = memory_mb * 1024 * 1024
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._memory = threading.Condition()
+        self._reserved = 0
+        self._models_downloaded = threading.Event()
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: never fork the API process with its threads and clients
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(MEDIA_WORKER_NICE, self._models_downloaded.is_set()),
+                )
+            return self._pool
+
+    def _reset_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False)
+
+    def _reserve(self, estimate: int) -> None:
+        with self._memory:
+            MEDIA_JOBS_WAITING.inc()
+            try:
+                # A job larger than the whole budget still runs, alone
+                while self._reserved and self._reserved + estimate > self.memory_budget:
+                    self._memory.wait()
+            finally:
+                MEDIA_JOBS_WAITING.dec()
+            self._reserved += estimate
+            MEDIA_MEMORY_RESERVED.set(self._reserved)
+
+    def _release(self, estimate: int) -> None:
+        with self._memory:
+            self._reserved -= estimate
+            MEDIA_MEMORY_RESERVED.set(self._reserved)
+            self._memory.notify_all()
+
+    def _submit(self, fn: Callable, args: tuple, estimate: int):
+        """
+        Start the job in the pool. Its input blocks and memory reservation are
+        given back when the job is done, not when the caller stops waiting: a
+        job cut by the deadline keeps running, and a queued one has not read
+        its inputs yet.
+        """
+        blocks: List[shared_memory.SharedMemory] = []
+        try:
+            packed = _pack(args, blocks)
+            pool = self._get_pool()
+            try:
+                future = pool.submit(_execute, fn, packed)
+            except BrokenProcessPool:
+                self._reset_pool(pool)
+                pool = self._get_pool()
+                future = pool.submit(_execute, fn, packed)
+        except BaseException:
+            _free(blocks)
+            self._release(estimate)
+            raise
+        future.add_done_callback(lambda _: (_free(blocks), self._release(estimate)))
+        return pool, future
+
+    def _result(self, fn: Callable, pool: ProcessPoolExecutor, future):
+        deadline = current_deadline()
+        try:
+            result = future.result(timeout=None if deadline is None else deadline.remaining())
+        except FutureTimeoutError as e:
+            future.add_done_callback(_discard)
+            deadline.cut(f"media.{fn.__name__}")
+            raise DeadlineExceeded(
+                f"Request deadline of {deadline.seconds:g}s exceeded during media job '{fn.__name__}'"
+            ) from e
+        except BrokenProcessPool:
+            # A crashed worker (e.g. killed for memory) poisons the whole pool
+            logger.error(f"Media worker pool broke while running '{fn.__name__}'; restarting it")
+            self._reset_pool(pool)
+            raise
+        return _unpack(result, unlink=True)
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Run the job ``fn(*args)`` in the pool and return its result (blocking)."""
+        estimate = max(MIN_JOB_ESTIMATE_BYTES, _payload_bytes(args) * MEMORY_ESTIMATE_FACTOR)
+        start = time.perf_counter()
+        status = "error"
+        self._reserve(estimate)
+        try:
+            if self.workers <= 0:
+                try:
+                    result = fn(*args)
+                finally:
+                    self._release(estimate)
+            else:
+                result = self._result(fn, *self._submit(fn, args, estimate))
+            status = "ok"
+            return result
+        finally:
+            MEDIA_JOB_DURATION.observe(time.perf_counter() - start, job=fn.__name__, status=status)
+
+    async def arun(self, fn: Callable, *args) -> Any:
+        """:meth:`run` without blocking the event loop."""
+        return await bulkheads.run("media", self.run, fn, *args)
+
+    async def start(self) -> None:
+        """Download the models and spawn (and warm up) the workers in the background."""
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self) -> None:
+        try:
+            if self.workers <= 0:
+                await asyncio.to_thread(jobs.warm_up_background_removal)
+                return
+            # Once, in this process, before any worker loads them
+            await asyncio.to_thread(jobs.download_background_removal_models)
+            self._models_downloaded.set()
+            pool = self._get_pool()
+            await asyncio.gather(
+                *(asyncio.wrap_future(pool.submit(os.getpid)) for _ in range(self.workers))
+            )
+            logger.info(f"Media worker pool started with {self.workers} processes")
+        except Exception as e:
+            # Jobs still spawn the pool and load the models on first use
+            logger.warning(f"Media worker warm-up failed: {e}")
+
+    async def shutdown(self) -> None:
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+
+media_worker = MediaWorker()
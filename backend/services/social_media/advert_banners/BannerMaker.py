@@ -8,6 +8,9 @@ import logging
 
 from google import genai
 from dotenv import load_dotenv
+from utils.metrics import track_external
+from utils.rate_limiter import ai_rate_limiter
+from utils.resilience import get_dependency
 
 load_dotenv()
 LOG = logging.getLogger("banner_maker")
@@ -54,41 +57,46 @@ class GenAIImageAPI:
         add_watermark: bool = False,
     ) -> Image.Image:
         """Generate image using latest Gemini model"""
-        try:
-            # Enhance prompt with size specifications
-            enhanced_prompt = f"{prompt}. High resolution, professional quality, {width}x{height} dimensions."
-            
-            contents = [enhanced_prompt]
-            
-            # Add reference image if provided
-            if img_bytes:
-                ref_image = Image.open(io.BytesIO(img_bytes))
-                contents.append(ref_image)
-                enhanced_prompt = f"Based on the provided reference image, {enhanced_prompt}"
-                contents[0] = enhanced_prompt
+        # Enhance prompt with size specifications
+        enhanced_prompt = f"{prompt}. High resolution, professional quality, {width}x{height} dimensions."
+
+        contents = [enhanced_prompt]
+
+        # Add reference image if provided
+        if img_bytes:
+            ref_image = Image.open(io.BytesIO(img_bytes))
+            contents.append(ref_image)
+            enhanced_prompt = f"Based on the provided reference image, {enhanced_prompt}"
+            contents[0] = enhanced_prompt
+
+        # An open circuit (Gemini failing or too slow) goes straight to the
+        # local fallback instead of waiting out another timeout.
+        return get_dependency("gemini_image").call(
+            self._generate_remote,
+            contents,
+            width,
+            height,
+            fallback=lambda: self._create_magazine_fallback(width, height),
+        )
 
+    def _generate_remote(self, contents: list, width: int, height: int) -> Image.Image:
+        with ai_rate_limiter.acquire_sync(self.model), track_external("gemini", "image_generation"):
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=contents,
             )
 
-            # Extract generated image from response
-            for part in response.candidates[0].content.parts:
-                if part.inline_data is not None:
-                    generated_image = Image.open(io.BytesIO(part.inline_data.data))
-                    # Resize to exact dimensions if needed
-                    if generated_image.size != (width, height):
-                        generated_image = ImageOps.fit(generated_image, (width, height))
-                    return generated_image
-
-            # If no image found in response, create fallback
-            LOG.warning("No image found in Gemini response, using fallback")
-            return self._create_magazine_fallback(width, height)
+        # Extract generated image from response
+        for part in response.candidates[0].content.parts:
+            if part.inline_data is not None:
+                generated_image = Image.open(io.BytesIO(part.inline_data.data))
+                # Resize to exact dimensions if needed
+                if generated_image.size != (width, height):
+                    generated_image = ImageOps.fit(generated_image, (width, height))
+                return generated_image
 
-        except Exception as e:
-            LOG.error(f"Error generating image with Gemini model: {e}")
-            fallback = self._create_magazine_fallback(width, height)
-            return fallback
+        # No image in the response counts as a failed call for the breaker
+        raise ValueError("No image found in Gemini response")
 
     def _create_magazine_fallback(self, width: int, height: int) -> Image.Image:
         """Create an elegant magazine-style fallback background"""
@@ -145,10 +153,47 @@ class MagazineBannerMaker:
     def generate_thumbnail_for_product(
         self,
         product: ProductSpec,
+        prompt: Optional[str] = None,
     ):
-        final_prompt = self._youtube_prompt(product=product)
+        final_prompt = prompt or self._youtube_prompt(product=product)
         bg=self.generator.generate(final_prompt, 1280, 720, product.product_image_bytes)
         return bg
+    def generate_draft_banner(self, product: ProductSpec, banner_spec: BannerSpec) -> Image.Image:
+        """Instant local banner (no model call): fallback background, product photo, title and price."""
+        width, height = banner_spec.size
+        pad = banner_spec.padding
+        bg = self.generator._create_magazine_fallback(width, height)
+
+        if product.product_image_bytes:
+            photo = Image.open(io.BytesIO(product.product_image_bytes)).convert("RGB")
+            photo = ImageOps.contain(photo, (width // 2 - pad, height - 2 * pad))
+            bg.paste(photo, (width - photo.width - pad, (height - photo.height) // 2))
+
+        draw = ImageDraw.Draw(bg)
+        try:
+            title_font = ImageFont.truetype("arial.ttf", 44)
+            price_font = ImageFont.truetype("arial.ttf", 32)
+        except OSError:
+            title_font = price_font = ImageFont.load_default()
+
+        # Greedy word wrap of the title into the left half
+        lines, line = [], ""
+        for word in product.title.split():
+            candidate = f"{line} {word}".strip()
+            if draw.textlength(candidate, font=title_font) <= width // 2 - 2 * pad:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+
+        y = height // 3
+        for text in filter(None, lines[:4]):
+            draw.text((pad, y), text, font=title_font, fill=(20, 20, 20))
+            y += 54
+        if product.price:
+            draw.text((pad, y + 20), f"{product.currency or ''}{product.price}", font=price_font, fill=(120, 60, 20))
+        return bg
     def _magazine_prompt(self, product: ProductSpec, spec: BannerSpec) -> str:
         """Create a premium editorial magazine background prompt"""
         return (
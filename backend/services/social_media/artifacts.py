@@ -0,0 +1,106 @@
+"""
+Input-hash versioning for generated marketing artifacts.
+
+Every generated artifact (banner, thumbnail, comic, email, video, and the
+text assets they are written from) is stored together with a hash of the
+inputs that produced it: product description, story, price,
+origin/style/artist, the product image (or source video) and the artifact's
+prompt version. A request serves the stored artifact while the hash
+still matches and regenerates only when an input changed or the caller asks
+for a refresh.
+
+.. code-block:: python
+
+    digest = artifacts.input_hash(uid, "comic")
+    if artifacts.is_fresh(uid, "comic", digest, refresh):
+        return storage.get_comics(uid)
+    ...generate and store...
+    artifacts.mark(uid, "comic", digest)
+
+Bump an entry in ``PROMPT_VERSIONS`` when a prompt or renderer changes in a
+way that should invalidate the artifacts already stored.
+"""
+
+import hashlib
+import json
+import logging
+
+from services.storage import storage
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VERSIONS = {
+    "banner": 1,
+    "thumbnail": 1,
+    "comic": 1,
+    "email": 1,
+    "video": 1,
+    "text_assets": 1,
+}
+
+ARTIFACT_CACHE_REQUESTS = REGISTRY.counter(
+    "artisan_artifact_cache_requests_total",
+    "Artifact lookups by artifact and result (hit, miss, refresh).",
+    ("artifact", "result"),
+)
+
+
+def _sha256(value) -> str:
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return hashlib.sha256(value or b"").hexdigest()
+
+
+def _product_inputs(uid: int) -> dict:
+    history = storage.get_history(uid)
+    artisan_inputs = storage.get_artisan_inputs(uid)
+    origin = storage.get_product_origin(uid)
+    style = storage.get_product_style(uid)
+    artist = storage.get_product_predicted_artist(uid)
+    return {
+        "history": history[1] if history else None,
+        "description": artisan_inputs["product_description"] if artisan_inputs else None,
+        "story": storage.get_story(uid),
+        "price": storage.get_recommended_price(uid),
+        "origin": origin["origin"] if origin else None,
+        "style": style["style"] if style else None,
+        "artist": artist["predicted_artist"] if artist else None,
+    }
+
+
+def input_hash(uid: int, artifact: str) -> str:
+    """Hash of everything that determines ``artifact`` for ``uid``."""
+    inputs = _product_inputs(uid)
+    inputs["prompt_version"] = PROMPT_VERSIONS[artifact]
+    if artifact == "video":
+        inputs["media"] = [_sha256(video["video"]) for video in storage.get_video(uid)]
+    else:
+        inputs["media"] = [_sha256(image["image"]) for image in storage.get_input_images(uid)]
+    return _sha256(json.dumps(inputs, sort_keys=True, default=str))
+
+
+def is_fresh(uid: int, artifact: str, digest: str, refresh: bool = False) -> bool:
+    """
+    Whether the stored ``artifact`` was produced from inputs hashing to
+    ``digest``. Fast-preview drafts are never fresh.
+    """
+    if refresh:
+        ARTIFACT_CACHE_REQUESTS.inc(artifact=artifact, result="refresh")
+        return False
+    version = storage.get_asset_versions(uid).get(artifact)
+    fresh = (
+        storage.get_artifact_hash(uid, artifact) == digest
+        and not (version is not None and version["quality"] == "draft")
+    )
+    ARTIFACT_CACHE_REQUESTS.inc(artifact=artifact, result="hit" if fresh else "miss")
+    return fresh
+
+
+def mark(uid: int, artifact: str, digest: str) -> None:
+    """Record that the stored ``artifact`` was generated from ``digest``."""
+    try:
+        storage.store_artifact_hash(uid, artifact, digest)
+    except Exception as e:
+        # Only costs a regeneration next time
+        logger.warning(f"Failed to record input hash of {artifact} for uid={uid}: {e}")
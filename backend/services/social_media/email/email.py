@@ -1,7 +1,6 @@
 import io
 import json
 import os
-import re
 import logging
 from typing import List, Dict, Any, Optional
 from PIL import Image, ImageDraw, ImageFont
@@ -16,6 +15,9 @@ import os
 
 
 import services.storage.storage as storage
+from services.social_media import text_assets
+from services.social_media.schemas import EmailCopy
+from utils.structured_output import generate_structured
 
 
 
@@ -38,9 +40,11 @@ except Exception as e:
     logger.error(f"Failed to initialize AI Platform: {e}")
     raise
 
+STORY_MODEL_NAME = "gemini-2.0-flash-exp"
+
 # Load models with error handling
 try:
-    story_model = GenerativeModel("gemini-2.0-flash-exp")  # Updated model name
+    story_model = GenerativeModel(STORY_MODEL_NAME)  # Updated model name
     image_model = ImageGenerationModel.from_pretrained(
         "imagen-3.0-fast-generate-001"
     )  # Updated version
@@ -52,13 +56,41 @@ except Exception as e:
 
 
 
-def generate_emails(uid: int) -> str:
-    """
-    Generate a neobrutalism-themed HTML marketing email for the given product.
-    Uses product description, story, and metadata to generate copy.
-    Plugs in product images and pricing details.
-    """
+def _generate_email_copy(description, story, product_origin, product_style, product_predicted_artist, price):
+    """Generate headline / subheadline / body / CTA with a dedicated LLM call."""
+    # 🔹 Generate marketing copy from LLM
+    prompt = (
+        f"You are a marketing copywriter. Write a persuasive, fun, and engaging "
+        f"marketing email for the following artisan product.\n\n"
+        f"Product Description: {description}\n"
+        f"Story Behind the Product: {story}\n"
+        f"Origin: {product_origin}\n"
+        f"Style: {product_style}\n"
+        f"Predicted Artist Inspiration: {product_predicted_artist}\n"
+        f"Recommended Price: {price}\n\n"
+        "Make it suitable for a neobrutalism-styled email. "
+        "The body should be the main persuasive content, not just repeat the headline."
+    )
+
+    try:
+        copy = generate_structured(
+            story_model,
+            STORY_MODEL_NAME,
+            prompt,
+            EmailCopy,
+            operation="email_copy",
+            cache_namespace="email_copy",
+        )
+        logger.info(f"Generated email copy: {copy.headline}")
+    except Exception as e:
+        logger.error(f"Email generation failed: {e}")
+        raise
 
+    return copy.headline, copy.subheadline, copy.body, copy.cta
+
+
+def _email_context(uid: int) -> dict:
+    """Product data and image placeholders shared by the AI and draft emails."""
     fetched_images=storage.get_output_images(uid)
 
     just_images = []
@@ -66,15 +98,6 @@ def generate_emails(uid: int) -> str:
     for image in fetched_images:
         just_images.append(image["image"])
 
-
-    # 🔹 Fetch product data
-    description = storage.get_artisan_inputs(uid)["product_description"]
-    story = storage.get_story(uid)
-    price = storage.get_recommended_price(uid)
-    product_origin = storage.get_product_origin(uid)["origin"]
-    product_style = storage.get_product_style(uid)["style"]
-    product_predicted_artist = storage.get_product_predicted_artist(uid)["predicted_artist"]
-    
     # 🔹 Use simple placeholder images to avoid "Request Header Fields Too Large" error
     # This prevents the HTTP 431 error by not embedding large base64 data
     placeholder_images = []
@@ -82,61 +105,48 @@ def generate_emails(uid: int) -> str:
         # Use a simple data URI with a small placeholder
         placeholder_images.append("data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMzAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMzAwIiBoZWlnaHQ9IjIwMCIgZmlsbD0iI0ZGNkIzNSIvPjx0ZXh0IHg9IjUwJSIgeT0iNTAlIiBmb250LWZhbWlseT0iQXJpYWwiIGZvbnQtc2l6ZT0iMTQiIGZpbGw9IndoaXRlIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSI+UHJvZHVjdCBJbWFnZSB7aSsxfTwvdGV4dD48L3N2Zz4=")
 
-    # 🔹 Generate marketing copy from LLM
-    try:
-        response = story_model.generate_content(
-            (
-                f"You are a marketing copywriter. Write a persuasive, fun, and engaging "
-                f"marketing email for the following artisan product.\n\n"
-                f"Product Description: {description}\n"
-                f"Story Behind the Product: {story}\n"
-                f"Origin: {product_origin}\n"
-                f"Style: {product_style}\n"
-                f"Predicted Artist Inspiration: {product_predicted_artist}\n"
-                f"Recommended Price: {price}\n\n"
-                "Format your response EXACTLY like this:\n"
-                "HEADLINE: [Your compelling headline here]\n"
-                "SUBHEADLINE: [Your subheadline here]\n"
-                "BODY: [Your main email body content here - this should be the main persuasive text]\n"
-                "CTA: [Your call to action here]\n\n"
-                "Make it suitable for a neobrutalism-styled email. "
-                "The BODY should be the main persuasive content, not just repeat the headline."
-            )
-        )
-        email_text = response.candidates[0].content.parts[0].text
-        logger.info(f"Raw LLM response: {email_text[:200]}...")
-    except Exception as e:
-        logger.error(f"Email generation failed: {e}")
-        raise
+    # 🔹 Fetch product data
+    return {
+        "description": storage.get_artisan_inputs(uid)["product_description"],
+        "story": storage.get_story(uid),
+        "price": storage.get_recommended_price(uid),
+        "product_origin": storage.get_product_origin(uid)["origin"],
+        "product_style": storage.get_product_style(uid)["style"],
+        "product_predicted_artist": storage.get_product_predicted_artist(uid)["predicted_artist"],
+        "images": placeholder_images,
+    }
+
+
+def _render(context: dict, headline, subheadline, body, cta) -> str:
+    return render_email_html(
+        headline, subheadline, body, cta,
+        context["product_origin"], context["product_style"], context["product_predicted_artist"],
+        context["price"], context["images"],
+    )
 
-    # 🔹 Default values
-    headline = "Discover Something Bold!"
-    subheadline = ""
-    body = email_text
-    cta = f"Buy Now for {price}" if price else "Shop Now"
-
-    # Try parsing structured fields if model provided them
-    headline_match = re.search(r"HEADLINE:\s*(.*?)(?:\n|$)", email_text, re.IGNORECASE | re.DOTALL)
-    if headline_match:
-        headline = headline_match.group(1).strip()
-
-    subheadline_match = re.search(r"SUBHEADLINE:\s*(.*?)(?:\n|$)", email_text, re.IGNORECASE | re.DOTALL)
-    if subheadline_match:
-        subheadline = subheadline_match.group(1).strip()
-
-    # Extract body content - look for BODY: section
-    body_match = re.search(r"BODY:\s*(.*?)(?:\nCTA:|$)", email_text, re.IGNORECASE | re.DOTALL)
-    if body_match:
-        body = body_match.group(1).strip()
-    else:
-        # If no BODY section found, try to extract content between subheadline and CTA
-        body_match = re.search(r"SUBHEADLINE:\s*.*?\n(.*?)(?:\nCTA:|$)", email_text, re.IGNORECASE | re.DOTALL)
-        if body_match:
-            body = body_match.group(1).strip()
 
-    cta_match = re.search(r"CTA:\s*(.*?)(?:\n|$)", email_text, re.IGNORECASE | re.DOTALL)
-    if cta_match:
-        cta = cta_match.group(1).strip()
+def generate_emails(uid: int) -> str:
+    """
+    Generate a neobrutalism-themed HTML marketing email for the given product.
+    Uses product description, story, and metadata to generate copy.
+    Plugs in product images and pricing details.
+    """
+    context = _email_context(uid)
+
+    # 🔹 Marketing copy: from the combined text assets when available,
+    # otherwise a dedicated LLM call
+    assets = text_assets.get_text_assets(uid)
+    if assets:
+        copy = assets["email"]
+        headline = copy["headline"]
+        subheadline = copy["subheadline"]
+        body = copy["body"]
+        cta = copy["cta"]
+    else:
+        headline, subheadline, body, cta = _generate_email_copy(
+            context["description"], context["story"], context["product_origin"],
+            context["product_style"], context["product_predicted_artist"], context["price"],
+        )
 
     # Debug logging
     logger.info(f"Parsed headline: {headline}")
@@ -144,6 +154,33 @@ def generate_emails(uid: int) -> str:
     logger.info(f"Parsed body: {body[:100]}...")
     logger.info(f"Parsed CTA: {cta}")
 
+    return _render(context, headline, subheadline, body, cta)
+
+
+def generate_draft_email(uid: int) -> str:
+    """
+    Render the email instantly without an LLM call, for fast previews.
+    Uses stored text assets if they already exist, otherwise copy built
+    from the product data.
+    """
+    context = _email_context(uid)
+
+    assets = text_assets.get_text_assets(uid, generate=False)
+    if assets:
+        copy = assets["email"]
+        return _render(context, copy["headline"], copy["subheadline"], copy["body"], copy["cta"])
+
+    return _render(
+        context,
+        f"{context['product_style']} by {context['product_predicted_artist']}",
+        f"Handcrafted in {context['product_origin']}",
+        context["story"] or context["description"],
+        "Shop Now",
+    )
+
+
+def render_email_html(headline, subheadline, body, cta, product_origin, product_style, product_predicted_artist, price, images) -> str:
+    """Render the marketing copy and product details into the neobrutalism HTML email."""
     # 🔹 Neobrutalism HTML Template
     html = f"""
     <!DOCTYPE html>
@@ -232,7 +269,7 @@ def generate_emails(uid: int) -> str:
             </div>
 
             <div class="images">
-                {"".join(f'<img src="{img}" alt="Product Image" />' for img in placeholder_images)}
+                {"".join(f'<img src="{img}" alt="Product Image" />' for img in images)}
             </div>
             <a href="#" class="cta">{cta}</a>
         </div>
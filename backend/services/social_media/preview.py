@@ -0,0 +1,148 @@
+"""
+Fast-preview drafts of the marketing assets.
+
+``create_preview`` renders a banner, thumbnail, comic and email for a product
+using only the local renderers (magazine fallback background, retro thumbnail
+background, placeholder comic panels, the HTML email template). No model is
+called, so the drafts are ready in well under a second. They are stored like
+the real assets and recorded in ``asset_versions`` with quality "draft".
+
+The AI versions are generated afterwards (see ``/social_media/preview``) and
+overwrite the drafts in storage, each bumping the asset's version with quality
+"ai"; clients poll ``/social_media/asset-versions/{uid}`` to know when to
+refetch an asset.
+"""
+
+import base64
+import io
+import logging
+from typing import Any, Dict, Optional
+
+from services.social_media import text_assets
+from services.social_media.advert_banners.BannerMaker import BannerSpec, ProductSpec, maker
+from services.social_media.comics import comic
+from services.social_media.email import email
+from services.social_media.youtube.editor.thumbnail_maker import (
+    compose_thumbnail,
+    create_fallback_background,
+)
+from services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_ASSETS = ("banner", "thumbnail", "comic", "email")
+BANNER_SIZE = (1200, 628)
+
+
+def product_spec(uid: int) -> ProductSpec:
+    """Product details shared by every asset generator."""
+    title = (
+        storage.get_product_style(uid)["style"]
+        + " by "
+        + storage.get_product_predicted_artist(uid)["predicted_artist"]
+    )
+    description = storage.get_history(uid)[1]
+    artisan_inputs = storage.get_artisan_inputs(uid)
+    if artisan_inputs is not None:
+        description += artisan_inputs["product_description"]
+
+    return ProductSpec(
+        id=str(uid),
+        title=title,
+        description=description,
+        price=str(storage.get_recommended_price(uid)),
+        currency="₹",
+        product_image_bytes=base64.b64decode(storage.get_input_images(uid)[0]["image"]),
+    )
+
+
+def _png(image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_draft_banner(product: ProductSpec) -> bytes:
+    return _png(maker.generate_draft_banner(product, BannerSpec(size=BANNER_SIZE)))
+
+
+def render_draft_thumbnail(product: ProductSpec, assets: Optional[Dict[str, Any]]) -> bytes:
+    headline = assets["thumbnail_headline"] if assets else product.title
+    return compose_thumbnail(
+        product.product_image_bytes, create_fallback_background([]), headline
+    ).getvalue()
+
+
+def render_draft_comic(product: ProductSpec, assets: Optional[Dict[str, Any]]) -> bytes:
+    story_data = {"panels": assets["comic_panels"]} if assets else None
+    return comic.create_draft_comic(product.title, product.description, story_data).getvalue()
+
+
+def _store(uid: int, asset: str, product: ProductSpec, data) -> None:
+    if asset == "banner":
+        storage.store_ad_image(uid, data)
+    elif asset == "thumbnail":
+        storage.store_youtube_thumbnail_image(uid, data)
+    elif asset == "comic":
+        storage.store_product_comics(uid, data)
+    elif asset == "email":
+        storage.store_generated_email(uid, product.title, data)
+
+
+def _stored(uid: int, asset: str) -> Optional[str]:
+    """Stored asset as base64 (images) or HTML (email)."""
+    if asset == "banner":
+        entry = storage.get_ad_banner(uid)
+    elif asset == "thumbnail":
+        entry = storage.get_youtube_thumbnail_image(uid)
+    elif asset == "comic":
+        entry = storage.get_comics(uid)
+    else:
+        entry = storage.get_generated_email(uid)
+        return entry["content"] if entry else None
+    return entry["image"] if entry else None
+
+
+def store_asset(uid: int, asset: str, data, quality: str, product: Optional[ProductSpec] = None) -> int:
+    """Store an asset version and bump its version number; returns the new version."""
+    _store(uid, asset, product or product_spec(uid), data)
+    return storage.bump_asset_version(uid, asset, quality)
+
+
+def create_preview(uid: int) -> Dict[str, Any]:
+    """
+    Render, store and return draft versions of every asset that has no AI
+    version yet. Assets already upgraded are returned as stored.
+    """
+    product = product_spec(uid)
+    # Only already stored assets; a preview never waits on generation
+    assets = text_assets.get_text_assets(uid, generate=False)
+    renderers = {
+        "banner": lambda: render_draft_banner(product),
+        "thumbnail": lambda: render_draft_thumbnail(product, assets),
+        "comic": lambda: render_draft_comic(product, assets),
+        "email": lambda: email.generate_draft_email(uid),
+    }
+
+    versions = storage.get_asset_versions(uid)
+    result = {}
+    for asset in PREVIEW_ASSETS:
+        current = versions.get(asset)
+        if current and current["quality"] == "ai":
+            result[asset] = {
+                "version": current["version"],
+                "quality": "ai",
+                "data": _stored(uid, asset),
+            }
+            continue
+
+        data = renderers[asset]()
+        version = store_asset(uid, asset, data, "draft", product)
+        result[asset] = {
+            "version": version,
+            "quality": "draft",
+            "data": data if asset == "email" else base64.b64encode(data).decode("utf-8"),
+        }
+
+    logger.info(f"Preview drafts for uid={uid}: {[a for a in result if result[a]['quality'] == 'draft']}")
+    return {"uid": uid, "assets": result}
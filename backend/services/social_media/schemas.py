@@ -0,0 +1,34 @@
+"""Structured-output schemas for the social media text generators."""
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class ComicPanel(BaseModel):
+    panel_number: int
+    description: str = Field(..., description="Detailed visual description for comic book style image generation")
+    dialogue: str = Field(..., description="Short dialogue or caption text, under 15 words")
+
+
+class ComicStory(BaseModel):
+    panels: List[ComicPanel] = Field(..., min_length=4, max_length=4)
+
+
+class EmailCopy(BaseModel):
+    headline: str = Field(..., description="Compelling email headline")
+    subheadline: str = Field(..., description="Email subheadline")
+    body: str = Field(..., description="Main persuasive email body, not a repeat of the headline")
+    cta: str = Field(..., description="Call to action")
+
+
+class TextAssets(BaseModel):
+    thumbnail_headline: str = Field(..., description="Short, viral, clickable YouTube thumbnail title, max 4 words")
+    thumbnail_prompt: str = Field(
+        ..., description="Image generation prompt for an eye-catching, modern YouTube thumbnail of the product"
+    )
+    banner_prompt: str = Field(
+        ..., description="Image generation prompt for a luxury editorial magazine advertisement background"
+    )
+    comic_panels: List[ComicPanel] = Field(..., min_length=4, max_length=4)
+    email: EmailCopy
@@ -103,7 +103,7 @@ class YoutubeClient:
             with open(tmp_img_path, "rb") as f:
                 upload_file = StarletteUploadFile(filename="from_base64.png", file=f)
                 thumbnail_path = await thumbnail_maker.generate_thumbnail_file(
-                    upload_file, description
+                    upload_file, description, uid
                 )
             
             # --- Upload thumbnail ---
@@ -0,0 +1,116 @@
+"""
+Combined text asset generation.
+
+The thumbnail headline, banner and thumbnail image prompts, the 4-panel comic
+script and the marketing email copy all share the same product context. They
+are generated together in one structured Gemini call (``TextAssets`` schema),
+stored in the ``text_assets`` table and read back by each asset generator.
+Like the artifacts built from them, they are versioned by a hash of the
+product inputs (see :mod:`services.social_media.artifacts`): once the
+description, story or price changes, they are written again. Generators fall
+back to their own prompts when no assets are available.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from vertexai.generative_models import GenerativeModel
+
+from services.social_media import artifacts
+from services.social_media.schemas import TextAssets
+from services.storage import storage
+from utils.structured_output import generate_structured
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-2.5-flash"
+ARTIFACT = "text_assets"
+
+GENERATION_CONFIG = {"temperature": 0.7, "max_output_tokens": 4096}
+
+model = GenerativeModel(MODEL_NAME)
+
+
+def _product_context(uid: int) -> Dict[str, Any]:
+    style = storage.get_product_style(uid)
+    artist = storage.get_product_predicted_artist(uid)
+    origin = storage.get_product_origin(uid)
+    history = storage.get_history(uid)
+    inputs = storage.get_artisan_inputs(uid)
+
+    description = history[1] if history else ""
+    if inputs is not None:
+        description += inputs["product_description"]
+
+    return {
+        "title": f"{style['style']} by {artist['predicted_artist']}" if style and artist else "",
+        "description": description,
+        "story": storage.get_story(uid) or "",
+        "origin": origin["origin"] if origin else "",
+        "style": style["style"] if style else "",
+        "predicted_artist": artist["predicted_artist"] if artist else "",
+        "price": storage.get_recommended_price(uid),
+    }
+
+
+def _build_prompt(context: Dict[str, Any]) -> str:
+    return (
+        "You are the creative team for an Indian artisan marketplace. Using the product "
+        "details below, write every text asset for this product's marketing kit.\n\n"
+        f"Product: {context['title']}\n"
+        f"Product Description: {context['description']}\n"
+        f"Story Behind the Product: {context['story']}\n"
+        f"Origin: {context['origin']}\n"
+        f"Style: {context['style']}\n"
+        f"Predicted Artist Inspiration: {context['predicted_artist']}\n"
+        f"Recommended Price: ₹{context['price']}\n\n"
+        "Assets:\n"
+        "- thumbnail_headline: a SHORT, viral, clickable YouTube thumbnail title (max 4 words).\n"
+        "- thumbnail_prompt: an image prompt for a modern, eye-catching YouTube thumbnail built around "
+        "the product photo, with text describing the product and its price.\n"
+        "- banner_prompt: an image prompt for a sophisticated magazine advertisement background inspired "
+        "by luxury lifestyle publications (Vogue, Harper's Bazaar, Architectural Digest), including short "
+        "undistorted text about the product and its price.\n"
+        "- comic_panels: a 4-panel comic story featuring the product; each panel has a vivid visual "
+        "description for comic book style illustration and concise dialogue (under 15 words).\n"
+        "- email: a persuasive, fun, and engaging neobrutalism-styled marketing email with headline, "
+        "subheadline, body (the main persuasive content, not a repeat of the headline) and call to action."
+    )
+
+
+def generate_text_assets(uid: int, digest: Optional[str] = None) -> Dict[str, Any]:
+    """Generate all text assets for ``uid`` in one structured call and store them."""
+    digest = digest or artifacts.input_hash(uid, ARTIFACT)
+    prompt = _build_prompt(_product_context(uid))
+    assets = generate_structured(
+        model,
+        MODEL_NAME,
+        prompt,
+        TextAssets,
+        operation="text_assets",
+        generation_config=GENERATION_CONFIG,
+        cache_namespace="text_assets",
+    ).model_dump()
+    storage.store_text_assets(uid, assets, MODEL_NAME)
+    artifacts.mark(uid, ARTIFACT, digest)
+    logger.info(f"Stored text assets for uid={uid}")
+    return assets
+
+
+def get_text_assets(uid: int, generate: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Stored text assets for ``uid``, generating them on first use and again
+    whenever the product inputs changed.
+
+    Returns None if they are unavailable (or stale and ``generate`` is off),
+    in which case callers use their own per-asset prompts.
+    """
+    try:
+        digest = artifacts.input_hash(uid, ARTIFACT)
+        assets = storage.get_text_assets(uid) if artifacts.is_fresh(uid, ARTIFACT, digest) else None
+        if assets is None and generate:
+            assets = generate_text_assets(uid, digest)
+        return assets
+    except Exception as e:
+        logger.warning(f"Text assets unavailable for uid={uid}, using per-asset generation: {e}")
+        return None
@@ -8,6 +8,7 @@ import os
 load_dotenv()
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from utils.metrics import track_external
 # from oauth2client.client import flow_from_clientsecrets
 # from oauth2client.file import Storage
 # from oauth2client.tools import run_flow
@@ -82,10 +83,11 @@ def upload_thumbnail(video_id: str, file_path: str):
     youtube = get_authenticated_service()
 
     try:
-        response = youtube.thumbnails().set(
-            videoId=video_id,
-            media_body=file_path,
-        ).execute()
+        with track_external("youtube", "upload_thumbnail"):
+            response = youtube.thumbnails().set(
+                videoId=video_id,
+                media_body=file_path,
+            ).execute()
 
         print("✅ Thumbnail successfully set.")
         return response
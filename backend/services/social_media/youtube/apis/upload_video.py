@@ -16,6 +16,7 @@ from google.auth.transport.requests import Request
 httplib2.RETRIES = 1
 from dotenv import load_dotenv
 import os
+from utils.metrics import track_external
 
 load_dotenv()
 MAX_RETRIES = 10
@@ -135,4 +136,5 @@ def upload_video(file, title="Test Title",
         media_body=MediaFileUpload(file, chunksize=-1, resumable=True),
     )
 
-    return resumable_upload(insert_request)
+    with track_external("youtube", "upload_video"):
+        return resumable_upload(insert_request)
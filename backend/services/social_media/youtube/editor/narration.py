@@ -0,0 +1,224 @@
+"""
+Marketing narration synthesis: chunked, parallel and cached.
+
+A narration is a fixed intro, the product story and a fixed outro. The story
+is split on sentence boundaries into SSML chunks under the per-request size
+limit of Cloud Text-to-Speech; all chunks are synthesized concurrently (on
+the "ai" executor, paced by the shared rate limiter) as LINEAR16 PCM, joined
+sample for sample and encoded to MP3 once, so there are no encoder gaps at
+chunk boundaries.
+
+Everything is cached in the media store under a hash of the text and voice
+parameters (language, voice, gender, rate, pitch, gain, encoding):
+
+- the finished MP3 per narration, so re-processing a product or retrying a
+  voice does not synthesize again;
+- the PCM of every chunk, so the intro and outro are synthesized once per
+  voice and reused by every product.
+"""
+
+import contextvars
+import io
+import logging
+import re
+import wave
+from typing import List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from services.media import ffmpeg
+from services.storage.media_store import media_store, params_key
+from utils.executors import bulkheads, current_priority
+from utils.rate_limiter import ai_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "narration"
+CHUNK_NAMESPACE = "narration_chunk"
+AUDIO_ENCODING = "MP3"
+TTS_RATE_LIMIT_KEY = "cloud-tts"
+
+# Cloud TTS accepts up to 5000 bytes of input per request; leave room for the markup
+MAX_CHUNK_BYTES = 4500
+SAMPLE_RATE_HZ = 24000
+MP3_BITRATE = "64k"
+
+INTRO = "Namaste! Let me tell you about this beautiful artisan creation."
+OUTRO = (
+    "This masterpiece carries the soul of our traditional craftspeople, passed down through generations. "
+    "Each piece tells a story of our rich cultural heritage and skilled hands that shaped it with love and devotion. "
+    "Experience the authentic beauty of Indian craftsmanship!"
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+
+def marketing_segments(story_text: str) -> List[str]:
+    """Intro, story and outro of the marketing narration."""
+    return [INTRO, " ".join(story_text.split()), OUTRO]
+
+
+def narration_key(
+    text: str,
+    language_code: str,
+    voice_name: Optional[str],
+    gender=None,
+    speaking_rate: Optional[float] = 1.0,
+    pitch: Optional[float] = 0.0,
+    volume_gain_db: Optional[float] = None,
+    encoding: str = AUDIO_ENCODING,
+) -> str:
+    return params_key(
+        text=text,
+        language_code=language_code,
+        voice=voice_name,
+        gender=getattr(gender, "name", gender),
+        speaking_rate=speaking_rate,
+        pitch=pitch,
+        volume_gain_db=volume_gain_db,
+        encoding=encoding,
+    )
+
+
+def _utf8_len(text: str) -> int:
+    return len(escape(text).encode("utf-8"))
+
+
+def split_chunks(text: str, max_bytes: int = MAX_CHUNK_BYTES) -> List[str]:
+    """Split ``text`` on sentence boundaries into chunks of at most ``max_bytes`` (escaped)."""
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if not sentence:
+            continue
+        candidate = f"{current} {sentence}" if current else sentence
+        if _utf8_len(candidate) <= max_bytes:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        current = ""
+        # A single sentence over the limit is split between words
+        for word in sentence.split():
+            candidate = f"{current} {word}" if current else word
+            if _utf8_len(candidate) > max_bytes and current:
+                chunks.append(current)
+                candidate = word
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _pcm(wav_bytes: bytes) -> bytes:
+    """Raw samples of a LINEAR16 response (which comes with a WAV header)."""
+    with wave.open(io.BytesIO(wav_bytes)) as wav:
+        if wav.getframerate() != SAMPLE_RATE_HZ or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(
+                f"Unexpected TTS audio format: {wav.getframerate()} Hz, "
+                f"{wav.getnchannels()} channels, {wav.getsampwidth() * 8} bit"
+            )
+        return wav.readframes(wav.getnframes())
+
+
+def _synthesize_chunk(tts_client, chunk: str, voice: dict) -> bytes:
+    """PCM of one chunk, from the media store when this voice spoke it before."""
+    key = narration_key(chunk, encoding=f"LINEAR16/{SAMPLE_RATE_HZ}", **voice)
+    pcm = media_store.get(CHUNK_NAMESPACE, key)
+    if pcm is not None:
+        return pcm
+
+    from google.cloud import texttospeech
+
+    kwargs = {} if voice["gender"] is None else {"gender": voice["gender"]}
+    with ai_rate_limiter.acquire_sync(TTS_RATE_LIMIT_KEY):
+        wav_bytes = tts_client.synthesize_speech(
+            text=f"<speak>{escape(chunk)}</speak>",
+            ssml=True,
+            language_code=voice["language_code"],
+            voice_name=voice["voice_name"],
+            speaking_rate=voice["speaking_rate"],
+            pitch=voice["pitch"],
+            volume_gain_db=voice["volume_gain_db"],
+            audio_encoding=texttospeech.AudioEncoding.LINEAR16,
+            sample_rate_hertz=SAMPLE_RATE_HZ,
+            **kwargs,
+        )
+    pcm = _pcm(wav_bytes)
+    try:
+        media_store.put(CHUNK_NAMESPACE, key, pcm, "audio/L16")
+    except Exception as e:
+        logger.warning(f"Failed to cache narration chunk {key[:12]}: {e}")
+    return pcm
+
+
+def _encode_mp3(pcm: bytes) -> bytes:
+    with ffmpeg.memfile(pcm, "narration_pcm") as pcm_fd, ffmpeg.memfile(name="narration_mp3") as mp3_fd:
+        ffmpeg.run(
+            [
+                "-f", "s16le", "-ar", str(SAMPLE_RATE_HZ), "-ac", "1", "-i", ffmpeg.fd_path(pcm_fd),
+                "-c:a", "libmp3lame", "-b:a", MP3_BITRATE,
+                "-f", "mp3", ffmpeg.fd_path(mp3_fd),
+            ],
+            pass_fds=(pcm_fd, mp3_fd),
+        )
+        return b"".join(ffmpeg.read_chunks(mp3_fd))
+
+
+def synthesize(
+    tts_client,
+    segments: Sequence[str],
+    language_code: str,
+    voice_name: Optional[str],
+    gender=None,
+    speaking_rate: Optional[float] = 1.0,
+    pitch: Optional[float] = 0.0,
+    volume_gain_db: Optional[float] = None,
+) -> bytes:
+    """
+    MP3 narration of ``segments`` read one after another. Each segment is
+    chunked on its own, so recurring segments (intro, outro) hit the chunk
+    cache regardless of what surrounds them.
+    """
+    voice = {
+        "language_code": language_code,
+        "voice_name": voice_name,
+        "gender": gender,
+        "speaking_rate": speaking_rate,
+        "pitch": pitch,
+        "volume_gain_db": volume_gain_db,
+    }
+    key = narration_key(" ".join(segments), **voice)
+    audio = media_store.get(NAMESPACE, key)
+    if audio is not None:
+        logger.info(f"Reusing cached narration {key[:12]} ({voice_name})")
+        return audio
+
+    chunks = [chunk for segment in segments for chunk in split_chunks(segment)]
+    executor = bulkheads.get("ai")
+    # All chunks at the caller's priority: NORMAL, or BACKGROUND inside a bulk
+    # job's priority_scope, so a batch narration still yields to users
+    priority = current_priority()
+    futures = []
+    try:
+        # A full queue raises BulkheadFull; the chunks already queued are
+        # cancelled below
+        for chunk in chunks:
+            futures.append(
+                executor.submit(
+                    contextvars.copy_context().run, _synthesize_chunk, tts_client, chunk, voice,
+                    priority=priority,
+                )
+            )
+        pcm = b"".join(future.result() for future in futures)
+    finally:
+        for future in futures:
+            future.cancel()
+    logger.info(f"Synthesized narration from {len(chunks)} chunks ({voice_name})")
+
+    audio = _encode_mp3(pcm)
+    try:
+        media_store.put(NAMESPACE, key, audio, "audio/mpeg")
+    except Exception as e:
+        # Caching is best effort; the narration itself succeeded
+        logger.warning(f"Failed to cache narration {key[:12]}: {e}")
+    return audio
@@ -2,35 +2,42 @@ import io
 import os
 import tempfile
 import uuid
-import time
 import random
 from fastapi import FastAPI, UploadFile, Form, HTTPException
 from fastapi.responses import StreamingResponse
-from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageFilter
+from PIL import Image, ImageDraw
 from google.cloud import vision
 from vertexai.generative_models import GenerativeModel, Part
 from google.api_core.exceptions import ResourceExhausted, GoogleAPIError
 import logging
+from typing import Optional
+from services.media import imaging, jobs
+from services.media.worker import media_worker
+from services.social_media import text_assets
+from utils.executors import bulkheads
+from utils.llm_cache import llm_cache
+from utils.metrics import track_external
+from utils.rate_limiter import ai_rate_limiter
+from utils.resilience import CircuitOpenError, get_dependency
 
 logger = logging.getLogger(__name__)
 
+TEXT_MODEL_NAME = "gemini-2.5-flash"
+IMAGE_MODEL_NAME = "imagen-3.0-generate-002"
+
 vision_client = vision.ImageAnnotatorClient()
-text_model = GenerativeModel("gemini-2.5-flash")
-image_model = GenerativeModel("imagen-3.0-generate-002")  # Vertex AI Imagen
+text_model = GenerativeModel(TEXT_MODEL_NAME)
+image_model = GenerativeModel(IMAGE_MODEL_NAME)  # Vertex AI Imagen
 
-# Rate limiting and retry configuration
+# Retry configuration; request pacing and backoff are handled by the shared ai_rate_limiter
 MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
-
-# Simple in-memory rate limiting (for production, use Redis)
-last_ai_request_time = 0
-MIN_REQUEST_INTERVAL = 1.0  # Minimum seconds between AI requests
 
 
 # ---------- STEP 1: Analyze product image ----------
 def analyze_image(image_bytes):
     img = vision.Image(content=image_bytes)
-    response = vision_client.label_detection(image=img)
+    with track_external("vision", "label_detection"):
+        response = vision_client.label_detection(image=img)
     labels = [label.description for label in response.label_annotations[:5]]
     return labels or ["product"]
 
@@ -45,32 +52,31 @@ def generate_text(description, labels):
     Just Give the Thumbnail and no unneccesary other text
     Product Description: {description}
     """
-    resp = text_model.generate_content(prompt)
+    def produce():
+        with ai_rate_limiter.acquire_sync(TEXT_MODEL_NAME), track_external("gemini", "thumbnail_text"):
+            resp = text_model.generate_content(prompt)
+
+        print("RESPONSE",resp)
 
-    print("RESPONSE",resp)
 
+        return resp.candidates[0].content.parts[0].text.strip()
 
-    return resp.candidates[0].content.parts[0].text.strip()
+    return llm_cache.cached("thumbnail_text", TEXT_MODEL_NAME, prompt, produce)
 
 
 # ---------- STEP 3: Generate background image with fallback ----------
+def _generate_background_remote(prompt):
+    with ai_rate_limiter.acquire_sync(IMAGE_MODEL_NAME), track_external("imagen", "thumbnail_background"):
+        return image_model.generate_content([prompt])
+
+
 def generate_background(labels):
     """Generate background with AI or fallback to programmatic generation"""
-    global last_ai_request_time
-    
-    # Rate limiting check
-    current_time = time.time()
-    if current_time - last_ai_request_time < MIN_REQUEST_INTERVAL:
-        sleep_time = MIN_REQUEST_INTERVAL - (current_time - last_ai_request_time)
-        logger.info(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-        time.sleep(sleep_time)
-    
     # Try AI generation with retries
     for attempt in range(MAX_RETRIES):
         try:
-            last_ai_request_time = time.time()
             prompt = f"A vibrant, eye-catching YouTube thumbnail background featuring {', '.join(labels)}, neon gradients, cinematic style."
-            result = image_model.generate_content([prompt])
+            result = get_dependency("imagen").call(_generate_background_remote, prompt)
             bg_bytes = result.candidates[0].content.parts[0].raw_image_bytes
             logger.info("Successfully generated AI background")
             return Image.open(io.BytesIO(bg_bytes)).convert("RGB").resize((1280, 720))
@@ -78,14 +84,16 @@ def generate_background(labels):
         except ResourceExhausted as e:
             logger.warning(f"Quota exceeded on attempt {attempt + 1}: {e}")
             if attempt < MAX_RETRIES - 1:
-                # Exponential backoff
-                delay = RETRY_DELAY * (2 ** attempt) + random.uniform(0, 1)
-                logger.info(f"Retrying in {delay:.2f} seconds...")
-                time.sleep(delay)
+                # The rate limiter has already cut this model's rate and
+                # concurrency, so the next acquire waits out the backoff.
+                logger.info("Retrying after rate limiter backoff...")
             else:
                 logger.error("All AI generation attempts failed, using fallback")
                 break
                 
+        except CircuitOpenError as e:
+            logger.warning(f"{e}, using fallback background")
+            break
         except GoogleAPIError as e:
             logger.error(f"Google API error: {e}")
             break
@@ -221,148 +229,39 @@ def create_fallback_background(labels):
     return bg
 
 
+def _thumbnail_parts(product_bytes, description, uid=None):
+    """Headline and background of a thumbnail; blocking (vision, Gemini, Imagen and their limiter waits)."""
+    labels = analyze_image(product_bytes)
+    # A product's headline comes with its combined text assets; the separate
+    # Gemini call is only for uploads without a product
+    assets = text_assets.get_text_assets(uid) if uid is not None else None
+    headline = assets["thumbnail_headline"] if assets else generate_text(description, labels)
+    return headline, generate_background(labels)
+
+
 # ---------- STEP 4: Compose thumbnail ----------
 def compose_thumbnail(product_bytes, bg_img, text):
-    # Load product
-    product = Image.open(io.BytesIO(product_bytes)).convert("RGBA")
-    
-    # Make product larger and more prominent - center stage
-    max_product_size = (800, 600)  # Increased from 600x600
-    product.thumbnail(max_product_size, Image.Resampling.LANCZOS)
-    product = ImageOps.contain(product, max_product_size)
-    
-    # Calculate center position for the product
-    bg_img = bg_img.convert("RGBA")
-    bg_width, bg_height = bg_img.size
-    product_width, product_height = product.size
-    
-    # Center the product horizontally and position it slightly above center vertically
-    product_x = (bg_width - product_width) // 2
-    product_y = (bg_height - product_height) // 2 - 50  # Slightly above center to leave room for text
-    
-    # Paste product at calculated center position
-    bg_img.paste(product, (product_x, product_y), product)
-
-    # Add retro UI text styling
-    draw = ImageDraw.Draw(bg_img)
-    
-    # Try to load fonts for retro look
-    font_size = 100
-    try:
-        font_options = [
-            "arialbd.ttf",  # Arial Bold
-            "arial.ttf",
-            "C:/Windows/Fonts/arialbd.ttf",
-            "C:/Windows/Fonts/arial.ttf",
-            "/System/Library/Fonts/Arial Bold.ttf",  # macOS
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"  # Linux
-        ]
-        
-        font = None
-        for font_path in font_options:
-            try:
-                font = ImageFont.truetype(font_path, font_size)
-                break
-            except OSError:
-                continue
-                
-        if font is None:
-            font = ImageFont.load_default()
-            
-    except Exception:
-        font = ImageFont.load_default()
-    
-    # Retro text styling - clean and bold
-    text = text.upper()  # All caps for impact
-    
-    # Calculate text position to center it in a "panel"
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
-    
-    # Position text in a prominent location
-    panel_x = 50
-    panel_y = 500
-    panel_w = text_width + 80
-    panel_h = text_height + 40
-    
-    # Ensure panel fits on screen
-    if panel_x + panel_w > 1280:
-        panel_x = 1280 - panel_w - 20
-    if panel_y + panel_h > 720:
-        panel_y = 720 - panel_h - 20
-    
-    text_x = panel_x + 40
-    text_y = panel_y + 20
-    
-    # Create text panel background (retro UI style)
-    shadow_offset = 8
-    
-    # Draw panel shadow
-    draw.rectangle([
-        panel_x + shadow_offset, panel_y + shadow_offset,
-        panel_x + panel_w + shadow_offset, panel_y + panel_h + shadow_offset
-    ], fill=(0, 0, 0))
-    
-    # Draw panel background (yellow accent color)
-    draw.rectangle([
-        panel_x, panel_y,
-        panel_x + panel_w, panel_y + panel_h
-    ], fill=(255, 219, 51))  # Your app's yellow
-    
-    # Draw panel border
-    draw.rectangle([
-        panel_x, panel_y,
-        panel_x + panel_w, panel_y + panel_h
-    ], outline=(0, 0, 0), width=4)
-    
-    # Draw inner highlight
-    draw.rectangle([
-        panel_x + 4, panel_y + 4,
-        panel_x + panel_w - 4, panel_y + panel_h - 4
-    ], outline=(255, 255, 255), width=2)
-    
-    # Draw the text with retro styling
-    # Text shadow first
-    draw.text(
-        (text_x + 3, text_y + 3),
-        text,
-        font=font,
-        fill=(0, 0, 0)  # Black shadow
-    )
-    
-    # Main text
-    draw.text(
-        (text_x, text_y),
-        text,
-        font=font,
-        fill=(0, 0, 0),  # Black text for readability
-        stroke_width=2,
-        stroke_fill=(255, 255, 255)  # White outline for pop
+    """Compose the thumbnail in the media worker; returns a JPEG buffer."""
+    return io.BytesIO(
+        media_worker.run(jobs.compose_thumbnail, product_bytes, imaging.to_raw(bg_img), text)
     )
 
-    output = io.BytesIO()
-    bg_img.convert("RGB").save(output, format="JPEG", quality=95)
-    output.seek(0)
-    return output
 
-from rembg import remove
 async def generate_thumbnail(file: UploadFile, description: str = Form(...)):
     try:
         product_bytes = await file.read()
         # Reset file stream position for subsequent reads
         await file.seek(0)
-        bg_removed = remove(product_bytes)
+        bg_removed = await media_worker.arun(jobs.remove_background, product_bytes)
         
-        # Analyze + text
-        labels = analyze_image(bg_removed)
-        catchy_text = generate_text(description, labels)
-
-        # Generate bg with fallback handling
-        bg_img = generate_background(labels)
+        # Analyze + text, and bg with fallback handling; the model calls and
+        # rate limiter waits stay off the event loop
+        catchy_text, bg_img = await bulkheads.run("ai", _thumbnail_parts, bg_removed, description)
 
         # Compose final
-        thumbnail = compose_thumbnail(bg_removed, bg_img, catchy_text)
+        thumbnail = io.BytesIO(
+            await media_worker.arun(jobs.compose_thumbnail, bg_removed, imaging.to_raw(bg_img), catchy_text)
+        )
 
         return StreamingResponse(
             thumbnail,
@@ -380,25 +279,24 @@ async def generate_thumbnail(file: UploadFile, description: str = Form(...)):
 
 # Core function: returns local file path
 import os, tempfile, uuid, io
-from rembg import remove
 
 
-async def generate_thumbnail_file(file: UploadFile, description: str) -> str:
+async def generate_thumbnail_file(file: UploadFile, description: str, uid: Optional[int] = None) -> str:
     # Read file fully into bytes
     product_bytes = await file.read()
     # Reset file stream position for subsequent reads
     await file.seek(0)
 
     # Background removal (likely returns bytes)
-    bg_removed = remove(product_bytes)
+    bg_removed = await media_worker.arun(jobs.remove_background, product_bytes)
 
-    # Downstream analysis (make sure they handle bytes correctly)
-    labels = analyze_image(bg_removed)
-    catchy_text = generate_text(description, labels)
-    bg_img = generate_background(labels)
+    # Downstream analysis (make sure they handle bytes correctly), off the event loop
+    catchy_text, bg_img = await bulkheads.run("ai", _thumbnail_parts, bg_removed, description, uid)
 
     # Compose thumbnail
-    thumbnail = compose_thumbnail(bg_removed, bg_img, catchy_text)
+    thumbnail = io.BytesIO(
+        await media_worker.arun(jobs.compose_thumbnail, bg_removed, imaging.to_raw(bg_img), catchy_text)
+    )
 
     # Ensure we have bytes
     if hasattr(thumbnail, "getvalue"):  # BytesIO
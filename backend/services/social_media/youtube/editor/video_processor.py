@@ -1,16 +1,21 @@
 import io
 import os
-import tempfile
-import uuid
 import logging
 from typing import Optional
 from pathlib import Path
 
-from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
-from moviepy.video.fx import loop
-
 # Import database connection
 from init.db import get_connection
+from services.media import hls, jobs, previews
+from services.media.video import derived_version
+from services.media.worker import media_worker
+from services.social_media.youtube.editor import narration
+from services.social_media.youtube.editor.voices import voice_selector
+from services.storage import storage
+from services.storage.media_store import media_store
+from utils.executors import bulkheads
+from utils import deadline
+from utils.metrics import track_stage
 
 # Import the audio generation client
 import sys
@@ -67,16 +72,16 @@ class VideoProcessor:
             logger.error(f"Error retrieving product story: {e}")
             return None
     
-    def save_edited_video(self, uid: int, video_blob: bytes) -> bool:
-        """Save processed video to edited_videos table"""
+    def save_edited_video(self, uid: int, video_blob: bytes, tag: str = "16x9") -> bool:
+        """Save processed video to edited_videos table under its variant tag"""
         try:
             with get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Insert or replace the edited video
                 cursor.execute(
-                    "INSERT OR REPLACE INTO edited_videos (id, data) VALUES (?, ?)",
-                    (uid, video_blob)
+                    "INSERT OR REPLACE INTO edited_videos (id, tag, data) VALUES (?, ?, ?)",
+                    (uid, tag, video_blob)
                 )
                 conn.commit()
                 
@@ -89,76 +94,72 @@ class VideoProcessor:
     
     def create_marketing_narration(self, story_text: str) -> bytes:
         """Generate marketing audio from product story with Indic rustic voice"""
+        # Create a more authentic, culturally-aware marketing narrative:
+        # fixed intro and outro around the product story
+        segments = narration.marketing_segments(story_text)
+
+        # Male Indian English voice first, then the fallbacks; voices that
+        # keep failing are skipped for a while (see voices.py)
+        return voice_selector.synthesize(
+            lambda voice: narration.synthesize(self.tts_client, segments, **voice.params())
+        )
+    
+    def package_for_streaming(self, uid: int, video: bytes, version: str) -> Optional[str]:
+        """Package the edited video as an HLS ladder unless it is current; returns its version"""
         try:
-            # Create a more authentic, culturally-aware marketing narrative
-            marketing_text = f"""
-            Namaste! Let me tell you about this beautiful artisan creation. 
-            {story_text}
-            This masterpiece carries the soul of our traditional craftspeople, passed down through generations. 
-            Each piece tells a story of our rich cultural heritage and skilled hands that shaped it with love and devotion.
-            Experience the authentic beauty of Indian craftsmanship!
-            """
-            
-            # Import the gender enum for proper usage
-            from google.cloud import texttospeech
-            
-            # Generate audio with Indian English voice and rustic settings
-            audio_content = self.tts_client.synthesize_speech(
-                text=marketing_text,
-                language_code="en-IN",  # Indian English
-                gender=texttospeech.SsmlVoiceGender.MALE,  # Male voice for rustic feel
-                speaking_rate=0.85,  # Slower, more deliberate pace for storytelling
-                pitch=-2.0,  # Lower pitch for more mature, rustic sound
-                volume_gain_db=1.5,  # Moderate volume
-                voice_name="en-IN-Standard-B"  # Male Indian English voice
-            )
-            
-            return audio_content
-            
+            master_key = hls.object_key(uid, version, hls.MASTER_PLAYLIST)
+            if storage.get_artifact_hash(uid, hls.ARTIFACT) == version and media_store.exists(hls.NAMESPACE, master_key):
+                return version
+            with track_stage("video.package"):
+                files = media_worker.run(jobs.package_hls, uid, video, version)
+            storage.store_artifact_hash(uid, hls.ARTIFACT, version)
+            logger.info(f"Packaged HLS renditions for uid: {uid} (version {version}, {files} files)")
+            return version
         except Exception as e:
-            logger.error(f"Error creating marketing narration with primary voice: {e}")
-            
-            # Try multiple fallback voices for robustness
-            fallback_voices = [
-                ("en-IN-Standard-C", "Male Indian English (Alternative)"),
-                ("en-IN-Wavenet-B", "Male Indian English (Wavenet)"),
-                ("en-IN-Standard-A", "Female Indian English"),
-                ("en-US-Standard-D", "US English Male (Final fallback)")
-            ]
-            
-            for voice_name, voice_description in fallback_voices:
-                try:
-                    logger.info(f"Trying fallback voice: {voice_description}")
-                    audio_content = self.tts_client.synthesize_speech(
-                        text=marketing_text,
-                        language_code="en-IN" if "en-IN" in voice_name else "en-US",
-                        speaking_rate=0.85,
-                        pitch=-2.0 if "Male" in voice_description else -1.0,
-                        volume_gain_db=1.5,
-                        voice_name=voice_name
-                    )
-                    logger.info(f"Successfully generated audio with {voice_description}")
-                    return audio_content
-                except Exception as fallback_error:
-                    logger.warning(f"Fallback voice {voice_description} failed: {fallback_error}")
-                    continue
-            
-            # If all fallbacks fail, raise the original error
-            logger.error("All voice options failed")
-            raise
+            logger.error(f"Error packaging video for streaming: {e}")
+            return None
+    
+    def create_previews(self, uid: int, video: bytes, version: str) -> Optional[str]:
+        """Render the poster frames and animated preview unless they are current; returns their version"""
+        try:
+            if storage.get_artifact_hash(uid, previews.ARTIFACT) == version and all(
+                media_store.exists(previews.NAMESPACE, previews.object_key(uid, version, name))
+                for name in previews.FILES
+            ):
+                return version
+            with track_stage("video.previews"):
+                media_worker.run(jobs.generate_video_previews, uid, video, version)
+            storage.store_artifact_hash(uid, previews.ARTIFACT, version)
+            logger.info(f"Rendered video previews for uid: {uid} (version {version})")
+            return version
+        except Exception as e:
+            logger.error(f"Error rendering video previews: {e}")
+            return None
+    
+    def post_process(self, uid: int, video: Optional[bytes] = None) -> bool:
+        """Derive the streaming renditions and previews of the landscape edited video"""
+        if video is None:
+            video = storage.get_edited_video_raw(uid)
+        if video is None:
+            logger.error(f"No edited video to post-process for uid: {uid}")
+            return False
+        version = derived_version(video)
+        packaged = self.package_for_streaming(uid, video, version) is not None
+        previewed = self.create_previews(uid, video, version) is not None
+        return packaged and previewed
     
     def process_video_with_audio(self, uid: int) -> bool:
         """
         Main processing function that:
         1. Gets video blob from output_videos (first video for the uid)
-        2. Removes existing audio
-        3. Gets product story and generates marketing audio
-        4. Extends video to match audio length
-        5. Saves final video to edited_videos
-        6. Cleans up temporary files
+        2. Gets product story and generates marketing audio
+        3. Replaces the video's audio with the narration, extending the video
+           to the narration length and renders every aspect-ratio variant in
+           one pass (in the media worker, without temp files), then saves each
+           to edited_videos under its tag
+        4. Packages the landscape variant as HLS renditions and renders its
+           poster frames and animated preview, all into the media store
         """
-        temp_files = []
-        
         try:
             # Step 1: Get video blob
             logger.info(f"Processing video for uid: {uid}")
@@ -173,107 +174,31 @@ class VideoProcessor:
                 logger.error(f"No product story found for uid: {uid}")
                 return False
             
-            # Create temporary directory for processing
-            temp_dir = tempfile.mkdtemp()
-            temp_files.append(temp_dir)
-            
-            # Step 3: Save video blob to temporary file
-            temp_video_path = os.path.join(temp_dir, f"input_video_{uuid.uuid4().hex[:8]}.mp4")
-            temp_files.append(temp_video_path)
-            
-            with open(temp_video_path, 'wb') as f:
-                f.write(video_blob)
-            
-            # Step 4: Load video and remove audio
-            logger.info("Loading video and removing existing audio")
-            video_clip = VideoFileClip(temp_video_path)
-            video_no_audio = video_clip.without_audio()
-            original_duration = video_clip.duration
-            
-            # Step 5: Generate marketing audio
+            # Step 3: Generate marketing audio
             logger.info("Generating marketing narration")
-            audio_content = self.create_marketing_narration(story_text)
-            #ok 
-            # Save audio to temporary file
-            temp_audio_path = os.path.join(temp_dir, f"narration_{uuid.uuid4().hex[:8]}.mp3")
-            temp_files.append(temp_audio_path)
-            
-            with open(temp_audio_path, 'wb') as f:
-                f.write(audio_content)
-            
-            # Load audio clip
-            audio_clip = AudioFileClip(temp_audio_path)
-            audio_duration = audio_clip.duration
+            deadline.check("video.narration")
+            with track_stage("video.narration"):
+                audio_content = self.create_marketing_narration(story_text)
             
-            # Step 6: Extend video to match audio length if needed
-            logger.info(f"Original video duration: {original_duration}s, Audio duration: {audio_duration}s")
-            
-            if audio_duration > original_duration:
-                # Loop the video to match audio duration
-                logger.info("Extending video to match audio length")
-                loops_needed = int(audio_duration / original_duration) + 1
-                extended_video = loop.loop(video_no_audio, n=loops_needed)
-                final_video = extended_video.subclip(0, audio_duration)
-            else:
-                # Trim video to match audio duration
-                final_video = video_no_audio.subclip(0, audio_duration)
-            
-            # Step 7: Combine video with new audio
+            # Step 4: Combine video with the narration in the media worker;
+            # the variants are stored from this process, which owns the database
             logger.info("Combining video with marketing narration")
-            final_clip = final_video.set_audio(audio_clip)
-            
-            # Step 8: Export final video
-            temp_output_path = os.path.join(temp_dir, f"final_video_{uuid.uuid4().hex[:8]}.mp4")
-            temp_files.append(temp_output_path)
-            
-            final_clip.write_videofile(
-                temp_output_path,
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile=os.path.join(temp_dir, f"temp_audio_{uuid.uuid4().hex[:8]}.m4a"),
-                remove_temp=True,
-                verbose=False,
-                logger=None
-            )
+            deadline.check("video.encode")
+            with track_stage("video.encode"):
+                variants = media_worker.run(jobs.narrate_video_variants, video_blob, audio_content)
+            storage.store_edited_videos(uid, variants)
             
-            # Step 9: Read final video as blob
-            with open(temp_output_path, 'rb') as f:
-                final_video_blob = f.read()
+            sizes = {tag: len(data) for tag, data in variants.items()}
+            logger.info(f"Video processing completed successfully for uid: {uid} ({sizes})")
             
-            # Step 10: Save to database
-            success = self.save_edited_video(uid, final_video_blob)
-            
-            # Clean up clips
-            video_clip.close()
-            video_no_audio.close()
-            audio_clip.close()
-            final_video.close()
-            final_clip.close()
-            
-            logger.info(f"Video processing completed successfully for uid: {uid}")
-            return success
+            # Step 5: HLS renditions and listing previews; the MP4s are
+            # stored already, so these failing is not fatal
+            self.post_process(uid, variants.get(storage.DEFAULT_VIDEO_TAG))
+            return True
             
         except Exception as e:
             logger.error(f"Error processing video: {e}")
             return False
-            
-        finally:
-            # Step 11: Clean up all temporary files
-            self._cleanup_temp_files(temp_files)
-    
-    def _cleanup_temp_files(self, temp_files: list):
-        """Clean up temporary files and directories"""
-        for temp_path in temp_files:
-            try:
-                if os.path.isfile(temp_path):
-                    os.remove(temp_path)
-                    logger.debug(f"Removed temporary file: {temp_path}")
-                elif os.path.isdir(temp_path):
-                    import shutil
-                    shutil.rmtree(temp_path)
-                    logger.debug(f"Removed temporary directory: {temp_path}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file {temp_path}: {e}")
 
 
 # Convenience function for easy usage
@@ -288,4 +213,15 @@ async def process_video_with_marketing_audio(uid: int) -> bool:
         bool: Success status
     """
     processor = VideoProcessor()
-    return processor.process_video_with_audio(uid)
\ No newline at end of file
+    # Narration and storage block; keep them off the event loop
+    return await bulkheads.run("media", processor.process_video_with_audio, uid)
+
+
+async def post_process_video(uid: int) -> bool:
+    """
+    Derive the HLS renditions and previews of an already processed video
+    (e.g. one processed before these existed). Parts that are current are
+    skipped. Returns whether both are available.
+    """
+    processor = VideoProcessor()
+    return await bulkheads.run("media", processor.post_process, uid)
@@ -0,0 +1,211 @@
+"""
+Narration voice selection with per-voice health and optional hedging.
+
+Every voice has its own circuit breaker (see ``utils.resilience``), so a
+voice that keeps failing is skipped for a cool-down instead of costing a
+full synthesis round trip on every narration. Voices are tried in order.
+With hedging on, the first two healthy voices are
+started together (or the second after a delay) and the first success wins;
+the slower synthesis still finishes and lands in the narration cache.
+
+.. code-block:: python
+
+    from services.social_media.youtube.editor.voices import voice_selector
+
+    audio = voice_selector.synthesize(
+        lambda voice: narration.synthesize(tts_client, segments, **voice.params())
+    )
+
+Configuration:
+    TTS_VOICES: comma separated voice names in order of preference
+        (default: the Indian English voices below, US English last)
+    TTS_VOICE_HEDGE: 1 to hedge the first voice with the second (default 0)
+    TTS_VOICE_HEDGE_DELAY_SECONDS: start the hedge only after this long;
+        0 starts both together (default 0)
+    TTS_VOICE_HEDGE_WORKERS: threads running hedged voices (default 8)
+    CIRCUIT_TTS_* : breaker thresholds, as for other dependencies
+"""
+
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from utils.metrics import REGISTRY
+from utils.resilience import (
+    HEDGED,
+    CircuitBreaker,
+    CircuitConfig,
+    CircuitOpenError,
+    config_from_env,
+    is_dependency_failure,
+)
+
+logger = logging.getLogger(__name__)
+
+VOICE_ATTEMPTS = REGISTRY.counter(
+    "artisan_tts_voice_attempts_total",
+    "Narration synthesis attempts per voice and result (ok, error, skipped).",
+    ("voice", "result"),
+)
+
+
+@dataclass(frozen=True)
+class Voice:
+    name: str
+    description: str
+    pitch: float = -2.0
+    gender: Optional[str] = None
+
+    @property
+    def language_code(self) -> str:
+        return "-".join(self.name.split("-")[:2])
+
+    def params(self) -> dict:
+        """Keyword arguments for ``narration.synthesize``."""
+        gender = None
+        if self.gender:
+            from google.cloud import texttospeech
+            gender = texttospeech.SsmlVoiceGender[self.gender]
+        return {
+            "language_code": self.language_code,
+            "voice_name": self.name,
+            "gender": gender,
+            "speaking_rate": 0.85,  # Slower, more deliberate pace for storytelling
+            "pitch": self.pitch,  # Lower pitch for more mature, rustic sound
+            "volume_gain_db": 1.5,  # Moderate volume
+        }
+
+
+KNOWN_VOICES: Dict[str, Voice] = {
+    voice.name: voice
+    for voice in (
+        Voice("en-IN-Standard-B", "Male Indian English", gender="MALE"),
+        Voice("en-IN-Standard-C", "Male Indian English (Alternative)"),
+        Voice("en-IN-Wavenet-B", "Male Indian English (Wavenet)"),
+        Voice("en-IN-Standard-A", "Female Indian English", pitch=-1.0),
+        Voice("en-US-Standard-D", "US English Male (Final fallback)"),
+    )
+}
+
+# Voices are slow by nature; only errors and very slow calls count against them
+VOICE_CIRCUIT_CONFIG = CircuitConfig(slow_call_seconds=90.0, minimum_calls=2, open_seconds=120.0)
+
+# Hedged voices run whole narrations, which wait on chunk syntheses in the "ai"
+# bulkhead, so they get threads of their own rather than the resilience pools
+_voice_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TTS_VOICE_HEDGE_WORKERS", "8")), thread_name_prefix="tts-voice"
+)
+
+
+def _voices_from_env(value: Optional[str]) -> List[Voice]:
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    if not names:
+        return list(KNOWN_VOICES.values())
+    return [KNOWN_VOICES.get(name, Voice(name, name)) for name in names]
+
+
+class VoiceSelector:
+    """Ordered voices, each behind its own circuit breaker."""
+
+    def __init__(self, voices: List[Voice], hedge: bool = False, hedge_delay: float = 0.0):
+        self.voices = voices
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        config = config_from_env("tts", VOICE_CIRCUIT_CONFIG)
+        self.breakers = {voice.name: CircuitBreaker(f"tts:{voice.name}", config) for voice in voices}
+
+    def _available(self) -> Iterator[Voice]:
+        # Asked one voice at a time, right before it is used: allow() hands
+        # out the half-open probe, which must not go to a voice never called
+        for voice in self.voices:
+            if self.breakers[voice.name].allow():
+                yield voice
+            else:
+                VOICE_ATTEMPTS.inc(voice=voice.name, result="skipped")
+
+    def _attempt(self, voice: Voice, synthesize: Callable[[Voice], bytes]) -> bytes:
+        breaker = self.breakers[voice.name]
+        start = time.perf_counter()
+        try:
+            audio = synthesize(voice)
+        except Exception as e:
+            # A client error is still an answer: the voice is up
+            breaker.record(not is_dependency_failure(e), time.perf_counter() - start, sample=False)
+            VOICE_ATTEMPTS.inc(voice=voice.name, result="error")
+            logger.warning(f"Voice {voice.description} ({voice.name}) failed: {e}")
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record(True, time.perf_counter() - start)
+        VOICE_ATTEMPTS.inc(voice=voice.name, result="ok")
+        return audio
+
+    def _submit(self, voice: Voice, synthesize: Callable[[Voice], bytes]) -> Future:
+        ctx = contextvars.copy_context()
+        return _voice_executor.submit(ctx.run, self._attempt, voice, synthesize)
+
+    def _hedged(self, voices: Iterator[Voice], synthesize: Callable[[Voice], bytes]) -> bytes:
+        primary = self._submit(next(voices), synthesize)
+        if self.hedge_delay:
+            done, _ = wait([primary], timeout=self.hedge_delay)
+            if done and primary.exception() is None:
+                return primary.result()
+
+        hedge_voice = next(voices, None)
+        if hedge_voice is None:
+            return primary.result()
+        logger.info(f"Hedging narration with voice {hedge_voice.description}")
+        hedge = self._submit(hedge_voice, synthesize)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                HEDGED.inc(dependency="tts", winner="primary" if future is primary else "hedge")
+                # The slower voice keeps running; its narration still lands in
+                # the cache and its outcome still feeds its breaker
+                return result
+        raise error
+
+    def synthesize(self, synthesize: Callable[[Voice], bytes]) -> bytes:
+        """
+        Audio from the first voice that succeeds, calling ``synthesize(voice)``
+        for each voice tried. Voices with an open circuit are skipped; when
+        every voice is, :class:`CircuitOpenError` is raised.
+        """
+        voices = self._available()
+        error: Optional[BaseException] = None
+        if self.hedge:
+            try:
+                return self._hedged(voices, synthesize)
+            except StopIteration:
+                pass
+            except Exception as e:
+                error = e
+
+        for voice in voices:
+            try:
+                return self._attempt(voice, synthesize)
+            except Exception as e:
+                error = e
+        if error is None:
+            raise CircuitOpenError("Every narration voice is failing; try again later")
+        logger.error("All voice options failed")
+        raise error
+
+
+voice_selector = VoiceSelector(
+    _voices_from_env(os.getenv("TTS_VOICES")),
+    hedge=os.getenv("TTS_VOICE_HEDGE", "0") == "1",
+    hedge_delay=float(os.getenv("TTS_VOICE_HEDGE_DELAY_SECONDS", "0")),
+)
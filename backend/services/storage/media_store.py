@@ -0,0 +1,249 @@
+"""
+Keyed store for generated media (narrations, renditions, previews) and
+staged uploads (bulk catalog images).
+
+Objects live in the GCS bucket under ``media_store/<namespace>/<key>`` and
+are cached on local disk, so a hot object is served without a GCS round trip
+and a cold instance still finds everything produced before. Keys are hashes:
+of the content itself (:func:`content_key`) or of the parameters that
+produce it (:func:`params_key`), so identical media is stored once and reused
+across runs and products.
+
+.. code-block:: python
+
+    from services.storage.media_store import media_store, params_key
+
+    key = params_key(text=text, voice=voice_name, encoding="MP3")
+    audio = media_store.get("narration", key)
+    if audio is None:
+        audio = synthesize(...)
+        media_store.put("narration", key, audio, "audio/mpeg")
+
+Configuration:
+    MEDIA_STORE_BUCKET: GCS bucket; empty keeps objects on local disk only
+        (default "phankar")
+    MEDIA_STORE_CACHE_DIR: local cache directory (default <tmp>/media_store)
+    MEDIA_STORE_CACHE_MAX_BYTES: local cache size; least recently used
+        objects are removed beyond it (default 2 GiB)
+    MEDIA_STORE_CACHE_TRIM_INTERVAL_SECONDS: how often the cache directory is
+        rescanned, which picks up objects written by other processes; in
+        between, the size is tracked from this process's writes (default 60)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from utils.metrics import REGISTRY, track_storage
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = os.getenv("MEDIA_STORE_BUCKET", "phankar")
+PREFIX = "media_store"
+CACHE_DIR = os.getenv("MEDIA_STORE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "media_store"))
+CACHE_MAX_BYTES = int(os.getenv("MEDIA_STORE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+CACHE_TRIM_INTERVAL_SECONDS = float(os.getenv("MEDIA_STORE_CACHE_TRIM_INTERVAL_SECONDS", "60"))
+# A trim goes down to this share of the limit, so the next one is many writes away
+CACHE_LOW_WATER = 0.9
+TMP_PREFIX = ".tmp-"
+
+MEDIA_STORE_REQUESTS = REGISTRY.counter(
+    "artisan_media_store_requests_total",
+    "Media store lookups by namespace and result (local_hit, remote_hit, miss).",
+    ("namespace", "result"),
+)
+
+
+def content_key(data: bytes) -> str:
+    """Key of an object addressed by its content."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def params_key(**params) -> str:
+    """Key of an object addressed by the parameters that produce it."""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MediaStore:
+    """GCS-backed object store with a local disk cache."""
+
+    def __init__(self, bucket_name: str = BUCKET_NAME, cache_dir: str = CACHE_DIR, cache_max_bytes: int = CACHE_MAX_BYTES):
+        self.bucket_name = bucket_name
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self._bucket = None
+        self._lock = threading.Lock()
+        # Cache size as of the last scan plus this process's writes since;
+        # None until the first scan
+        self._cache_bytes: Optional[int] = None
+        self._last_scan = 0.0
+        self._size_lock = threading.Lock()
+        self._trim_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_bucket(self):
+        with self._lock:
+            if self._bucket is None:
+                from google.cloud import storage
+
+                service_account_key = os.getenv("GCP_SA_KEY")
+                if service_account_key and service_account_key.startswith('{'):
+                    client = storage.Client.from_service_account_info(json.loads(service_account_key))
+                else:
+                    client = storage.Client()
+                self._bucket = client.bucket(self.bucket_name)
+            return self._bucket
+
+    def _blob_name(self, namespace: str, key: str) -> str:
+        return f"{PREFIX}/{namespace}/{key}"
+
+    def local_path(self, namespace: str, key: str) -> str:
+        return os.path.join(self.cache_dir, namespace, key)
+
+    def _write_local(self, namespace: str, key: str, data: bytes) -> None:
+        path = self.local_path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial object
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._written(len(data) - replaced, keep=path)
+
+    def _written(self, delta: int, keep: str) -> None:
+        with self._size_lock:
+            if self._cache_bytes is not None:
+                self._cache_bytes += delta
+            due = (
+                self._cache_bytes is None
+                or self._cache_bytes > self.cache_max_bytes
+                or time.monotonic() - self._last_scan >= CACHE_TRIM_INTERVAL_SECONDS
+            )
+        # One scan at a time; a write racing it is counted by the next one
+        if due and self._trim_lock.acquire(blocking=False):
+            try:
+                self._trim(keep)
+            finally:
+                self._trim_lock.release()
+
+    def _trim(self, keep: str) -> None:
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                # Another writer's object in progress
+                if name.startswith(TMP_PREFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total += stat.st_size
+                if path != keep:
+                    files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        if total > self.cache_max_bytes:
+            target = self.cache_max_bytes * CACHE_LOW_WATER
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        with self._size_lock:
+            self._cache_bytes = total
+            self._last_scan = time.monotonic()
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """Object bytes, or None when it was never stored."""
+        path = self.local_path(namespace, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Mark as recently used for _trim (atime updates are unreliable)
+            os.utime(path)
+            MEDIA_STORE_REQUESTS.inc(namespace=namespace, result="local_hit")
+            return data
+        except FileNotFoundError:
+            pass
+
+        data = None
+        if self.bucket_name:
+            try:
+                with track_storage("media_store_download"):
+                    blob = self._get_bucket().blob(self._blob_name(namespace, key))
+                    if blob.exists():
+                        data = blob.download_as_bytes()
+            except Exception as e:
+                logger.warning(f"Media store download of {namespace}/{key} failed: {e}")
+
+        if data is None:
+            MEDIA_STORE_REQUESTS.inc(namespace=namespace, result="miss")
+            return None
+        MEDIA_STORE_REQUESTS.inc(namespace=namespace, result="remote_hit")
+        self._write_local(namespace, key, data)
+        return data
+
+    def exists(self, namespace: str, key: str) -> bool:
+        if os.path.exists(self.local_path(namespace, key)):
+            return True
+        if not self.bucket_name:
+            return False
+        try:
+            return self._get_bucket().blob(self._blob_name(namespace, key)).exists()
+        except Exception as e:
+            logger.warning(f"Media store lookup of {namespace}/{key} failed: {e}")
+            return False
+
+    def put(self, namespace: str, key: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """Store ``data`` under ``key``; returns the key."""
+        self._write_local(namespace, key, data)
+        if self.bucket_name:
+            try:
+                with track_storage("media_store_upload"):
+                    blob = self._get_bucket().blob(self._blob_name(namespace, key))
+                    blob.upload_from_string(data, content_type=content_type)
+            except Exception as e:
+                # Still served from the local cache; only other instances miss it
+                logger.warning(f"Media store upload of {namespace}/{key} failed: {e}")
+        return key
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove ``key`` from the local cache and the bucket; a missing object is fine."""
+        path = self.local_path(namespace, key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            with self._size_lock:
+                if self._cache_bytes is not None:
+                    self._cache_bytes -= size
+        except FileNotFoundError:
+            pass
+        if self.bucket_name:
+            try:
+                with track_storage("media_store_delete"):
+                    blob = self._get_bucket().blob(self._blob_name(namespace, key))
+                    if blob.exists():
+                        blob.delete()
+            except Exception as e:
+                logger.warning(f"Media store delete of {namespace}/{key} failed: {e}")
+
+
+media_store = MediaStore()
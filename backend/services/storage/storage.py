@@ -7,9 +7,13 @@ from init import db
 from google.cloud import storage
 from dotenv import load_dotenv
 import threading
+from utils.metrics import track_storage
 
 load_dotenv()
 
+# Variant of an edited video served when no tag is asked for (landscape, for YouTube)
+DEFAULT_VIDEO_TAG = "16x9"
+
 def parse_response(id:int, response: dict):
     """
     Parse the JSON response and call appropriate storage functions.
@@ -94,14 +98,15 @@ def parse_response(id:int, response: dict):
 _local = threading.local()
 
 def ensure_db_downloaded():
-    """Ensure database is downloaded from GCS (only once per request)"""
+    """Ensure database is downloaded from GCS (only once per request); returns its local path"""
     if not hasattr(_local, 'db_downloaded') or not _local.db_downloaded:
         print("[DEBUG] Downloading database from GCS...")
-        db.get_db_path()  # This downloads from GCS
+        _local.db_path = db.get_db_path()  # This downloads from GCS
         _local.db_downloaded = True
         print("[DEBUG] Database downloaded from GCS")
     else:
         print("[DEBUG] Database already downloaded, skipping download")
+    return _local.db_path
 
 @contextmanager
 def get_connection():
@@ -111,12 +116,13 @@ def get_connection():
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     try:
-        yield conn
-        conn.commit()
-        # Ensure the commit is flushed to disk
-        conn.execute("PRAGMA synchronous = FULL")
-        # Force a checkpoint to ensure data is written to disk
-        conn.execute("PRAGMA wal_checkpoint(FULL)")
+        with track_storage("db_write"):
+            yield conn
+            conn.commit()
+            # Ensure the commit is flushed to disk
+            conn.execute("PRAGMA synchronous = FULL")
+            # Force a checkpoint to ensure data is written to disk
+            conn.execute("PRAGMA wal_checkpoint(FULL)")
         
         # Upload the database back to GCS after each write operation
         try:
@@ -141,7 +147,8 @@ def get_connection_readonly():
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     try:
-        yield conn
+        with track_storage("db_read"):
+            yield conn
         # No commit, no upload - just read
     except sqlite3.Error as e:
         print(f"[DB ERROR] {e}")
@@ -185,7 +192,8 @@ def get_bytes_from_gcs_url(gcs_url: str):
         
         bucket = client.bucket(bucket_name)
         blob = bucket.blob(blob_name)
-        return blob.download_as_bytes()
+        with track_storage("gcs_download"):
+            return blob.download_as_bytes()
     except Exception as e:
         print(f"[GCS ERROR] Failed to fetch {gcs_url}: {e}")
         traceback.print_exc()
@@ -490,13 +498,14 @@ def store_ad_image(uid: int, data: bytes):
     with get_connection() as conn:
         try:
             tag=0
+            # Replace, so a preview draft can be swapped for the AI banner
             conn.execute(
-                "INSERT INTO ad_banners (id, tag, data) VALUES (?, ?, ?)",
+                "INSERT OR REPLACE INTO ad_banners (id, tag, data) VALUES (?, ?, ?)",
                 (uid, tag, data),
             )
         except sqlite3.Error as e:
             print(
-                f"[DB ERROR] Failed to insert ad_banners for uid={uid} with error={e}"
+                f"[DB ERROR] Failed to insert/replace ad_banners for uid={uid} with error={e}"
             )
             traceback.print_exc()
             raise
@@ -549,7 +558,7 @@ def store_artisan_inputs(uid:int, user_id:int, product_name:str="", product_desc
 # GET FUNCTIONS
 # ---------------------------
 def get_input_images(uid: int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute(
                 "SELECT tag, data FROM input_image WHERE id = ? ORDER BY tag", (uid,)
@@ -595,7 +604,7 @@ def get_output_images(uid: int):
             traceback.print_exc()
             raise
 def get_recommended_price(uid: int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute("SELECT price FROM pricing WHERE id = ?", (uid,))
             row = cursor.fetchone()
@@ -637,7 +646,7 @@ def get_faqs(uid: int):
 
 
 def get_story(uid: int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute("SELECT story FROM story WHERE id = ?", (uid,))
             row = cursor.fetchone()
@@ -649,7 +658,7 @@ def get_story(uid: int):
 
 
 def get_history(uid: int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute(
                 "SELECT location_specific_info, descriptive_history FROM product_history WHERE id = ?",
@@ -717,7 +726,7 @@ def get_product_style(uid: int):
 
 
 def get_product_origin(uid: int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute(
                 "SELECT origin FROM product_origin WHERE id=?", (uid,)
@@ -735,7 +744,7 @@ def get_product_origin(uid: int):
 
 
 def get_product_predicted_artist(uid: int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute(
                 "SELECT predicted_artist FROM product_predicted_artist WHERE id=?",
@@ -805,7 +814,7 @@ def get_product_colors(uid: int):
 
 
 def get_video(uid: int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute("SELECT tag,data FROM output_videos WHERE id = ?", (uid, ))
             rows = cursor.fetchall()
@@ -916,41 +925,71 @@ def get_product_youtube_url(uid:int):
             raise
 
 
-def get_edited_video(uid: int):
+def get_edited_video(uid: int, tag: str = DEFAULT_VIDEO_TAG):
     """
-    Get edited video blob from edited_videos table by UID.
+    Get edited video blob from edited_videos table by UID and variant tag.
     Returns the video as base64 encoded string for API consumption.
     """
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
-            cursor = conn.execute("SELECT data FROM edited_videos WHERE id = ?", (uid,))
+            cursor = conn.execute("SELECT data FROM edited_videos WHERE id = ? AND tag = ?", (uid, tag))
             row = cursor.fetchone()
             if row:
                 # Convert binary data to base64 string for JSON response
                 video_base64 = base64.b64encode(row[0]).decode("utf-8")
-                return {"id": uid, "video": video_base64}
+                return {"id": uid, "tag": tag, "video": video_base64}
             return None
         except sqlite3.Error as e:
             print(
-                f"[DB ERROR] Failed to fetch edited_video for uid={uid} with error={e}"
+                f"[DB ERROR] Failed to fetch edited_video for uid={uid} tag={tag} with error={e}"
+            )
+            traceback.print_exc()
+            raise
+
+
+def get_edited_video_tags(uid: int):
+    """Variant tags (e.g. "16x9", "9x16", "1x1") stored for an edited video."""
+    with get_connection_readonly() as conn:
+        try:
+            cursor = conn.execute("SELECT tag FROM edited_videos WHERE id = ? ORDER BY tag", (uid,))
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(
+                f"[DB ERROR] Failed to fetch edited_video tags for uid={uid} with error={e}"
             )
             traceback.print_exc()
             raise
 
 
-def get_edited_video_raw(uid: int):
+def store_edited_videos(uid: int, videos: dict):
+    """Store edited video variants (tag -> bytes) in one transaction."""
+    with get_connection() as conn:
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO edited_videos (id, tag, data) VALUES (?, ?, ?)",
+                [(uid, tag, data) for tag, data in videos.items()],
+            )
+        except sqlite3.Error as e:
+            print(
+                f"[DB ERROR] Failed to insert edited_videos for uid={uid} with error={e}"
+            )
+            traceback.print_exc()
+            raise
+
+
+def get_edited_video_raw(uid: int, tag: str = DEFAULT_VIDEO_TAG):
     """
-    Get edited video blob from edited_videos table by UID.
+    Get edited video blob from edited_videos table by UID and variant tag.
     Returns raw bytes for direct download/streaming.
     """
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
-            cursor = conn.execute("SELECT data FROM edited_videos WHERE id = ?", (uid,))
+            cursor = conn.execute("SELECT data FROM edited_videos WHERE id = ? AND tag = ?", (uid, tag))
             row = cursor.fetchone()
             return row[0] if row else None
         except sqlite3.Error as e:
             print(
-                f"[DB ERROR] Failed to fetch edited_video_raw for uid={uid} with error={e}"
+                f"[DB ERROR] Failed to fetch edited_video_raw for uid={uid} tag={tag} with error={e}"
             )
             traceback.print_exc()
             raise
@@ -1011,7 +1050,7 @@ def get_comics(uid:int):
             raise
 
 def get_artisan_inputs(uid:int):
-    with get_connection() as conn:
+    with get_connection_readonly() as conn:
         try:
             cursor = conn.execute("SELECT * FROM ArtisanInputs WHERE id = ?", (uid,))
             row = cursor.fetchone()
@@ -1156,4 +1195,276 @@ def store_inventory_recommendations(uid: int, recommendations: dict, art_forms:
         except sqlite3.Error as e:
             print(f"[DB ERROR] Failed to store inventory recommendations for uid={uid} with error={e}")
             traceback.print_exc()
-            raise
\ No newline at end of file
+            raise
+
+# ---------------------------
+# BULK INGESTION
+# ---------------------------
+def store_bulk_job(job_id: str, workers: int, items: list[dict]):
+    """
+    Store a bulk ingestion job and its items.
+
+    Each item is a dict with filename, content_type, image_key (of the image
+    staged in the media store) and manifest (dict of pipeline form fields).
+    """
+    import json
+    with get_connection() as conn:
+        try:
+            conn.execute(
+                "INSERT INTO bulk_jobs (id, status, workers, total_items) VALUES (?,?,?,?)",
+                (job_id, "queued", workers, len(items)),
+            )
+            for index, item in enumerate(items):
+                conn.execute(
+                    """INSERT INTO bulk_job_items
+                       (job_id, item_index, filename, content_type, image_key, manifest, status)
+                       VALUES (?,?,?,?,?,?,?)""",
+                    (
+                        job_id,
+                        index,
+                        item["filename"],
+                        item.get("content_type"),
+                        item["image_key"],
+                        json.dumps(item["manifest"]),
+                        "pending",
+                    ),
+                )
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to store bulk job {job_id} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def update_bulk_job_status(job_id: str, status: str, workers: int | None = None):
+    with get_connection() as conn:
+        try:
+            if workers is None:
+                conn.execute(
+                    "UPDATE bulk_jobs SET status = ?, updated_at = datetime('now') WHERE id = ?",
+                    (status, job_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE bulk_jobs SET status = ?, workers = ?, updated_at = datetime('now') WHERE id = ?",
+                    (status, workers, job_id),
+                )
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to update bulk job {job_id} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def update_bulk_job_item(job_id: str, item_index: int, status: str, uid: int | None = None, error: str | None = None, started: bool = False):
+    """Update the status of a bulk item; ``started`` also bumps the attempt counter."""
+    with get_connection() as conn:
+        try:
+            conn.execute(
+                f"""UPDATE bulk_job_items
+                   SET status = ?, uid = COALESCE(?, uid), error = ?,
+                       {"attempts = attempts + 1," if started else ""}
+                       updated_at = datetime('now')
+                   WHERE job_id = ? AND item_index = ?""",
+                (status, uid, error, job_id, item_index),
+            )
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to update bulk item {job_id}/{item_index} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def reset_bulk_job_items(job_id: str) -> int:
+    """Set every item of a job that has not succeeded back to pending; returns how many."""
+    with get_connection() as conn:
+        try:
+            cursor = conn.execute(
+                """UPDATE bulk_job_items
+                   SET status = 'pending', error = NULL, updated_at = datetime('now')
+                   WHERE job_id = ? AND status != 'succeeded'""",
+                (job_id,),
+            )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to reset bulk items of {job_id} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def get_bulk_job(job_id: str):
+    """Get a bulk job with per-item progress."""
+    with get_connection_readonly() as conn:
+        try:
+            row = conn.execute(
+                "SELECT id, status, workers, total_items, created_at, updated_at FROM bulk_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if not row:
+                return None
+            items = conn.execute(
+                """SELECT item_index, filename, status, uid, error, attempts, updated_at
+                   FROM bulk_job_items WHERE job_id = ? ORDER BY item_index""",
+                (job_id,),
+            ).fetchall()
+            return {**dict(row), "items": [dict(item) for item in items]}
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to fetch bulk job {job_id} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def get_bulk_job_item_payload(job_id: str, item_index: int):
+    """Get the staged image key and manifest needed to (re)run a bulk item."""
+    import json
+    with get_connection_readonly() as conn:
+        try:
+            row = conn.execute(
+                """SELECT filename, content_type, image_key, manifest
+                   FROM bulk_job_items WHERE job_id = ? AND item_index = ?""",
+                (job_id, item_index),
+            ).fetchone()
+            if not row:
+                return None
+            return {
+                "filename": row["filename"],
+                "content_type": row["content_type"],
+                "image_key": row["image_key"],
+                "manifest": json.loads(row["manifest"]),
+            }
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to fetch bulk item {job_id}/{item_index} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+# ---------------------------
+# TEXT ASSETS
+# ---------------------------
+def store_text_assets(uid: int, assets: dict, model: str):
+    """Store the combined text assets (thumbnail, banner, comic, email copy) for a product."""
+    import json
+    with get_connection() as conn:
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO text_assets (id, assets, model) VALUES (?, ?, ?)",
+                (uid, json.dumps(assets), model),
+            )
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to insert text_assets for uid={uid} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def get_text_assets(uid: int):
+    import json
+    with get_connection_readonly() as conn:
+        try:
+            row = conn.execute("SELECT assets FROM text_assets WHERE id = ?", (uid,)).fetchone()
+            return json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to fetch text_assets for uid={uid} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+# ---------------------------
+# GENERATED EMAIL
+# ---------------------------
+def store_generated_email(uid: int, subject: str, content: str):
+    with get_connection() as conn:
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO generated_email (id, subject, content) VALUES (?, ?, ?)",
+                (uid, subject, content),
+            )
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to insert/replace generated_email for uid={uid} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def get_generated_email(uid: int):
+    with get_connection_readonly() as conn:
+        try:
+            row = conn.execute(
+                "SELECT subject, content FROM generated_email WHERE id = ?", (uid,)
+            ).fetchone()
+            return {"id": uid, "subject": row[0], "content": row[1]} if row else None
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to fetch generated_email for uid={uid} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+# ---------------------------
+# ASSET VERSIONS
+# ---------------------------
+def bump_asset_version(uid: int, asset: str, quality: str) -> int:
+    """
+    Record that a new version of ``asset`` ("banner", "thumbnail", "comic",
+    "email") was stored for ``uid``, at ``quality`` ("draft" or "ai").
+    Returns the new version number.
+    """
+    with get_connection() as conn:
+        try:
+            conn.execute(
+                """
+                INSERT INTO asset_versions (id, asset, version, quality) VALUES (?, ?, 1, ?)
+                ON CONFLICT (id, asset) DO UPDATE SET
+                    version = version + 1,
+                    quality = excluded.quality,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (uid, asset, quality),
+            )
+            row = conn.execute(
+                "SELECT version FROM asset_versions WHERE id = ? AND asset = ?", (uid, asset)
+            ).fetchone()
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to bump asset_versions for uid={uid}, asset={asset} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def get_asset_versions(uid: int) -> dict:
+    with get_connection_readonly() as conn:
+        try:
+            rows = conn.execute(
+                "SELECT asset, version, quality, updated_at FROM asset_versions WHERE id = ?", (uid,)
+            ).fetchall()
+            return {
+                asset: {"version": version, "quality": quality, "updated_at": updated_at}
+                for asset, version, quality, updated_at in rows
+            }
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to fetch asset_versions for uid={uid} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+# ---------------------------
+# ARTIFACT INPUT HASHES
+# ---------------------------
+def store_artifact_hash(uid: int, artifact: str, input_hash: str):
+    with get_connection() as conn:
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO artifact_hashes (id, artifact, input_hash) VALUES (?, ?, ?)",
+                (uid, artifact, input_hash),
+            )
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to insert artifact_hashes for uid={uid}, artifact={artifact} with error={e}")
+            traceback.print_exc()
+            raise
+
+
+def get_artifact_hash(uid: int, artifact: str):
+    with get_connection_readonly() as conn:
+        try:
+            row = conn.execute(
+                "SELECT input_hash FROM artifact_hashes WHERE id = ? AND artifact = ?", (uid, artifact)
+            ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to fetch artifact_hashes for uid={uid}, artifact={artifact} with error={e}")
+            traceback.print_exc()
+            raise
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Checks for request deadlines (utils/deadline.py).
+No credentials or network needed; run directly or with pytest.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.deadline import (
+    MIN_TIMEOUT_SECONDS,
+    STAGES_CUT,
+    DeadlineExceeded,
+    bounded,
+    check,
+    current_deadline,
+    deadline_scope,
+    timeout_for,
+)
+
+
+def test_no_deadline_outside_a_scope():
+    assert current_deadline() is None
+    assert timeout_for(600.0) == 600.0
+    assert timeout_for(None) is None
+    check("anything")
+
+
+def test_allows_records_each_cut_once():
+    with deadline_scope(10) as deadline:
+        cuts = STAGES_CUT.get(stage="comic")
+        assert deadline.allows("thumbnail", min_seconds=5)
+        assert not deadline.allows("comic", min_seconds=60)
+        assert not deadline.allows("comic", min_seconds=60)
+        assert deadline.cut_stages == ["comic"]
+        assert STAGES_CUT.get(stage="comic") == cuts + 1
+
+
+def test_timeout_for_caps_at_the_budget_and_floors_at_the_minimum():
+    with deadline_scope(30):
+        assert 29 < timeout_for(600.0) <= 30
+        assert timeout_for(5.0) == 5.0
+        assert 29 < timeout_for(None) <= 30
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        assert timeout_for(600.0) == MIN_TIMEOUT_SECONDS
+
+
+def test_check_raises_once_the_budget_is_spent():
+    with deadline_scope(0.01) as deadline:
+        check("video.narration")
+        time.sleep(0.02)
+        try:
+            check("video.encode")
+        except DeadlineExceeded:
+            pass
+        else:
+            raise AssertionError("expected DeadlineExceeded")
+        assert deadline.cut_stages == ["video.encode"]
+
+
+def test_nested_scope_never_extends_the_outer_one():
+    with deadline_scope(1) as outer:
+        with deadline_scope(600) as inner:
+            assert inner is outer
+        with deadline_scope(0.5) as tighter:
+            assert tighter is not outer
+            assert tighter.remaining() <= 0.5
+        assert current_deadline() is outer
+    assert current_deadline() is None
+
+
+def test_bounded_cancels_and_records_the_stage():
+    cancelled = []
+
+    async def agent():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with deadline_scope(0.05) as deadline:
+            try:
+                await bounded("agent", agent())
+            except DeadlineExceeded:
+                return deadline.cut_stages
+        raise AssertionError("expected DeadlineExceeded")
+
+    assert asyncio.run(run()) == ["agent"]
+    assert cancelled
+
+
+def test_deadline_follows_into_threads():
+    async def run():
+        with deadline_scope(30) as deadline:
+            return deadline, await asyncio.to_thread(current_deadline)
+
+    deadline, seen = asyncio.run(run())
+    assert seen is deadline
+
+
+if __name__ == "__main__":
+    for name, check_ in list(globals().items()):
+        if name.startswith("test_"):
+            check_()
+            print(f"✅ {name}")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Checks for the priority bulkhead executors (utils/executors.py).
+No credentials or network needed; run directly or with pytest.
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.executors import (
+    BACKGROUND,
+    INTERACTIVE,
+    NORMAL,
+    BulkheadConfig,
+    BulkheadFull,
+    Bulkheads,
+    PriorityExecutor,
+    current_priority,
+    priority_scope,
+)
+
+
+def _blocked(executor: PriorityExecutor) -> threading.Event:
+    """Occupy the executor's only worker until the returned event is set."""
+    gate = threading.Event()
+    started = threading.Event()
+    executor.submit(lambda: (started.set(), gate.wait(5)))
+    assert started.wait(5)
+    return gate
+
+
+def test_queued_work_runs_in_priority_order():
+    executor = PriorityExecutor("test", workers=1)
+    gate = _blocked(executor)
+    order = []
+    futures = [
+        executor.submit(order.append, "normal-1"),
+        executor.submit(order.append, "background", priority=BACKGROUND),
+        executor.submit(order.append, "interactive", priority=INTERACTIVE),
+        executor.submit(order.append, "normal-2", priority=NORMAL),
+    ]
+    gate.set()
+    for future in futures:
+        future.result(5)
+    assert order == ["interactive", "normal-1", "normal-2", "background"]
+    executor.shutdown()
+
+
+def test_full_queue_rejects_and_does_not_run_the_call():
+    executor = PriorityExecutor("test", workers=1, max_queue=2)
+    gate = _blocked(executor)
+    ran = []
+    queued = [executor.submit(ran.append, i) for i in range(2)]
+    try:
+        executor.submit(ran.append, "rejected")
+    except BulkheadFull as e:
+        assert e.pool == "test"
+    else:
+        raise AssertionError("expected BulkheadFull")
+    gate.set()
+    for future in queued:
+        future.result(5)
+    assert ran == [0, 1]
+    executor.shutdown()
+
+
+def test_priority_scope_sets_the_default_priority():
+    executor = PriorityExecutor("test", workers=1)
+    gate = _blocked(executor)
+    order = []
+    with priority_scope(BACKGROUND):
+        assert current_priority() == BACKGROUND
+        scoped = executor.submit(order.append, "bulk item")
+        explicit = executor.submit(order.append, "explicit", priority=INTERACTIVE)
+    assert current_priority() == NORMAL
+    unscoped = executor.submit(order.append, "user")
+    gate.set()
+    for future in (scoped, explicit, unscoped):
+        future.result(5)
+    assert order == ["explicit", "user", "bulk item"]
+    executor.shutdown()
+
+
+def test_cancelled_work_is_skipped():
+    executor = PriorityExecutor("test", workers=1)
+    gate = _blocked(executor)
+    ran = []
+    cancelled = executor.submit(ran.append, "cancelled")
+    kept = executor.submit(ran.append, "kept")
+    assert cancelled.cancel()
+    gate.set()
+    kept.result(5)
+    assert ran == ["kept"]
+    executor.shutdown()
+
+
+def test_run_carries_context_variables():
+    request = contextvars.ContextVar("request", default=None)
+    pools = Bulkheads({"test": BulkheadConfig(workers=2)})
+
+    async def run():
+        request.set("uid-1")
+        with priority_scope(BACKGROUND):
+            return await pools.run("test", lambda: (request.get(), current_priority()))
+
+    assert asyncio.run(run()) == ("uid-1", BACKGROUND)
+    pools.shutdown()
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
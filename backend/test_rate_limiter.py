@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Checks for the adaptive AI rate limiter (utils/rate_limiter.py).
+No credentials or network needed; run directly or with pytest.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.rate_limiter import AdaptiveRateLimiter, ModelLimits, is_resource_exhausted
+
+MODEL = "test-model"
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+def _limiter(rate: float = 100.0, concurrency: int = 8) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter({MODEL: ModelLimits(requests_per_second=rate, max_concurrency=concurrency)})
+
+
+def _call(limiter: AdaptiveRateLimiter, error: Exception = None):
+    try:
+        with limiter.acquire_sync(MODEL):
+            if error is not None:
+                raise error
+    except Exception as e:
+        if e is not error:
+            raise
+
+
+def test_quota_error_is_detected_through_the_cause_chain():
+    assert is_resource_exhausted(QuotaError())
+    assert is_resource_exhausted(Exception("429 Too Many Requests"))
+    try:
+        try:
+            raise QuotaError()
+        except QuotaError as e:
+            raise RuntimeError("wrapped") from e
+    except RuntimeError as wrapped:
+        assert is_resource_exhausted(wrapped)
+    assert not is_resource_exhausted(ValueError("bad request"))
+
+
+def test_throttling_halves_limit_and_rate_and_drops_tokens():
+    limiter = _limiter(rate=100.0, concurrency=8)
+    _call(limiter, QuotaError())
+    state = limiter.snapshot()[MODEL]
+    assert state["concurrency_limit"] == 4
+    assert state["requests_per_second"] == 50.0
+    assert state["in_flight"] == 0
+    # No burst credit left: the next call has to wait for a token
+    assert limiter._slot(MODEL)._tokens <= 0.0
+
+
+def test_throttling_never_drops_below_the_floors():
+    limiter = _limiter(rate=100.0, concurrency=8)
+    for _ in range(10):
+        _call(limiter, QuotaError())
+    state = limiter.snapshot()[MODEL]
+    assert state["concurrency_limit"] == 1
+    assert state["requests_per_second"] == 10.0  # min_rate_fraction of 100
+
+
+def test_successes_raise_the_limit_additively_up_to_the_maximum():
+    limiter = _limiter(rate=1000.0, concurrency=8)
+    _call(limiter, QuotaError())
+    slot = limiter._slot(MODEL)
+    assert slot._limit == 4.0
+    # About one step per window of `limit` successful calls
+    for _ in range(4):
+        _call(limiter)
+    assert 4.8 < slot._limit < 5.0
+    for _ in range(100):
+        _call(limiter)
+    assert slot._limit == 8.0
+    assert slot._rate == 1000.0
+
+
+def test_other_errors_leave_the_limits_alone():
+    limiter = _limiter(rate=100.0, concurrency=8)
+    _call(limiter, ValueError("bad request"))
+    state = limiter.snapshot()[MODEL]
+    assert state["concurrency_limit"] == 8
+    assert state["requests_per_second"] == 100.0
+    assert state["in_flight"] == 0
+
+
+def test_concurrency_limit_holds_back_a_second_caller():
+    limiter = _limiter(rate=1000.0, concurrency=1)
+    inside = threading.Event()
+    release = threading.Event()
+    entered = []
+
+    def first():
+        with limiter.acquire_sync(MODEL):
+            inside.set()
+            release.wait(5)
+
+    def second():
+        with limiter.acquire_sync(MODEL):
+            entered.append(True)
+
+    a = threading.Thread(target=first)
+    a.start()
+    assert inside.wait(5)
+    b = threading.Thread(target=second)
+    b.start()
+    b.join(0.2)
+    assert not entered
+    release.set()
+    a.join(5)
+    b.join(5)
+    assert entered
+
+
+def test_async_acquire_releases_on_error():
+    limiter = _limiter()
+
+    async def run():
+        try:
+            async with limiter.acquire(MODEL):
+                raise QuotaError()
+        except QuotaError:
+            pass
+
+    asyncio.run(run())
+    state = limiter.snapshot()[MODEL]
+    assert state["in_flight"] == 0
+    assert state["concurrency_limit"] == 4
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Checks for single-flight request coalescing (utils/single_flight.py).
+No credentials or network needed; run directly or with pytest.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import single_flight as single_flight_module
+from utils.single_flight import SINGLE_FLIGHT_CALLS, LeaseLock, SingleFlight
+
+# Lease waits poll; keep them short here
+single_flight_module.LEASE_POLL_SECONDS = 0.01
+
+
+def _wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(True)
+        release.wait(5)
+        return "banner"
+
+    coalesced = SINGLE_FLIGHT_CALLS.get(operation="ad_banner", role="coalesced")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("ad_banner:1", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    # Everyone but the leader is waiting on it
+    _wait_for(lambda: SINGLE_FLIGHT_CALLS.get(operation="ad_banner", role="coalesced") == coalesced + 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == ["banner"] * 5
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise ValueError("model failed")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("comic:1", compute)
+        except ValueError as e:
+            errors.append(e)
+
+    coalesced = SINGLE_FLIGHT_CALLS.get(operation="comic", role="coalesced")
+    leader = threading.Thread(target=call)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    _wait_for(lambda: SINGLE_FLIGHT_CALLS.get(operation="comic", role="coalesced") == coalesced + 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+
+
+def test_nothing_is_kept_after_the_call():
+    flight = SingleFlight()
+    calls = []
+    flight.do("video:1", calls.append, 1)
+    flight.do("video:1", calls.append, 2)
+    assert calls == [1, 2]
+    assert not flight._calls
+
+
+def test_async_callers_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(True)
+        await asyncio.sleep(0.05)
+        return True
+
+    async def run():
+        return await asyncio.gather(*(flight.ado("video:2", compute) for _ in range(4)))
+
+    assert asyncio.run(run()) == [True] * 4
+    assert len(calls) == 1
+    assert not flight._tasks
+
+
+def test_contended_leader_reuses_the_other_processes_result():
+    path = os.path.join(tempfile.mkdtemp(), "leases.db")
+    other_process = LeaseLock(path)
+    flight = SingleFlight(LeaseLock(path))
+    assert other_process.try_acquire("ad_banner:3")
+
+    calls = []
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(
+            flight.do("ad_banner:3", lambda: calls.append(True) or "fresh", reuse=lambda: "stored")
+        )
+    )
+    thread.start()
+    time.sleep(0.05)
+    assert not results
+    other_process.release("ad_banner:3")
+    thread.join(5)
+    assert results == ["stored"]
+    assert not calls
+    # The lease is free again
+    assert other_process.try_acquire("ad_banner:3")
+
+
+def test_uncontended_leader_computes_and_empty_reuse_falls_through():
+    path = os.path.join(tempfile.mkdtemp(), "leases.db")
+    flight = SingleFlight(LeaseLock(path))
+    assert flight.do("ad_banner:4", lambda: "fresh", reuse=lambda: "stored") == "fresh"
+
+    other_process = LeaseLock(path)
+    assert other_process.try_acquire("ad_banner:4")
+    threading.Timer(0.05, other_process.release, ("ad_banner:4",)).start()
+    assert flight.do("ad_banner:4", lambda: "fresh", reuse=lambda: None) == "fresh"
+
+
+def test_expired_lease_is_taken_over():
+    path = os.path.join(tempfile.mkdtemp(), "leases.db")
+    crashed = LeaseLock(path, ttl_seconds=0.05)
+    assert crashed.try_acquire("video:5")
+    survivor = LeaseLock(path)
+    assert not survivor.try_acquire("video:5")
+    time.sleep(0.1)
+    assert survivor.try_acquire("video:5")
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
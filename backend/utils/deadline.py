@@ -0,0 +1,191 @@
+"""
+Request-scoped deadlines propagated across pipeline stages.
+
+A request opens a deadline scope with its total budget. Every stage and
+outbound call below it derives its timeout from the remaining budget instead
+of a fixed per-hop value, so a request fails (or degrades) within its budget
+rather than after the sum of all hop timeouts. The deadline lives in a
+context variable and therefore follows the request into ``asyncio`` tasks and
+``asyncio.to_thread`` workers.
+
+.. code-block:: python
+
+    from utils.deadline import deadline_scope, current_deadline, timeout_for
+
+    @router.post("/generateContent")
+    @deadline_scope(PIPELINE_DEADLINE_SECONDS)
+    async def generate_content(...):
+        resp = await client.post(url, timeout=timeout_for(600.0))
+
+        deadline = current_deadline()
+        if deadline.allows("comic", min_seconds=60):
+            create_comic(uid)
+        return {..., "cut_stages": deadline.cut_stages}
+
+Outside a scope there is no deadline: ``timeout_for`` returns its default and
+the checks always pass.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Total budget of one /artisan/generateContent run. It sits above the observed
+# p95 of the core stages (ingest, the agent hop, which alone may take 600s,
+# and the video), so a slow run gives up optional stages rather than failing
+PIPELINE_DEADLINE_SECONDS = float(os.getenv("PIPELINE_DEADLINE_SECONDS", "900"))
+# Shortest timeout handed to a client: SDKs treat 0 as "no time at all" or as
+# "no timeout", neither of which is what a spent budget should mean
+MIN_TIMEOUT_SECONDS = 1.0
+
+STAGES_CUT = REGISTRY.counter(
+    "artisan_deadline_stages_cut_total",
+    "Stages skipped or downgraded to a fallback because the request deadline ran low.",
+    ("stage",),
+)
+
+_current: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage cannot run within the remaining request budget."""
+
+
+class Deadline:
+    """Absolute expiry time plus the stages cut to stay within it."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.cut_stages: List[str] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """Remaining budget, capped at ``default`` when one is given."""
+        remaining = self.remaining()
+        return remaining if default is None else min(default, remaining)
+
+    def cut(self, stage: str) -> None:
+        """Record that ``stage`` was skipped or downgraded."""
+        with self._lock:
+            if stage in self.cut_stages:
+                return
+            self.cut_stages.append(stage)
+        STAGES_CUT.inc(stage=stage)
+        logger.warning(f"Deadline: cut '{stage}' with {self.remaining():.1f}s of {self.seconds:g}s left")
+
+    def allows(self, stage: str, min_seconds: float) -> bool:
+        """Whether ``stage`` (needing about ``min_seconds``) still fits; records a cut if not."""
+        if self.remaining() >= min_seconds:
+            return True
+        self.cut(stage)
+        return False
+
+    def check(self, stage: str) -> None:
+        """Raise :class:`DeadlineExceeded` (and record a cut) once the budget is spent."""
+        if self.expired:
+            self.cut(stage)
+            raise DeadlineExceeded(f"Request deadline of {self.seconds:g}s exceeded before '{stage}'")
+
+
+class deadline_scope:
+    """
+    Context manager / decorator that sets the request deadline.
+
+    A nested scope never extends an enclosing one: if the outer deadline
+    expires first, the outer deadline stays in effect.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._token = None
+
+    def __enter__(self) -> Deadline:
+        outer = _current.get()
+        if outer is not None and outer.remaining() <= self.seconds:
+            deadline = outer
+        else:
+            deadline = Deadline(self.seconds)
+        self._token = _current.set(deadline)
+        return deadline
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+    def __call__(self, func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with deadline_scope(self.seconds):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with deadline_scope(self.seconds):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    """Remaining request budget in seconds, or None outside a deadline scope."""
+    deadline = _current.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def timeout_for(default: Optional[float]) -> Optional[float]:
+    """
+    Timeout for an outbound call: ``default`` capped at the remaining budget,
+    but never below :data:`MIN_TIMEOUT_SECONDS`.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    return max(MIN_TIMEOUT_SECONDS, deadline.timeout(default))
+
+
+def check(stage: str) -> None:
+    """:meth:`Deadline.check` on the current deadline, if any."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+async def bounded(stage: str, awaitable):
+    """
+    Await ``awaitable`` within the remaining budget.
+
+    Raises:
+        DeadlineExceeded: the budget ran out first (the awaitable is cancelled)
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=deadline.remaining())
+    except asyncio.TimeoutError as e:
+        deadline.cut(stage)
+        raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded during '{stage}'") from e
@@ -0,0 +1,263 @@
+"""
+Named bulkhead executors with priority ordering.
+
+Blocking work runs on one of a few dedicated thread pools instead of a shared
+one, so a burst of multi-minute generation jobs can only exhaust its own pool
+and never queues the cheap catalog reads behind it:
+
+    interactive  storage reads behind pages and polling endpoints
+    ai           model calls and the asset generators built on them
+    media        waiting on the media worker (encodes, compositing)
+    uploads      GCS uploads of user media
+
+Within a pool, queued work runs in priority order (lower first, FIFO among
+equals), so e.g. a user waiting on a banner goes ahead of background preview
+upgrades.
+
+.. code-block:: python
+
+    from utils.executors import BACKGROUND, bulkhead, bulkheads, priority_scope
+
+    @router.get("/story/{uid}")
+    @bulkhead("interactive")
+    def get_story_endpoint(uid: int): ...
+
+    uri = await bulkheads.run("uploads", upload_to_gcs, file)
+    await bulkheads.run("ai", upgrade_assets, uid, priority=BACKGROUND)
+
+    # Everything submitted below (from tasks and executor threads started
+    # here too) runs at BACKGROUND unless it asks for its own priority
+    with priority_scope(BACKGROUND):
+        await generate_content(...)
+
+Pool sizes and queue limits are set with ``EXECUTOR_<NAME>_WORKERS`` and
+``EXECUTOR_<NAME>_MAX_QUEUE`` (0 = unbounded). A submission to a full queue
+raises :class:`BulkheadFull`, which the app turns into a 503.
+"""
+
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower runs first)
+INTERACTIVE = 0
+NORMAL = 50
+BACKGROUND = 100
+
+EXECUTOR_QUEUE_DEPTH = REGISTRY.gauge(
+    "artisan_executor_queue_depth",
+    "Tasks queued on a bulkhead executor, not yet running.",
+    ("pool",),
+)
+EXECUTOR_ACTIVE = REGISTRY.gauge(
+    "artisan_executor_active_threads",
+    "Bulkhead executor threads currently running a task.",
+    ("pool",),
+)
+EXECUTOR_QUEUE_WAIT = REGISTRY.histogram(
+    "artisan_executor_queue_wait_seconds",
+    "Time tasks waited in a bulkhead queue before starting.",
+    ("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+EXECUTOR_REJECTED = REGISTRY.counter(
+    "artisan_executor_rejected_total",
+    "Tasks rejected because a bulkhead queue was full.",
+    ("pool",),
+)
+
+
+_scope_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "bulkhead_priority", default=None
+)
+
+
+@contextmanager
+def priority_scope(priority: int):
+    """Default priority of every submission made in this context (see the module docstring)."""
+    token = _scope_priority.set(priority)
+    try:
+        yield
+    finally:
+        _scope_priority.reset(token)
+
+
+def current_priority(default: int = NORMAL) -> int:
+    """Priority set by the innermost :func:`priority_scope`, else ``default``."""
+    priority = _scope_priority.get()
+    return default if priority is None else priority
+
+
+class BulkheadFull(RuntimeError):
+    """Raised when a bulkhead's queue is at its limit."""
+
+    def __init__(self, pool: str):
+        super().__init__(f"Executor '{pool}' is at capacity")
+        self.pool = pool
+
+
+@dataclass
+class BulkheadConfig:
+    workers: int
+    max_queue: int = 0
+    priority: int = NORMAL
+
+
+class PriorityExecutor(Executor):
+    """Fixed-size thread pool whose queue is ordered by priority."""
+
+    def __init__(self, name: str, workers: int, max_queue: int = 0, priority: int = NORMAL):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.priority = priority
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._shutdown = False
+
+    def _start_thread(self) -> None:
+        # Threads are started on demand, up to ``workers``
+        thread = threading.Thread(
+            target=self._worker, name=f"{self.name}-{len(self._threads)}", daemon=True
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def submit(self, fn: Callable, /, *args, priority: Optional[int] = None, **kwargs) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError(f"Executor '{self.name}' is shut down")
+            if self.max_queue and len(self._queue) >= self.max_queue:
+                EXECUTOR_REJECTED.inc(pool=self.name)
+                raise BulkheadFull(self.name)
+            if priority is None:
+                priority = _scope_priority.get()
+            entry = (
+                self.priority if priority is None else priority,
+                next(self._sequence),
+                time.perf_counter(),
+                future,
+                functools.partial(fn, *args, **kwargs),
+            )
+            heapq.heappush(self._queue, entry)
+            EXECUTOR_QUEUE_DEPTH.set(len(self._queue), pool=self.name)
+            if len(self._threads) < self.workers:
+                self._start_thread()
+            self._cond.notify()
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._shutdown:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                _, _, queued_at, future, call = heapq.heappop(self._queue)
+                EXECUTOR_QUEUE_DEPTH.set(len(self._queue), pool=self.name)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            EXECUTOR_QUEUE_WAIT.observe(time.perf_counter() - queued_at, pool=self.name)
+            EXECUTOR_ACTIVE.inc(pool=self.name)
+            try:
+                result = call()
+            except BaseException as e:
+                EXECUTOR_ACTIVE.dec(pool=self.name)
+                future.set_exception(e)
+            else:
+                EXECUTOR_ACTIVE.dec(pool=self.name)
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                for entry in self._queue:
+                    entry[3].cancel()
+                self._queue.clear()
+                EXECUTOR_QUEUE_DEPTH.set(0, pool=self.name)
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+def _config(name: str, default: BulkheadConfig) -> BulkheadConfig:
+    prefix = f"EXECUTOR_{name.upper()}_"
+    return BulkheadConfig(
+        workers=int(os.getenv(prefix + "WORKERS", str(default.workers))),
+        max_queue=int(os.getenv(prefix + "MAX_QUEUE", str(default.max_queue))),
+        priority=default.priority,
+    )
+
+
+DEFAULT_BULKHEADS: Dict[str, BulkheadConfig] = {
+    "interactive": BulkheadConfig(workers=16, max_queue=0, priority=INTERACTIVE),
+    "ai": BulkheadConfig(workers=8, max_queue=64, priority=NORMAL),
+    "media": BulkheadConfig(workers=8, max_queue=32, priority=NORMAL),
+    "uploads": BulkheadConfig(workers=4, max_queue=64, priority=NORMAL),
+}
+
+
+class Bulkheads:
+    """Registry of the named executors."""
+
+    def __init__(self, configs: Dict[str, BulkheadConfig]):
+        self._executors = {
+            name: PriorityExecutor(name, cfg.workers, cfg.max_queue, cfg.priority)
+            for name, cfg in ((name, _config(name, cfg)) for name, cfg in configs.items())
+        }
+
+    def get(self, name: str) -> PriorityExecutor:
+        try:
+            return self._executors[name]
+        except KeyError:
+            raise KeyError(f"Unknown executor '{name}'") from None
+
+    async def run(self, name: str, fn: Callable, *args, priority: Optional[int] = None, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on executor ``name`` and await its result.
+        Context variables (e.g. the request deadline) follow the call, as with
+        ``asyncio.to_thread``.
+        """
+        ctx = contextvars.copy_context()
+        future = self.get(name).submit(ctx.run, fn, *args, priority=priority, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+bulkheads = Bulkheads(DEFAULT_BULKHEADS)
+
+
+def bulkhead(name: str, priority: Optional[int] = None):
+    """
+    Decorator turning a blocking endpoint into an async one that runs on
+    executor ``name`` instead of the default threadpool.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await bulkheads.run(name, func, *args, priority=priority, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+"""
+Shared keep-alive HTTP clients for outbound service calls.
+
+One ``httpx.AsyncClient`` per downstream service (classifier, artisan agent,
+email bot, YouTube) is opened in the app lifespan and reused by every request,
+so calls skip the TCP/TLS handshake and can multiplex over HTTP/2 when the
+``h2`` package is installed.
+
+.. code-block:: python
+
+    from utils.http_clients import http_clients
+
+    client = http_clients.get("classifier")
+    resp = await client.post(url, files=payload, timeout=http_clients.timeout("classifier"))
+
+Per-request timeouts from :meth:`HttpClientPool.timeout` are capped at the
+remaining request deadline (``utils.deadline``). Outside the app (scripts, tests) clients are created lazily on first use.
+"""
+
+import asyncio
+import importlib.util
+import logging
+from dataclasses import dataclass
+from typing import Dict
+
+import httpx
+
+from utils.deadline import timeout_for
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class ServiceClientConfig:
+    timeout: float
+    connect_timeout: float = 10.0
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    follow_redirects: bool = False
+
+
+SERVICE_CONFIGS: Dict[str, ServiceClientConfig] = {
+    # Model inference on the classifier and the agent can take minutes
+    "classifier": ServiceClientConfig(timeout=600.0),
+    "artisan_agent": ServiceClientConfig(timeout=600.0),
+    "email": ServiceClientConfig(timeout=600.0),
+    "youtube": ServiceClientConfig(timeout=10.0, max_connections=10, max_keepalive_connections=5),
+}
+
+
+class HttpClientPool:
+    """Lazily created, lifespan-closed ``httpx.AsyncClient`` per service."""
+
+    def __init__(self, configs: Dict[str, ServiceClientConfig]):
+        self.configs = configs
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _create(self, service: str) -> httpx.AsyncClient:
+        config = self.configs.get(service)
+        if config is None:
+            raise KeyError(f"No HTTP client configured for service '{service}'")
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            follow_redirects=config.follow_redirects,
+        )
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        client = self._clients.get(service)
+        if client is None or client.is_closed:
+            client = self._create(service)
+            self._clients[service] = client
+        return client
+
+    def timeout(self, service: str) -> httpx.Timeout:
+        """Per-request timeout for ``service``: its configured timeout capped at the request deadline."""
+        config = self.configs[service]
+        total = timeout_for(config.timeout)
+        return httpx.Timeout(total, connect=min(config.connect_timeout, total))
+
+    async def start(self) -> None:
+        """Open a client for every configured service."""
+        for service in self.configs:
+            self.get(service)
+        logger.info(
+            f"HTTP client pool started for {', '.join(self.configs)} (http2={HTTP2_AVAILABLE})"
+        )
+
+    async def aclose(self) -> None:
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+
+http_clients = HttpClientPool(SERVICE_CONFIGS)
+
@@ -0,0 +1,225 @@
+"""
+Disk-backed cache for LLM text responses.
+
+Call sites opt in by wrapping their model call; the response text is stored
+in a local SQLite file (not the synced ``app.db``) keyed by a hash of model,
+prompt and generation config, so identical requests are answered from disk
+across requests and restarts.
+
+.. code-block:: python
+
+    from utils.llm_cache import llm_cache
+
+    text = llm_cache.cached(
+        "thumbnail_text", MODEL_NAME, prompt,
+        lambda: model.generate_content(prompt).text,
+        config={"temperature": 0.7},
+    )
+
+    text = await llm_cache.acached("inventory", MODEL_NAME, prompt, produce_async)
+
+Entries expire after ``LLM_CACHE_TTL_SECONDS`` (per call site overridable) and
+the least recently used ones are evicted beyond ``LLM_CACHE_MAX_ENTRIES`` /
+``LLM_CACHE_MAX_BYTES``. ``LLM_CACHE_ENABLED=0`` turns the cache off, and
+``LLM_CACHE_DISABLED_NAMESPACES`` turns it off for individual call sites.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "llm_cache.db")
+)
+DEFAULT_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "artisan_llm_cache_requests_total",
+    "LLM cache lookups by call site and result (hit, miss, expired).",
+    ("namespace", "result"),
+)
+CACHE_EVICTIONS = REGISTRY.counter(
+    "artisan_llm_cache_evictions_total", "LLM cache entries removed by TTL or size limits."
+)
+CACHE_ENTRIES = REGISTRY.gauge("artisan_llm_cache_entries", "Entries currently in the LLM cache.")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_cache (last_accessed);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_expires_at ON llm_cache (expires_at);
+"""
+
+
+def cache_key(model: str, prompt: str, config: Optional[dict] = None) -> str:
+    """Stable hash of everything that determines a model's output."""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "config": config or {}},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed LLM response cache with TTL and LRU size eviction."""
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        enabled: bool = True,
+        disabled_namespaces: tuple = (),
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.disabled_namespaces = set(disabled_namespaces)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            CACHE_ENTRIES.set(conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0])
+        return self._conn
+
+    def is_enabled(self, namespace: str) -> bool:
+        return self.enabled and namespace not in self.disabled_namespaces
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    CACHE_REQUESTS.inc(namespace=namespace, result="miss")
+                    return None
+                response, expires_at = row
+                if expires_at <= now:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    CACHE_EVICTIONS.inc()
+                    CACHE_ENTRIES.dec()
+                    CACHE_REQUESTS.inc(namespace=namespace, result="expired")
+                    return None
+                conn.execute("UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key))
+                conn.commit()
+        except sqlite3.Error as e:
+            # A broken cache must never break generation
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+        CACHE_REQUESTS.inc(namespace=namespace, result="hit")
+        return response
+
+    def set(self, namespace: str, key: str, model: str, response: str, ttl_seconds: Optional[float] = None) -> None:
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        size = len(response.encode("utf-8"))
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, namespace, model, response, size, created_at, expires_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, namespace, model, response, size, now, now + ttl, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+                CACHE_ENTRIES.set(conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0])
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        removed = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        # Drop least recently used entries until both limits hold
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_accessed").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            removed += 1
+        if removed:
+            CACHE_EVICTIONS.inc(removed)
+
+    def cached(
+        self,
+        namespace: str,
+        model: str,
+        prompt: str,
+        produce: Callable[[], str],
+        config: Optional[dict] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> str:
+        """Return the cached response for this request, or call ``produce()`` and store it."""
+        if not self.is_enabled(namespace):
+            return produce()
+        key = cache_key(model, prompt, config)
+        response = self.get(namespace, key)
+        if response is not None:
+            return response
+        response = produce()
+        if response:
+            self.set(namespace, key, model, response, ttl_seconds)
+        return response
+
+    async def acached(
+        self,
+        namespace: str,
+        model: str,
+        prompt: str,
+        produce: Callable[[], Awaitable[str]],
+        config: Optional[dict] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> str:
+        """Async variant of :meth:`cached` for coroutine producers."""
+        if not self.is_enabled(namespace):
+            return await produce()
+        key = cache_key(model, prompt, config)
+        response = self.get(namespace, key)
+        if response is not None:
+            return response
+        response = await produce()
+        if response:
+            self.set(namespace, key, model, response, ttl_seconds)
+        return response
+
+
+llm_cache = LLMCache(
+    enabled=os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False"),
+    disabled_namespaces=tuple(
+        ns.strip() for ns in os.getenv("LLM_CACHE_DISABLED_NAMESPACES", "").split(",") if ns.strip()
+    ),
+)
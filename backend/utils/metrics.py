@@ -0,0 +1,360 @@
+"""
+In-process metrics for the backend, exposed in Prometheus text format.
+
+The registry is deliberately dependency-free: counters, gauges and
+histograms are kept in plain dicts guarded by a lock, and ``render()``
+produces the text exposition format (version 0.0.4) served at ``/metrics``.
+
+Typical usage:
+
+.. code-block:: python
+
+    from utils.metrics import track_stage, track_external, track_storage
+
+    with track_stage("classification"):
+        ...
+
+    @track_external("gemini", "comic_story")
+    def generate_story(...):
+        ...
+
+    async with track_storage("gcs_upload"):
+        ...
+"""
+
+import asyncio
+import functools
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Generation steps range from milliseconds (DB reads) to several minutes
+# (agent call, video encode), so the buckets cover both ends.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+
+def _escape_label_value(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.extend(f'{name}="{_escape_label_value(value)}"' for name, value in extra.items())
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. number of errors."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. number of in-flight calls."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies) over fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        buckets = sorted(float(b) for b in buckets)
+        if not buckets or not math.isinf(buckets[-1]):
+            buckets.append(math.inf)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(
+                (key, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]})
+                for key, s in self._values.items()
+            )
+        for key, state in items:
+            cumulative = 0
+            for upper, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(upper)})
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(state['sum'])}"
+            yield f"{self.name}_count{labels} {state['count']}"
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric '{metric.name}' already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ---------------------------
+# Standard metrics
+# ---------------------------
+STAGE_DURATION = REGISTRY.histogram(
+    "artisan_stage_duration_seconds", "Latency of pipeline stages.", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "artisan_stage_errors_total", "Pipeline stages that raised an exception.", ("stage",)
+)
+STAGE_IN_FLIGHT = REGISTRY.gauge(
+    "artisan_stage_in_flight", "Pipeline stages currently executing.", ("stage",)
+)
+
+EXTERNAL_DURATION = REGISTRY.histogram(
+    "artisan_external_call_duration_seconds",
+    "Latency of calls to external services.",
+    ("service", "operation"),
+)
+EXTERNAL_ERRORS = REGISTRY.counter(
+    "artisan_external_call_errors_total",
+    "External service calls that raised an exception.",
+    ("service", "operation"),
+)
+EXTERNAL_IN_FLIGHT = REGISTRY.gauge(
+    "artisan_external_calls_in_flight",
+    "External service calls currently waiting for a response.",
+    ("service", "operation"),
+)
+
+STORAGE_DURATION = REGISTRY.histogram(
+    "artisan_storage_operation_duration_seconds",
+    "Latency of database and object storage operations.",
+    ("operation",),
+)
+STORAGE_ERRORS = REGISTRY.counter(
+    "artisan_storage_operation_errors_total",
+    "Storage operations that raised an exception.",
+    ("operation",),
+)
+STORAGE_IN_FLIGHT = REGISTRY.gauge(
+    "artisan_storage_operations_in_flight",
+    "Storage operations currently executing.",
+    ("operation",),
+)
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "artisan_http_request_duration_seconds",
+    "Latency of HTTP requests served by the API.",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "artisan_http_requests_in_flight", "HTTP requests currently being served.", ("method",)
+)
+
+
+class _Timer:
+    """
+    Times a block of code into a histogram / error counter / in-flight gauge
+    triple. Works as a sync or async context manager and as a decorator for
+    both plain and coroutine functions.
+    """
+
+    def __init__(self, histogram: Histogram, errors: Counter, in_flight: Gauge, labels: Dict[str, str]):
+        self._histogram = histogram
+        self._errors = errors
+        self._in_flight = in_flight
+        self._labels = labels
+        self._start: Optional[float] = None
+
+    def _copy(self) -> "_Timer":
+        return _Timer(self._histogram, self._errors, self._in_flight, self._labels)
+
+    def __enter__(self):
+        self._in_flight.inc(**self._labels)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self._in_flight.dec(**self._labels)
+        self._histogram.observe(elapsed, **self._labels)
+        if exc_type is not None:
+            self._errors.inc(**self._labels)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def __call__(self, func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with self._copy():
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._copy():
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def track_stage(stage: str) -> _Timer:
+    """Time a pipeline stage (classification, agent, comic, video, ...)."""
+    return _Timer(STAGE_DURATION, STAGE_ERRORS, STAGE_IN_FLIGHT, {"stage": stage})
+
+
+def track_external(service: str, operation: str = "call") -> _Timer:
+    """Time a call to an external service (gemini, imagen, tts, youtube, ...)."""
+    return _Timer(
+        EXTERNAL_DURATION,
+        EXTERNAL_ERRORS,
+        EXTERNAL_IN_FLIGHT,
+        {"service": service, "operation": operation},
+    )
+
+
+def track_storage(operation: str) -> _Timer:
+    """Time a database or object storage operation."""
+    return _Timer(STORAGE_DURATION, STORAGE_ERRORS, STORAGE_IN_FLIGHT, {"operation": operation})
+
+
+def render_latest() -> str:
+    """Render all registered metrics in Prometheus text format."""
+    return REGISTRY.render()
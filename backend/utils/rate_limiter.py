@@ -0,0 +1,264 @@
+"""
+Process-wide adaptive rate limiter for Google AI calls.
+
+Every model gets a token bucket (requests per second) and an AIMD
+concurrency limit: each successful call raises the limit additively, each
+quota error (``ResourceExhausted`` / HTTP 429) cuts it multiplicatively and
+slows the bucket down, so callers back off together instead of each one
+discovering the quota on its own.
+
+.. code-block:: python
+
+    from utils.rate_limiter import ai_rate_limiter
+
+    with ai_rate_limiter.acquire_sync("gemini-2.5-flash"):
+        resp = model.generate_content(prompt)
+
+    async with ai_rate_limiter.acquire("gemini-2.5-pro"):
+        result = await chain.ainvoke(...)
+
+Limits can be overridden with ``AI_RATE_LIMITS``, a comma separated list of
+``model=requests_per_second:max_concurrency`` entries.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.api_core.exceptions import ResourceExhausted
+except Exception:  # pragma: no cover - google-api-core is optional here
+    ResourceExhausted = None
+
+RATE_LIMIT_WAIT = REGISTRY.histogram(
+    "artisan_ai_rate_limit_wait_seconds",
+    "Time spent waiting for an AI rate limiter slot.",
+    ("model",),
+)
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "artisan_ai_concurrency_limit", "Current AIMD concurrency limit per model.", ("model",)
+)
+REQUEST_RATE = REGISTRY.gauge(
+    "artisan_ai_request_rate", "Current token bucket refill rate (requests/s) per model.", ("model",)
+)
+THROTTLED = REGISTRY.counter(
+    "artisan_ai_throttled_total", "Quota errors (429 / ResourceExhausted) per model.", ("model",)
+)
+
+# Polling interval for async waiters; sync waiters use a condition variable.
+_ASYNC_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class ModelLimits:
+    requests_per_second: float
+    max_concurrency: int
+    min_concurrency: int = 1
+    # Fraction of the configured rate the bucket may drop to after throttling
+    min_rate_fraction: float = 0.1
+    additive_increase: float = 1.0
+    multiplicative_decrease: float = 0.5
+
+
+DEFAULT_LIMITS = ModelLimits(requests_per_second=1.0, max_concurrency=4)
+
+MODEL_LIMITS: Dict[str, ModelLimits] = {
+    "gemini-2.5-flash": ModelLimits(requests_per_second=2.0, max_concurrency=8),
+    "gemini-2.0-flash-exp": ModelLimits(requests_per_second=1.0, max_concurrency=4),
+    "gemini-2.5-pro": ModelLimits(requests_per_second=0.5, max_concurrency=2),
+    "gemini-1.5-pro": ModelLimits(requests_per_second=0.5, max_concurrency=2),
+    "gemini-2.5-flash-image-preview": ModelLimits(requests_per_second=0.5, max_concurrency=2),
+    "imagen-3.0-generate-002": ModelLimits(requests_per_second=0.5, max_concurrency=2),
+    "imagen-3.0-fast-generate-001": ModelLimits(requests_per_second=1.0, max_concurrency=4),
+    # Cloud Text-to-Speech, shared by all voices
+    "cloud-tts": ModelLimits(requests_per_second=5.0, max_concurrency=8),
+}
+
+
+def _limits_from_env(value: Optional[str]) -> Dict[str, ModelLimits]:
+    overrides = {}
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            model, spec = entry.split("=", 1)
+            rate, concurrency = spec.split(":", 1)
+            overrides[model.strip()] = ModelLimits(
+                requests_per_second=float(rate), max_concurrency=int(concurrency)
+            )
+        except ValueError:
+            logger.warning(f"Ignoring malformed AI_RATE_LIMITS entry: {entry}")
+    return overrides
+
+
+def is_resource_exhausted(error: BaseException) -> bool:
+    """True if the error (or its cause) is a quota / 429 response."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if ResourceExhausted is not None and isinstance(error, ResourceExhausted):
+            return True
+        for attr in ("code", "status_code"):
+            code = getattr(error, attr, None)
+            if code in (429, "429", "RESOURCE_EXHAUSTED"):
+                return True
+        message = str(error)
+        if "RESOURCE_EXHAUSTED" in message or message.startswith("429"):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class _ModelSlot:
+    """Token bucket plus AIMD concurrency limit for a single model."""
+
+    def __init__(self, model: str, limits: ModelLimits):
+        self.model = model
+        self.limits = limits
+        self._cond = threading.Condition()
+        self._rate = limits.requests_per_second
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._limit = float(limits.max_concurrency)
+        self._in_flight = 0
+        self._publish()
+
+    def _publish(self):
+        CONCURRENCY_LIMIT.set(int(self._limit), model=self.model)
+        REQUEST_RATE.set(self._rate, model=self.model)
+
+    def _refill(self, now: float):
+        capacity = max(1.0, self._rate)
+        self._tokens = min(capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def _try_acquire(self) -> float:
+        """Take a slot if possible. Returns 0 on success, else seconds to wait."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if self._in_flight >= int(self._limit):
+                return _ASYNC_POLL_INTERVAL
+            if self._tokens < 1.0:
+                return (1.0 - self._tokens) / self._rate
+            self._tokens -= 1.0
+            self._in_flight += 1
+            return 0.0
+
+    def wait_sync(self):
+        while True:
+            delay = self._try_acquire()
+            if delay == 0.0:
+                return
+            with self._cond:
+                self._cond.wait(timeout=delay)
+
+    async def wait_async(self):
+        while True:
+            delay = self._try_acquire()
+            if delay == 0.0:
+                return
+            await asyncio.sleep(delay)
+
+    def release(self, throttled: bool = False, succeeded: bool = False):
+        with self._cond:
+            self._in_flight -= 1
+            limits = self.limits
+            if throttled:
+                self._limit = max(float(limits.min_concurrency), self._limit * limits.multiplicative_decrease)
+                self._rate = max(
+                    limits.requests_per_second * limits.min_rate_fraction,
+                    self._rate * limits.multiplicative_decrease,
+                )
+                # Drop any burst credit so the next call really waits
+                self._tokens = min(self._tokens, 0.0)
+            elif succeeded:
+                # Additive increase per "window" of calls at the current limit
+                self._limit = min(float(limits.max_concurrency), self._limit + limits.additive_increase / self._limit)
+                self._rate = min(
+                    limits.requests_per_second,
+                    self._rate + limits.requests_per_second * 0.1 * limits.additive_increase,
+                )
+            self._publish()
+            self._cond.notify_all()
+
+
+class AdaptiveRateLimiter:
+    """Per-model token buckets with AIMD concurrency, shared by the process."""
+
+    def __init__(self, limits: Optional[Dict[str, ModelLimits]] = None, default: ModelLimits = DEFAULT_LIMITS):
+        self._limits = dict(limits or {})
+        self._default = default
+        self._slots: Dict[str, _ModelSlot] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, model: str) -> _ModelSlot:
+        with self._lock:
+            slot = self._slots.get(model)
+            if slot is None:
+                slot = _ModelSlot(model, self._limits.get(model, self._default))
+                self._slots[model] = slot
+            return slot
+
+    def _finish(self, slot: _ModelSlot, error: Optional[BaseException]):
+        throttled = error is not None and is_resource_exhausted(error)
+        if throttled:
+            THROTTLED.inc(model=slot.model)
+            logger.warning(f"Quota exhausted for {slot.model}, backing off")
+        slot.release(throttled=throttled, succeeded=error is None)
+
+    @contextmanager
+    def acquire_sync(self, model: str):
+        """Block the calling thread until ``model`` may be called."""
+        slot = self._slot(model)
+        start = time.perf_counter()
+        slot.wait_sync()
+        RATE_LIMIT_WAIT.observe(time.perf_counter() - start, model=model)
+        try:
+            yield
+        except BaseException as e:
+            self._finish(slot, e)
+            raise
+        self._finish(slot, None)
+
+    @asynccontextmanager
+    async def acquire(self, model: str):
+        """Wait (without blocking the event loop) until ``model`` may be called."""
+        slot = self._slot(model)
+        start = time.perf_counter()
+        await slot.wait_async()
+        RATE_LIMIT_WAIT.observe(time.perf_counter() - start, model=model)
+        try:
+            yield
+        except BaseException as e:
+            self._finish(slot, e)
+            raise
+        self._finish(slot, None)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Current limits, for debugging endpoints and logs."""
+        with self._lock:
+            slots = list(self._slots.values())
+        return {
+            slot.model: {
+                "concurrency_limit": int(slot._limit),
+                "in_flight": slot._in_flight,
+                "requests_per_second": slot._rate,
+            }
+            for slot in slots
+        }
+
+
+ai_rate_limiter = AdaptiveRateLimiter(
+    {**MODEL_LIMITS, **_limits_from_env(os.getenv("AI_RATE_LIMITS"))}
+)
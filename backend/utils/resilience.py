@@ -0,0 +1,373 @@
+"""
+Circuit breakers and hedged requests for external AI services.
+
+Each external dependency (``imagen``, ``gemini``, ``gemini_image``) has one
+process-wide :class:`ResilientDependency`. It keeps a circuit breaker over a
+rolling window of calls: when too many calls fail or are slower than the
+dependency's latency threshold, the circuit opens and callers go straight to
+their local fallback instead of each waiting out the full timeout. After a
+cool-down a few probe calls are let through (half-open) to detect recovery.
+
+Optionally a dependency can hedge: if the first request has not answered by
+the observed p95 latency, a second identical request is started and the first
+successful answer wins.
+
+.. code-block:: python
+
+    from utils.resilience import get_dependency
+
+    imagen = get_dependency("imagen")
+    image = imagen.call(generate_remote, prompt, fallback=lambda: placeholder())
+
+Thresholds can be tuned per dependency with environment variables, e.g.
+``CIRCUIT_IMAGEN_FAILURE_RATE=0.5`` or ``CIRCUIT_IMAGEN_SLOW_CALL_SECONDS=30``;
+hedging is enabled with ``HEDGED_DEPENDENCIES=imagen,gemini``.
+
+Inside a request deadline scope (see ``utils.deadline``) a call is never
+waited on past the remaining budget: it is answered by the fallback instead
+and the dependency is reported as a cut stage.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional
+
+from utils.deadline import Deadline, DeadlineExceeded, current_deadline
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    "artisan_circuit_state",
+    "Circuit breaker state per dependency (0=closed, 1=half-open, 2=open).",
+    ("dependency",),
+)
+SHORT_CIRCUITED = REGISTRY.counter(
+    "artisan_circuit_short_circuited_total",
+    "Calls routed straight to the fallback because the circuit was open.",
+    ("dependency",),
+)
+FALLBACKS = REGISTRY.counter(
+    "artisan_dependency_fallbacks_total",
+    "Calls answered by the local fallback (error or open circuit).",
+    ("dependency",),
+)
+HEDGED = REGISTRY.counter(
+    "artisan_hedged_requests_total",
+    "Hedged second requests, by which request answered first.",
+    ("dependency", "winner"),
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a dependency is short-circuited and no fallback was given."""
+
+
+def is_dependency_failure(error: BaseException) -> bool:
+    """
+    Whether an error says something about the dependency's health.
+
+    Client errors (unknown model, invalid prompt, permission denied) are the
+    caller's problem and must not open the circuit; quota errors (429),
+    server errors and timeouts do.
+    """
+    code = getattr(error, "code", None)
+    if callable(code):  # grpc errors expose code() instead of an HTTP status
+        code = None
+    if isinstance(code, int) and 400 <= code < 500 and code != 429:
+        return False
+    return True
+
+
+@dataclass
+class CircuitConfig:
+    # Failure (error or slow call) rate over the window that opens the circuit
+    failure_rate_threshold: float = 0.5
+    # Calls slower than this count as failures for the breaker
+    slow_call_seconds: float = 30.0
+    window_seconds: float = 60.0
+    # Do not judge the failure rate on fewer calls than this
+    minimum_calls: int = 4
+    # How long the circuit stays open before letting probe calls through
+    open_seconds: float = 30.0
+    half_open_max_calls: int = 1
+    hedge: bool = False
+    # Hedge delay used until enough latency samples exist for a p95
+    hedge_default_delay: float = 10.0
+
+
+DEPENDENCY_CONFIGS: Dict[str, CircuitConfig] = {
+    "imagen": CircuitConfig(slow_call_seconds=30.0),
+    "gemini": CircuitConfig(slow_call_seconds=30.0),
+    "gemini_image": CircuitConfig(slow_call_seconds=60.0, hedge_default_delay=20.0),
+}
+
+
+def config_from_env(name: str, base: CircuitConfig) -> CircuitConfig:
+    """``base`` with the ``CIRCUIT_<NAME>_*`` and ``HEDGED_DEPENDENCIES`` overrides applied."""
+    prefix = f"CIRCUIT_{name.upper()}_"
+    overrides = {}
+    for field, cast in (
+        ("failure_rate", float),
+        ("slow_call_seconds", float),
+        ("window_seconds", float),
+        ("minimum_calls", int),
+        ("open_seconds", float),
+    ):
+        value = os.getenv(prefix + field.upper())
+        if value:
+            key = "failure_rate_threshold" if field == "failure_rate" else field
+            overrides[key] = cast(value)
+    hedged = {d.strip() for d in os.getenv("HEDGED_DEPENDENCIES", "").split(",") if d.strip()}
+    if name in hedged:
+        overrides["hedge"] = True
+    return replace(base, **overrides)
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker on error rate and latency."""
+
+    def __init__(self, name: str, config: CircuitConfig):
+        self.name = name
+        self.config = config
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, failed)
+        self._latencies = deque(maxlen=200)  # successful call durations
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_since = 0.0
+        self._half_open_calls = 0
+        CIRCUIT_STATE.set(0, dependency=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.warning(f"Circuit '{self.name}' {self._state} -> {state}")
+        self._state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], dependency=self.name)
+
+    def _maybe_half_open(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= self.config.open_seconds:
+            self._set_state(HALF_OPEN)
+            self._half_open_since = now
+            self._half_open_calls = 0
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go to the dependency right now.
+
+        A granted call must end in :meth:`record` or :meth:`release`, or its
+        half-open probe slot is only reclaimed once the probe has taken longer
+        than the slow-call threshold (and so counts as failed).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                if self._half_open_calls < self.config.half_open_max_calls:
+                    self._half_open_calls += 1
+                    return True
+                if now - self._half_open_since > self.config.slow_call_seconds:
+                    self._open(now)
+            return False
+
+    def release(self):
+        """Give back a half-open probe slot whose call ended without an outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record(self, succeeded: bool, duration: float, sample: bool = True):
+        """
+        Outcome of a call. ``sample=False`` keeps the duration out of the
+        latency percentiles (answers that are not comparable, e.g. rejections).
+        """
+        failed = (not succeeded) or duration > self.config.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            if succeeded and sample:
+                self._latencies.append(duration)
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self._outcomes.clear()
+                    self._set_state(CLOSED)
+                return
+
+            self._outcomes.append((now, failed))
+            while self._outcomes and now - self._outcomes[0][0] > self.config.window_seconds:
+                self._outcomes.popleft()
+            if self._state == CLOSED and len(self._outcomes) >= self.config.minimum_calls:
+                failures = sum(1 for _, f in self._outcomes if f)
+                if failures / len(self._outcomes) >= self.config.failure_rate_threshold:
+                    self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._outcomes.clear()
+        self._set_state(OPEN)
+
+    def latency_p95(self) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < 20:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+# The SDK clients used here are blocking, so hedged and deadline-bounded calls
+# run on threads of their own. Only leaf calls run on these pools, never a task
+# that waits on another task of the same pool. A call cut by the deadline keeps
+# its thread until the SDK gives up, so the deadline pool is sized well above
+# the "ai" bulkhead that bounds how many such calls are in flight.
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("HEDGE_WORKERS", "16")), thread_name_prefix="hedge"
+)
+_deadline_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DEADLINE_CALL_WORKERS", "32")), thread_name_prefix="deadline"
+)
+
+
+class ResilientDependency:
+    """Circuit breaker (and optional hedging) in front of one external service."""
+
+    def __init__(self, name: str, config: CircuitConfig):
+        self.name = name
+        self.config = config
+        self.breaker = CircuitBreaker(name, config)
+
+    def _timed(self, fn: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            # A client error is still an answer: the dependency is up
+            self.breaker.record(not is_dependency_failure(e), time.perf_counter() - start, sample=False)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record(True, time.perf_counter() - start)
+        return result
+
+    def _submit(self, executor: ThreadPoolExecutor, fn: Callable, *args, **kwargs):
+        ctx = contextvars.copy_context()
+        return executor.submit(ctx.run, self._timed, fn, *args, **kwargs)
+
+    def _cut(self, deadline: Deadline) -> DeadlineExceeded:
+        # The call keeps running in the background; its outcome still feeds the breaker.
+        deadline.cut(self.name)
+        return DeadlineExceeded(f"'{self.name}' did not answer within the request deadline")
+
+    def _hedged(self, deadline: Optional[Deadline], fn: Callable, *args, **kwargs):
+        delay = self.breaker.latency_p95() or self.config.hedge_default_delay
+        primary = self._submit(_hedge_executor, fn, *args, **kwargs)
+        if deadline is not None:
+            delay = min(delay, deadline.remaining())
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        if deadline is not None and deadline.expired:
+            raise self._cut(deadline)
+
+        logger.info(f"'{self.name}' slower than {delay:.1f}s, sending hedged request")
+        hedge = self._submit(_hedge_executor, fn, *args, **kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            timeout = None if deadline is None else deadline.remaining()
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                raise self._cut(deadline)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                HEDGED.inc(dependency=self.name, winner="primary" if future is primary else "hedge")
+                # The slower request keeps running in the background; its
+                # outcome still feeds the breaker.
+                return result
+        raise error
+
+    def _bounded(self, deadline: Deadline, fn: Callable, *args, **kwargs):
+        future = self._submit(_deadline_executor, fn, *args, **kwargs)
+        done, _ = wait([future], timeout=deadline.remaining())
+        if not done:
+            raise self._cut(deadline)
+        return future.result()
+
+    def _run(self, deadline: Optional[Deadline], fn: Callable, *args, **kwargs):
+        if self.config.hedge:
+            return self._hedged(deadline, fn, *args, **kwargs)
+        if deadline is not None:
+            return self._bounded(deadline, fn, *args, **kwargs)
+        return self._timed(fn, *args, **kwargs)
+
+    def call(self, fn: Callable, *args, fallback: Optional[Callable] = None, **kwargs):
+        """
+        Call ``fn`` through the breaker.
+
+        When the circuit is open, the request deadline has run out, or ``fn``
+        raises, ``fallback()`` is returned instead; without a fallback the
+        error (or :class:`CircuitOpenError` / ``DeadlineExceeded``) propagates.
+        """
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            deadline.cut(self.name)
+            if fallback is None:
+                raise DeadlineExceeded(f"No request budget left for '{self.name}'")
+            FALLBACKS.inc(dependency=self.name)
+            return fallback()
+
+        if not self.breaker.allow():
+            SHORT_CIRCUITED.inc(dependency=self.name)
+            if fallback is None:
+                raise CircuitOpenError(f"Circuit for '{self.name}' is open")
+            logger.warning(f"Circuit for '{self.name}' is open, using fallback")
+            FALLBACKS.inc(dependency=self.name)
+            return fallback()
+
+        try:
+            return self._run(deadline, fn, *args, **kwargs)
+        except Exception as e:
+            if fallback is None:
+                raise
+            logger.error(f"'{self.name}' call failed, using fallback: {e}")
+            FALLBACKS.inc(dependency=self.name)
+            return fallback()
+
+
+_dependencies: Dict[str, ResilientDependency] = {}
+_dependencies_lock = threading.Lock()
+
+
+def get_dependency(name: str) -> ResilientDependency:
+    """Process-wide resilience wrapper for the named dependency."""
+    with _dependencies_lock:
+        dependency = _dependencies.get(name)
+        if dependency is None:
+            config = config_from_env(name, DEPENDENCY_CONFIGS.get(name, CircuitConfig()))
+            dependency = ResilientDependency(name, config)
+            _dependencies[name] = dependency
+        return dependency
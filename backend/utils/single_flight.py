@@ -0,0 +1,211 @@
+"""
+Single-flight coalescing of duplicate expensive operations.
+
+Concurrent calls with the same key share one in-flight computation: the
+first caller (the leader) runs it and every caller that arrives while it is
+running receives the same result, or the same exception. Nothing is kept
+once the computation finishes; this is not a cache.
+
+.. code-block:: python
+
+    from utils.single_flight import single_flight
+
+    png = single_flight.do(f"ad_banner:{uid}", _generate_ad_banner, uid)
+
+    ok = await single_flight.ado(f"video:{uid}", process_video, uid)
+
+Keys are ``"<operation>:<identity>"``; the operation part labels the metrics.
+
+Setting ``SINGLE_FLIGHT_LOCK_PATH`` to a SQLite file shared by all worker
+processes additionally takes a lease per key in that file, so leaders in
+different processes run one after the other. A leader that had to wait for
+another process's lease calls ``reuse()`` first and returns its result (e.g.
+the asset the other process just stored) instead of recomputing.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOCK_PATH = os.getenv("SINGLE_FLIGHT_LOCK_PATH", "")
+# A lease outlives a crashed holder by at most this long
+LEASE_TTL_SECONDS = float(os.getenv("SINGLE_FLIGHT_LEASE_TTL_SECONDS", "900"))
+LEASE_POLL_SECONDS = 0.5
+
+SINGLE_FLIGHT_CALLS = REGISTRY.counter(
+    "artisan_single_flight_calls_total",
+    "Single-flight calls by operation and role (leader, coalesced, reused).",
+    ("operation", "role"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS single_flight_leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def _operation(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class LeaseLock:
+    """Cross-process lease per key, held as a row in a SQLite table."""
+
+    def __init__(self, path: str, ttl_seconds: float = LEASE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        # One leader per key per process, so the process is the owner
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def try_acquire(self, key: str) -> bool:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM single_flight_leases WHERE key = ? AND expires_at <= ?", (key, now)
+                )
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO single_flight_leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, self.owner, now + self.ttl_seconds),
+                )
+                return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            # A broken lock file degrades to in-process coalescing only
+            logger.warning(f"Single-flight lease for '{key}' unavailable: {e}")
+            return True
+
+    def release(self, key: str) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM single_flight_leases WHERE key = ? AND owner = ?", (key, self.owner)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to release single-flight lease for '{key}': {e}")
+
+    def acquire(self, key: str) -> bool:
+        """Block until the lease is held; returns whether another process held it first."""
+        contended = False
+        while not self.try_acquire(key):
+            contended = True
+            time.sleep(LEASE_POLL_SECONDS)
+        return contended
+
+    async def aacquire(self, key: str) -> bool:
+        contended = False
+        while not await asyncio.to_thread(self.try_acquire, key):
+            contended = True
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+        return contended
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Keyed single-flight for sync (thread) and async callers."""
+
+    def __init__(self, lease: Optional[LeaseLock] = None):
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _lead(self, key: str, fn: Callable, args, kwargs, reuse: Optional[Callable]):
+        if self.lease is None:
+            return fn(*args, **kwargs)
+        contended = self.lease.acquire(key)
+        try:
+            if contended and reuse is not None:
+                result = reuse()
+                if result is not None:
+                    SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), role="reused")
+                    return result
+            return fn(*args, **kwargs)
+        finally:
+            self.lease.release(key)
+
+    def do(self, key: str, fn: Callable, *args, reuse: Optional[Callable] = None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight; share its outcome."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), role="coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), role="leader")
+        try:
+            call.result = self._lead(key, fn, args, kwargs, reuse)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def _alead(self, key: str, fn: Callable[..., Awaitable], args, kwargs, reuse: Optional[Callable]):
+        if self.lease is None:
+            return await fn(*args, **kwargs)
+        contended = await self.lease.aacquire(key)
+        try:
+            if contended and reuse is not None:
+                result = await asyncio.to_thread(reuse)
+                if result is not None:
+                    SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), role="reused")
+                    return result
+            return await fn(*args, **kwargs)
+        finally:
+            await asyncio.to_thread(self.lease.release, key)
+
+    async def ado(self, key: str, fn: Callable[..., Awaitable], *args, reuse: Optional[Callable] = None, **kwargs):
+        """Async :meth:`do`: share one task running ``await fn(*args, **kwargs)`` per key."""
+        task = self._tasks.get(key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), role="leader")
+            task = asyncio.ensure_future(self._alead(key, fn, args, kwargs, reuse))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), role="coalesced")
+        # A caller that disconnects must not cancel the work the others wait on
+        return await asyncio.shield(task)
+
+
+single_flight = SingleFlight(LeaseLock(LOCK_PATH) if LOCK_PATH else None)
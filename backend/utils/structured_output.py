@@ -0,0 +1,221 @@
+"""
+Schema-constrained generation with Pydantic validation.
+
+Instead of asking for JSON in the prompt and regex-parsing whatever comes
+back, callers describe the output as a Pydantic model. The model's JSON
+schema is passed to Gemini as ``response_schema`` (JSON mode), the reply is
+validated with Pydantic, and if validation still fails the model gets one
+bounded repair attempt with the validation error.
+
+.. code-block:: python
+
+    from utils.structured_output import generate_structured
+
+    story = generate_structured(
+        story_model, STORY_MODEL_NAME, prompt, ComicStory,
+        operation="comic_story", cache_namespace="comic_story",
+    )
+
+Every call goes through the shared rate limiter and external-call metrics;
+sync calls also go through the ``gemini`` circuit breaker, and validated
+replies can be cached in the LLM cache.
+"""
+
+import copy
+import logging
+from typing import Any, Dict, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from vertexai.generative_models import GenerationConfig, GenerativeModel
+
+from utils.llm_cache import cache_key, llm_cache
+from utils.metrics import REGISTRY, track_external
+from utils.rate_limiter import ai_rate_limiter
+from utils.resilience import get_dependency
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Keys of Pydantic's JSON schema that Gemini's response_schema rejects
+_UNSUPPORTED_KEYS = {
+    "title", "default", "additionalProperties", "examples", "const",
+    "minItems", "maxItems", "minLength", "maxLength", "pattern",
+    "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+}
+# Keywords whose value is a schema (or a list of schemas); every other
+# keyword's value is data (enum values, required field names, descriptions)
+_SUBSCHEMA_KEYS = {"items", "prefixItems", "anyOf", "allOf", "oneOf", "not"}
+
+MAX_REPAIR_ATTEMPTS = 1
+
+STRUCTURED_OUTCOMES = REGISTRY.counter(
+    "artisan_structured_output_total",
+    "Structured generations by call site and outcome (valid, repaired, invalid).",
+    ("operation", "outcome"),
+)
+
+
+class StructuredOutputError(ValueError):
+    """Raised when the model's reply does not validate even after repair."""
+
+
+def _resolve(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, list):
+        return [_resolve(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    if "$ref" in node:
+        target = defs[node["$ref"].split("/")[-1]]
+        return _resolve(copy.deepcopy(target), defs)
+
+    # Optional[X] is anyOf [X, null]; Gemini expresses that as nullable
+    any_of = node.get("anyOf")
+    if any_of and any(option.get("type") == "null" for option in any_of):
+        options = [option for option in any_of if option.get("type") != "null"]
+        if len(options) == 1:
+            merged = {**{k: v for k, v in node.items() if k != "anyOf"}, **options[0]}
+            resolved = _resolve(merged, defs)
+            resolved["nullable"] = True
+            return resolved
+
+    resolved = {}
+    for key, value in node.items():
+        if key in _UNSUPPORTED_KEYS or key == "$defs":
+            continue
+        if key == "properties":
+            # Field names, not keywords: a field may well be called "title"
+            resolved[key] = {name: _resolve(field, defs) for name, field in value.items()}
+        elif key in _SUBSCHEMA_KEYS:
+            resolved[key] = _resolve(value, defs)
+        else:
+            resolved[key] = value
+    return resolved
+
+
+def response_schema_for(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Gemini ``response_schema`` for a Pydantic model (refs inlined, unsupported keys dropped)."""
+    json_schema = schema.model_json_schema()
+    return _resolve(json_schema, json_schema.get("$defs", {}))
+
+
+def _generation_config(schema: Type[BaseModel], generation_config: Optional[dict]) -> GenerationConfig:
+    return GenerationConfig(
+        response_mime_type="application/json",
+        response_schema=response_schema_for(schema),
+        **(generation_config or {}),
+    )
+
+
+def _repair_prompt(prompt: str, reply: str, error: Exception) -> str:
+    return (
+        f"{prompt}\n\n"
+        "Your previous reply did not match the required JSON schema.\n"
+        f"Previous reply:\n{reply}\n\n"
+        f"Validation error:\n{error}\n\n"
+        "Return only the corrected JSON object."
+    )
+
+
+def _validate(schema: Type[T], reply: str) -> T:
+    return schema.model_validate_json(reply.strip())
+
+
+def _cached_reply(namespace: Optional[str], key: str, schema: Type[T]) -> Optional[T]:
+    if not namespace or not llm_cache.is_enabled(namespace):
+        return None
+    cached = llm_cache.get(namespace, key)
+    if cached is None:
+        return None
+    try:
+        return _validate(schema, cached)
+    except (ValidationError, ValueError):
+        # Written under an older schema; regenerate
+        return None
+
+
+def _store_reply(namespace: Optional[str], key: str, model_name: str, result: BaseModel) -> None:
+    if namespace and llm_cache.is_enabled(namespace):
+        llm_cache.set(namespace, key, model_name, result.model_dump_json())
+
+
+def generate_structured(
+    model: GenerativeModel,
+    model_name: str,
+    prompt: str,
+    schema: Type[T],
+    operation: str,
+    generation_config: Optional[dict] = None,
+    cache_namespace: Optional[str] = None,
+) -> T:
+    """
+    Generate a reply constrained to ``schema`` and return it validated.
+
+    Raises:
+        StructuredOutputError: the reply (and the repaired reply) did not validate
+        CircuitOpenError: Gemini's circuit is open
+    """
+    config = _generation_config(schema, generation_config)
+    key = cache_key(model_name, prompt, {**(generation_config or {}), "schema": response_schema_for(schema)})
+    cached = _cached_reply(cache_namespace, key, schema)
+    if cached is not None:
+        return cached
+
+    def call(contents: str) -> str:
+        with ai_rate_limiter.acquire_sync(model_name), track_external("gemini", operation):
+            response = model.generate_content(contents, generation_config=config)
+        return response.text
+
+    gemini = get_dependency("gemini")
+    reply = gemini.call(call, prompt)
+    for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
+        try:
+            result = _validate(schema, reply)
+        except (ValidationError, ValueError) as e:
+            if attempt == MAX_REPAIR_ATTEMPTS:
+                STRUCTURED_OUTCOMES.inc(operation=operation, outcome="invalid")
+                raise StructuredOutputError(f"{operation}: invalid structured output: {e}") from e
+            logger.warning(f"{operation}: structured output invalid, requesting repair: {e}")
+            reply = gemini.call(call, _repair_prompt(prompt, reply, e))
+            continue
+        STRUCTURED_OUTCOMES.inc(operation=operation, outcome="repaired" if attempt else "valid")
+        _store_reply(cache_namespace, key, model_name, result)
+        return result
+
+
+async def agenerate_structured(
+    model: GenerativeModel,
+    model_name: str,
+    prompt: str,
+    schema: Type[T],
+    operation: str,
+    generation_config: Optional[dict] = None,
+    cache_namespace: Optional[str] = None,
+) -> T:
+    """Async variant of :func:`generate_structured` (no circuit breaker)."""
+    config = _generation_config(schema, generation_config)
+    key = cache_key(model_name, prompt, {**(generation_config or {}), "schema": response_schema_for(schema)})
+    cached = _cached_reply(cache_namespace, key, schema)
+    if cached is not None:
+        return cached
+
+    async def call(contents: str) -> str:
+        async with ai_rate_limiter.acquire(model_name), track_external("gemini", operation):
+            response = await model.generate_content_async(contents, generation_config=config)
+        return response.text
+
+    reply = await call(prompt)
+    for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
+        try:
+            result = _validate(schema, reply)
+        except (ValidationError, ValueError) as e:
+            if attempt == MAX_REPAIR_ATTEMPTS:
+                STRUCTURED_OUTCOMES.inc(operation=operation, outcome="invalid")
+                raise StructuredOutputError(f"{operation}: invalid structured output: {e}") from e
+            logger.warning(f"{operation}: structured output invalid, requesting repair: {e}")
+            reply = await call(_repair_prompt(prompt, reply, e))
+            continue
+        STRUCTURED_OUTCOMES.inc(operation=operation, outcome="repaired" if attempt else "valid")
+        _store_reply(cache_namespace, key, model_name, result)
+        return result